@@ -0,0 +1 @@
+"""Performance benchmarks for pricing ERP."""
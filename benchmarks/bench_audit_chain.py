@@ -0,0 +1,49 @@
+"""Full vs. incremental verification of the audit hash chain.
+
+Usage: python -m benchmarks.bench_audit_chain [--rows 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from erp.infrastructure.audit_chain import AuditChainVerifier
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository
+from erp.infrastructure.database import Database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--new-rows", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        repository = AuditRepository(database)
+        for start in range(0, args.rows, 10000):
+            count = min(10000, args.rows - start)
+            repository.log_many(
+                AuditEvent("bench", "SAVE", "quote", str(start + idx), "benchmark") for idx in range(count)
+            )
+
+        verifier = AuditChainVerifier(repository)
+        started = time.perf_counter()
+        full = verifier.verify(full=True)
+        print(f"completa:    {full.checked_rows} linhas em {(time.perf_counter() - started) * 1000:9.1f}ms")
+
+        repository.log_many(AuditEvent("bench", "SAVE", "quote", str(idx), "novo") for idx in range(args.new_rows))
+        started = time.perf_counter()
+        incremental = verifier.verify()
+        print(
+            f"incremental: {incremental.checked_rows} linhas em "
+            f"{(time.perf_counter() - started) * 1000:9.1f}ms (ok={incremental.ok})"
+        )
+
+
+if __name__ == "__main__":
+    main()
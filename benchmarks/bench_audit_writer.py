@@ -0,0 +1,65 @@
+"""Per-action audit latency: synchronous repository vs. batched background writer.
+
+Usage: python -m benchmarks.bench_audit_writer [--events 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+from erp.infrastructure.audit_repository import AuditRepository
+from erp.infrastructure.audit_writer import AuditWriter
+from erp.infrastructure.database import Database
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _measure(sink, events: int) -> list[float]:
+    samples = []
+    for idx in range(events):
+        started = time.perf_counter()
+        sink.log("bench", "SAVE", "quote", str(idx), "benchmark")
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float], total_s: float) -> None:
+    print(
+        f"{label:<12} mean={statistics.mean(samples):8.4f}ms "
+        f"p50={_percentile(samples, 50):8.4f}ms p99={_percentile(samples, 99):8.4f}ms "
+        f"total={total_s:7.3f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        repository = AuditRepository(database)
+
+        started = time.perf_counter()
+        sync_samples = _measure(repository, args.events)
+        _report("sincrono", sync_samples, time.perf_counter() - started)
+
+        writer = AuditWriter(repository)
+        started = time.perf_counter()
+        with writer:
+            async_samples = _measure(writer, args.events)
+        _report("em lote", async_samples, time.perf_counter() - started)
+        print(f"lotes gravados: {writer.batch_count}")
+
+
+if __name__ == "__main__":
+    main()
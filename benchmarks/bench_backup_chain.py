@@ -0,0 +1,63 @@
+"""Backup and restore timings for full vs. incremental chain entries.
+
+Usage: python -m benchmarks.bench_backup_chain [--size-mb 512]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository
+from erp.infrastructure.backup_chain import BackupChain
+from erp.infrastructure.backup_service import BackupService
+from erp.infrastructure.database import Database
+
+
+def _fill(repository: AuditRepository, size_mb: int) -> None:
+    details = "detalhe de auditoria " * 20
+    rows = size_mb * 1024 * 1024 // (len(details) + 200)
+    for start in range(0, rows, 20000):
+        repository.log_many(
+            AuditEvent("bench", "SAVE", "quote", str(start + idx), details)
+            for idx in range(min(20000, rows - start))
+        )
+
+
+def _timed(label: str, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<24} {time.perf_counter() - started:8.2f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        database = Database(str(root / "bench.db"))
+        database.initialize()
+        repository = AuditRepository(database)
+        _timed("gerar base", lambda: _fill(repository, args.size_mb))
+        db_mb = (root / "bench.db").stat().st_size / 1024 / 1024
+        print(f"tamanho do banco: {db_mb:.0f} MB")
+
+        chain = BackupChain(BackupService(root / "bench.db", root / "backups", pages_per_step=4096, step_pause=0))
+        full = _timed("backup completo", chain.create)
+        repository.log_many(AuditEvent("bench", "SAVE", "quote", str(idx), "novo") for idx in range(args.changes))
+        incr = _timed("backup incremental", chain.create)
+        _timed("restauracao", lambda: chain.restore(root / "restored.db"))
+
+        for entry in (full, incr):
+            size = (chain.chain_dir / entry.data_file).stat().st_size / 1024 / 1024
+            print(f"{entry.kind:<12} {entry.changed_pages:>9} paginas  {size:9.1f} MB comprimido")
+
+
+if __name__ == "__main__":
+    main()
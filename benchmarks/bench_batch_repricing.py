@@ -0,0 +1,60 @@
+"""Batch repricing throughput and speedup per worker count on synthetic quotes.
+
+Compute-only runs stream generated rows straight to the workers; with
+--persist the rows are first loaded into a temporary database and the
+repriced versions are written back.
+
+Usage: python -m benchmarks.bench_batch_repricing [--rows 1000000] [--workers 1,2,4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import iter_chunks, seed_database
+from erp.application.batch_repricing import BatchRepricer, parse_overrides
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, os.cpu_count() or 1)))
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--persist", action="store_true", help="le e grava em um banco temporario")
+    args = parser.parse_args()
+
+    worker_counts = sorted({max(1, int(item)) for item in args.workers.split(",")})
+    overrides = parse_overrides(["sale.icms_rate_pct=12"])
+    print(f"{args.rows} cotacoes, blocos de {args.chunk_size}, {os.cpu_count()} CPUs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        if args.persist:
+            started = time.perf_counter()
+            seed_database(database, args.rows)
+            print(f"carga inicial {time.perf_counter() - started:8.2f}s")
+        repository = QuoteRepository(database)
+
+        baseline = None
+        for workers in worker_counts:
+            repricer = BatchRepricer(repository, workers=workers, chunk_size=args.chunk_size)
+            if args.persist:
+                report = repricer.run(overrides)
+            else:
+                report = repricer.process(iter_chunks(args.rows, args.chunk_size), overrides, persist=False)
+            baseline = baseline or report.elapsed_s
+            print(
+                f"{workers:>2} processos  {report.elapsed_s:8.2f}s  {report.rows_per_second:10.0f} linhas/s  "
+                f"speedup {baseline / report.elapsed_s:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
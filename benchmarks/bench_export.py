@@ -0,0 +1,50 @@
+"""Export throughput and peak memory for CSV and JSON Lines.
+
+Usage: python -m benchmarks.bench_export [--rows 2000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import resource
+import tempfile
+
+from benchmarks.synthetic import seed_database
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_export import QuoteExporter
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        seed_database(database, args.rows)
+        print(f"{args.rows} cotacoes; pico de memoria apos a carga {_peak_rss_mb():.0f} MB")
+
+        exporter = QuoteExporter(database, batch_size=args.batch_size)
+        for table in ("quotes", "versions"):
+            for fmt in ("csv", "jsonl"):
+                target = Path(tmp) / f"{table}.{fmt}"
+                with target.open("w", encoding="utf-8", newline="") as output:
+                    result = exporter.export(output, table=table, fmt=fmt)
+                size_mb = os.path.getsize(target) / 1024 / 1024
+                print(
+                    f"{table:<8} {fmt:<5} {result.elapsed_s:7.2f}s  {result.rows_per_second:9.0f} linhas/s  "
+                    f"{size_mb:8.1f} MB  pico {_peak_rss_mb():.0f} MB"
+                )
+                target.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Load test for the pricing API: requests/second and latency percentiles.
+
+Starts the server in-process on a temporary database unless --url is given.
+Usage: python -m benchmarks.bench_http_api [--clients 16] [--requests 500] [--path /v1/pricing/from-margin]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from erp.application.quote_service import QuoteService
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+from erp.presentation.http_api import PricingApi, PricingHttpServer
+
+
+_PURCHASE = {
+    "base_price": "100",
+    "ipi_rate_pct": "5",
+    "st_rate_pct": "8",
+    "icms_rate_pct": "18",
+    "pis_rate_pct": "1.65",
+    "cofins_rate_pct": "7.6",
+    "credit_icms": True,
+    "credit_pis": True,
+    "credit_cofins": True,
+}
+_SALE = {"pis_rate_pct": "1.65", "cofins_rate_pct": "7.6", "icms_rate_pct": "18"}
+_BODIES = {
+    "/v1/pricing/from-margin": {"purchase": _PURCHASE, "sale": _SALE, "margin_pct": "25"},
+    "/v1/pricing/batch": {"items": [{"purchase": _PURCHASE, "sale": _SALE, "margin_pct": "25"}] * 50},
+}
+
+
+def _start_local_server(db_path: Path) -> int:
+    database = Database(str(db_path), reuse_connections=True)
+    database.initialize()
+    service = QuoteService(pricing_engine=PricingEngine(), repository=QuoteRepository(database))
+    server = PricingHttpServer(PricingApi(service), port=0)
+    ready = threading.Event()
+
+    def run() -> None:
+        async def main() -> None:
+            await server.start()
+            ready.set()
+            await server.serve_forever()
+
+        asyncio.run(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait(10)
+    return server.port
+
+
+async def _client(host: str, port: int, method: str, path: str, body: bytes, count: int, samples: list[float]):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while (line := await reader.readline()) != b"\r\n":
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        writer.close()
+
+
+async def _run(host: str, port: int, args: argparse.Namespace) -> tuple[list[float], float]:
+    body = json.dumps(_BODIES.get(args.path, {})).encode() if args.method == "POST" else b""
+    samples: list[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _client(host, port, args.method, args.path, body, args.requests, samples)
+            for _ in range(args.clients)
+        )
+    )
+    return samples, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="servidor existente, ex.: http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requisicoes por cliente")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--path", default="/v1/pricing/from-margin")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname or "127.0.0.1", url.port or 80
+        else:
+            host, port = "127.0.0.1", _start_local_server(Path(tmp) / "bench.db")
+
+        samples, elapsed = asyncio.run(_run(host, port, args))
+
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{args.method} {args.path}: {len(samples)} requisicoes, {args.clients} clientes")
+    print(f"vazao: {len(samples) / elapsed:8.0f} req/s   p50={p50:6.2f}ms   p99={p99:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
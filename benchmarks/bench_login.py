@@ -0,0 +1,87 @@
+"""CPU cost per login attempt, with and without throttling and session tokens.
+
+A few threads hammer the login with a wrong password for a fixed time;
+the CPU time of the process (not wall time) is divided by the attempts,
+and PBKDF2 counts the attempts that reached the password hash.
+
+Usage: python -m benchmarks.bench_login [--threads 4] [--seconds 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from erp.application.auth_service import AuthService
+from erp.application.login_throttle import LoginThrottle, LoginThrottledError
+from erp.infrastructure.auth_repository import AuthRepository
+from erp.infrastructure.database import Database
+
+
+def _hammer(attempt: Callable[[int], None], threads: int, seconds: float) -> tuple[int, float, float]:
+    """Returns (attempts, cpu seconds, wall seconds)."""
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def run(index: int) -> None:
+        while time.perf_counter() < deadline:
+            attempt(index)
+            counts[index] += 1
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    workers = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(counts), time.process_time() - cpu_started, time.perf_counter() - wall_started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        repository = AuthRepository(database)
+        repository.ensure_default_admin()
+
+        open_service = AuthService(repository, throttle=LoginThrottle(free_attempts=10**9))
+        throttled = AuthService(repository)
+        token = throttled.start_session("admin", "admin123")
+
+        hashed = {"senha errada, sem limite": 0, "senha errada, com limite": 0, "token de sessao": 0}
+
+        def wrong_password(label: str, service: AuthService) -> Callable[[int], None]:
+            def attempt(index: int) -> None:
+                try:
+                    service.login("admin", "errada", source=f"10.0.0.{index}")
+                except LoginThrottledError:
+                    return
+                hashed[label] += 1
+
+            return attempt
+
+        scenarios = {
+            "senha errada, sem limite": wrong_password("senha errada, sem limite", open_service),
+            "senha errada, com limite": wrong_password("senha errada, com limite", throttled),
+            "token de sessao": lambda _index: throttled.session_user(token),
+        }
+        print(f"{'cenario':<28} {'tentativas':>10} {'PBKDF2':>7} {'CPU s':>8} {'CPU/tentativa':>15} {'por s':>10}")
+        for label, attempt in scenarios.items():
+            attempts, cpu_s, wall_s = _hammer(attempt, args.threads, args.seconds)
+            print(
+                f"{label:<28} {attempts:>10} {hashed[label]:>7} {cpu_s:>8.2f} {cpu_s / max(1, attempts) * 1000:>12.3f} ms "
+                f"{attempts / wall_s:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
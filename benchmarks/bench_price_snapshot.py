@@ -0,0 +1,93 @@
+"""Price snapshot publishing time and lookup latency.
+
+Publishes the approved quotes of a synthetic database (full, then
+incremental after a few saves) and times lookups on the memory-mapped
+file, against the same lookup as a SQLite query. ``--entries`` also
+times lookups on a synthetic snapshot of that many products.
+
+Usage: python -m benchmarks.bench_price_snapshot [--rows 200000] [--saves 100] [--entries 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import os
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import seed_database
+from erp.infrastructure.database import Database
+from erp.infrastructure.price_snapshot import PriceSnapshot, PriceSnapshotPublisher, write_snapshot
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+def _lookups_us(lookup, names: list[str]) -> float:
+    started = time.perf_counter()
+    for name in names:
+        lookup(name)
+    return (time.perf_counter() - started) / len(names) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--saves", type=int, default=100)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        seed_database(database, args.rows, seed=args.seed)
+        path = Path(tmp) / "precos.bin"
+        publisher = PriceSnapshotPublisher(database, path)
+
+        full = publisher.publish(full=True)
+        print(
+            f"{args.rows} cotacoes: publicacao completa {full.elapsed_s * 1000:.0f} ms, "
+            f"{full.entries} produtos, {os.path.getsize(path) / 1024:.0f} KB"
+        )
+        repository = QuoteRepository(database)
+        for _ in range(args.saves):
+            quote = repository.get(rng.randint(1, args.rows))
+            repository.save(replace(quote, status="APROVADA"))
+        incremental = publisher.publish()
+        print(
+            f"incremental apos {args.saves} gravacoes: {incremental.elapsed_s * 1000:.0f} ms "
+            f"({'completa' if incremental.full else f'{incremental.changes} alteracoes'})"
+        )
+        unchanged = publisher.publish()
+        print(f"sem alteracoes: {unchanged.elapsed_s * 1000:.1f} ms")
+
+        names = [f"Produto {rng.randrange(25_000)}" for _ in range(args.lookups)]
+        with PriceSnapshot(path) as snapshot:
+            print(f"lookup mmap ({len(snapshot)} produtos): {_lookups_us(snapshot.lookup, names):.2f} us")
+        with database.connect() as conn:
+            sql = (
+                "SELECT json_extract(result_payload, '$.sale_price') FROM quotes "
+                "WHERE status = 'APROVADA' AND product_name = ? ORDER BY updated_at DESC LIMIT 1"
+            )
+            sample = names[: max(1, args.lookups // 1000)]
+            sqlite_us = _lookups_us(lambda name: conn.execute(sql, (name,)).fetchone(), sample)
+            print(f"lookup SQLite (quotes, {len(sample)} consultas): {sqlite_us:.0f} us")
+
+        if args.entries:
+            big = Path(tmp) / "grande.bin"
+            write_snapshot(
+                big,
+                ((f"produto {idx:07d}".encode(), idx, 1000 + idx, 2500, 0) for idx in range(args.entries)),
+                0,
+            )
+            probes = [f"Produto {rng.randrange(args.entries * 2):07d}" for _ in range(args.lookups)]
+            with PriceSnapshot(big) as snapshot:
+                print(f"lookup mmap ({len(snapshot)} produtos sinteticos): {_lookups_us(snapshot.lookup, probes):.2f} us")
+
+
+if __name__ == "__main__":
+    main()
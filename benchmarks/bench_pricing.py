@@ -0,0 +1,172 @@
+"""Pricing hot-path benchmarks with a stored baseline and regression check.
+
+Usage:
+  python -m benchmarks.bench_pricing                   # compare with the baseline
+  python -m benchmarks.bench_pricing --threshold 0.15  # exit 1 on a >15% regression
+  python -m benchmarks.bench_pricing --update-baseline
+
+The baseline lives in benchmarks/baselines/pricing.json. The threshold can
+also be set with ERP_BENCH_THRESHOLD (default 0.3).
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict
+from decimal import Decimal
+import itertools
+import json
+import os
+import random
+from typing import Callable
+
+from benchmarks.harness import find_regressions, load_baseline, print_results, run_cases, save_baseline
+from erp.application.quote_service import QuoteService
+from erp.domain.models import PurchaseInput, QuoteRecord, SaleInput, parse_decimal
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository, prepare_quote, record_from_row
+
+
+BASELINE = "pricing"
+_SAMPLES = 512
+
+
+def _inputs(seed: int = 11) -> list[tuple[PurchaseInput, SaleInput, Decimal]]:
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(_SAMPLES):
+        purchase = PurchaseInput(
+            base_price=Decimal(rng.randint(100, 1_000_000)) / 100,
+            ipi_rate_pct=Decimal(rng.choice(("0", "5", "10", "15", "32.5"))),
+            st_rate_pct=Decimal(rng.choice(("0", "0", "0", "4.5", "8"))),
+            icms_rate_pct=Decimal(rng.choice(("4", "7", "12", "18", "20.5"))),
+            pis_rate_pct=Decimal(rng.choice(("0", "0.65", "1.65"))),
+            cofins_rate_pct=Decimal(rng.choice(("0", "3", "7.6"))),
+            credit_icms=rng.random() < 0.8,
+            credit_pis=rng.random() < 0.6,
+            credit_cofins=rng.random() < 0.6,
+        )
+        sale = SaleInput(
+            pis_rate_pct=Decimal(rng.choice(("0.65", "1.65"))),
+            cofins_rate_pct=Decimal(rng.choice(("3", "7.6"))),
+            icms_rate_pct=Decimal(rng.choice(("7", "12", "18"))),
+            markup_rate_pct=Decimal(rng.choice(("0", "0", "5", "12.5"))),
+            apply_markup=rng.random() < 0.3,
+        )
+        samples.append((purchase, sale, Decimal(rng.randint(500, 6000)) / 100))
+    return samples
+
+
+def _decimal_texts(seed: int = 13) -> list[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(_SAMPLES):
+        value = rng.randint(0, 10_000_000) / 100
+        texts.append(
+            rng.choice(
+                (
+                    f"{value:.2f}",
+                    f"{value:.2f}".replace(".", ","),
+                    f"R$ {value:,.2f}".replace(",", "_").replace(".", ",").replace("_", "."),
+                    f"{value:.1f}%",
+                    "",
+                    "abc",
+                )
+            )
+        )
+    return texts
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    engine = PricingEngine()
+    # apply_business_rules never touches the database; an unopened in-memory one is enough.
+    service = QuoteService(pricing_engine=engine, repository=QuoteRepository(Database(":memory:")))
+    inputs = _inputs()
+    results = [engine.calculate_from_margin(purchase, sale, margin) for purchase, sale, margin in inputs]
+    priced = [(purchase, sale, result) for (purchase, sale, _margin), result in zip(inputs, results)]
+    texts = _decimal_texts()
+
+    rows = []
+    for idx, (purchase, sale, result) in enumerate(priced, start=1):
+        quote = QuoteRecord(idx, 1, "RASCUNHO", f"Produto {idx}", "Geral", "Fornecedor", "admin", "",
+                            purchase, sale, result)
+        prepared = prepare_quote(quote)
+        rows.append(
+            {
+                "id": idx,
+                "version": 1,
+                "status": quote.status,
+                "product_name": quote.product_name,
+                "category_name": quote.category_name,
+                "supplier_name": quote.supplier_name,
+                "owner_user": quote.owner_user,
+                "notes": quote.notes,
+                "purchase_payload": prepared.purchase_payload,
+                "sale_payload": prepared.sale_payload,
+                "result_payload": prepared.result_payload,
+                "created_at": "2026-01-01T00:00:00+00:00",
+                "updated_at": "2026-01-01T00:00:00+00:00",
+            }
+        )
+
+    margin_cycle = itertools.cycle(inputs)
+    price_cycle = itertools.cycle(inputs)
+    rules_cycle = itertools.cycle(priced)
+    strategies = itertools.cycle(("NORMAL", "X90", "X99"))
+    text_cycle = itertools.cycle(texts)
+    row_cycle = itertools.cycle(rows)
+
+    def from_margin() -> object:
+        purchase, sale, margin = next(margin_cycle)
+        return engine.calculate_from_margin(purchase, sale, margin)
+
+    def from_price() -> object:
+        purchase, sale, margin = next(price_cycle)
+        return engine.calculate_from_price(purchase, sale, margin * 10)
+
+    def business_rules() -> object:
+        purchase, sale, result = next(rules_cycle)
+        return service.apply_business_rules(purchase, sale, result, next(strategies), Decimal("25"))
+
+    def parse() -> object:
+        return parse_decimal(next(text_cycle))
+
+    def row_to_record() -> object:
+        return record_from_row(next(row_cycle))
+
+    return {
+        "calculate_from_margin": from_margin,
+        "calculate_from_price": from_price,
+        "apply_business_rules": business_rules,
+        "parse_decimal": parse,
+        "row_to_record": row_to_record,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("ERP_BENCH_THRESHOLD", "0.3")))
+    parser.add_argument("--min-time", type=float, default=0.5, help="segundos por medicao")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    baseline = load_baseline(BASELINE)
+    reference, results = run_cases(build_cases(), min_time=args.min_time)
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print_results(reference, results, baseline)
+
+    if args.update_baseline:
+        print(f"linha de base gravada em {save_baseline(BASELINE, reference, results)}")
+        return 0
+    regressions = find_regressions(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSAO {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
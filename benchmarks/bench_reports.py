@@ -0,0 +1,47 @@
+"""Dashboard query latency over the materialized daily summaries.
+
+Usage: python -m benchmarks.bench_reports [--rows 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from benchmarks.synthetic import seed_database
+from erp.application.report_service import ReportService
+from erp.infrastructure.database import Database
+from erp.infrastructure.report_repository import ReportRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "bench.db"))
+        database.initialize()
+        started = time.perf_counter()
+        seed_database(database, args.rows)
+        print(f"carga de {args.rows} cotacoes (com gatilhos) {time.perf_counter() - started:8.2f}s")
+
+        service = ReportService(ReportRepository(database))
+        queries = {
+            "totais do periodo": lambda: service.period_totals("2024-02-01", "2024-03-31"),
+            "por fornecedor": lambda: service.breakdown("supplier", "2024-02-01", "2024-03-31"),
+            "serie diaria": lambda: service.daily_series("2024-01-01", "2024-12-31"),
+            "dashboard completo": lambda: service.dashboard(),
+        }
+        for label, query in queries.items():
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                query()
+            print(f"{label:<20} {(time.perf_counter() - started) / args.repeat * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
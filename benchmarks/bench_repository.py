@@ -0,0 +1,109 @@
+"""QuoteRepository latency percentiles at growing data sizes.
+
+The database grows in place from one size to the next (quotes plus a
+skewed version history), and each operation is sampled on random quotes
+after every step.
+
+Usage: python -m benchmarks.bench_repository [--sizes 10000,100000,1000000] [--versions 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+from pathlib import Path
+import random
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.synthetic import seed_database
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _timed(func: Callable[[], object]) -> Callable[[], float]:
+    def run() -> float:
+        started = time.perf_counter()
+        func()
+        return (time.perf_counter() - started) * 1000
+
+    return run
+
+
+def _operations(repository: QuoteRepository, size: int, rng: random.Random) -> dict[str, Callable[[], float]]:
+    """Each operation returns its own latency in ms (updates exclude the read of the current version)."""
+    template = repository.get(1)
+
+    def random_id() -> int:
+        return rng.randint(1, size)
+
+    def save_update() -> float:
+        current = repository.get(random_id())
+        return _timed(lambda: repository.save(replace(current, notes="revisada")))()
+
+    return {
+        "save (nova)": _timed(lambda: repository.save(replace(template, quote_id=None, version=1))),
+        "save (atualiza)": save_update,
+        "get": _timed(lambda: repository.get(random_id())),
+        "get_version": _timed(lambda: repository.get_version(random_id(), 1)),
+        "list_versions": _timed(lambda: repository.list_versions(random_id())),
+        "list_recent": _timed(lambda: repository.list_recent(limit=200)),
+        "changes_since (10 alteracoes)": _timed(lambda: repository.changes_since(repository.change_seq() - 10)),
+        "list_recent status": _timed(lambda: repository.list_recent(limit=200, filters={"status": "APROVADA"})),
+        "list_recent fornecedor": _timed(
+            lambda: repository.list_recent(limit=200, filters={"supplier": f"fornecedor {rng.randrange(500)}"})
+        ),
+        "list_recent produto": _timed(
+            lambda: repository.list_recent(limit=200, filters={"product": f"produto {rng.randrange(20000)}"})
+        ),
+        "list_recent periodo": _timed(
+            lambda: repository.list_recent(limit=200, filters={"date_from": "2024-01-02", "date_to": "2024-01-09"})
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--versions", type=float, default=20.0, help="media de versoes por cotacao")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sizes = sorted(int(item) for item in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        database = Database(str(db_path))
+        database.initialize()
+        repository = QuoteRepository(database)
+        for size in sizes:
+            started = time.perf_counter()
+            # Sampled saves add quotes too, so continue after whatever is already there.
+            with database.connect() as conn:
+                count, max_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM quotes").fetchone()
+            seed_database(database, size - count, seed=args.seed, mean_versions=args.versions, start_id=max_id + 1)
+            with database.connect() as conn:
+                versions = conn.execute("SELECT COUNT(*) FROM quote_versions").fetchone()[0]
+            print(
+                f"\n{size} cotacoes, {versions} versoes, {db_path.stat().st_size / 1024 / 1024:.0f} MB "
+                f"(carga {time.perf_counter() - started:.1f}s)"
+            )
+            print(f"{'operacao':<24} {'p50':>9} {'p95':>9} {'p99':>9}  ms")
+            rng = random.Random(args.seed)
+            for label, operation in _operations(repository, size, rng).items():
+                timings = [operation() for _ in range(args.samples)]
+                print(
+                    f"{label:<24} {_percentile(timings, 50):9.3f} {_percentile(timings, 95):9.3f} "
+                    f"{_percentile(timings, 99):9.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
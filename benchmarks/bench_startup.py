@@ -0,0 +1,52 @@
+"""Wall-clock from process start to first paint of the desktop window.
+
+Needs a display and customtkinter. Usage: python -m benchmarks.bench_startup [--runs 5]
+Import cost per module: python -X importtime erp_precos.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+_PROBE = """
+import time
+started = time.perf_counter()
+import erp_precos
+imported = time.perf_counter()
+app = erp_precos.PricingERPApp()
+
+done = []
+
+def painted():
+    if done:
+        return
+    done.append(True)
+    print(f"{(imported - started) * 1000:.1f} {(time.perf_counter() - started) * 1000:.1f}")
+    app.destroy()
+
+app.bind("<Map>", lambda _e: app.after_idle(painted), add="+")
+app.mainloop()
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports, paints = [], []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True)
+        import_ms, paint_ms = (float(value) for value in output.stdout.split()[-2:])
+        imports.append(import_ms)
+        paints.append(paint_ms)
+    print(f"imports:          mediana {statistics.median(imports):8.1f}ms")
+    print(f"primeira pintura: mediana {statistics.median(paints):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Small measurement helpers shared by the benchmarks with regression baselines.
+
+Throughput is reported both raw and normalized by a fixed calibration
+workload, so a baseline recorded on one machine can still be compared on
+another: a regression is a drop of the normalized score.
+
+Cases are measured in interleaved rounds, each short case run sitting
+between two calibration runs. Dividing by the neighbouring calibration
+cancels slow drifts of the machine speed, and taking the median over the
+rounds discards the runs hit by a noisy neighbour.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+import gc
+import json
+from pathlib import Path
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+@dataclass(frozen=True)
+class CaseResult:
+    name: str
+    ops_per_second: float
+    normalized: float
+    peak_bytes_per_op: int
+
+
+def _calibration_op() -> Decimal:
+    total = Decimal("0")
+    for step in range(1, 51):
+        total += Decimal(step) * Decimal("1.07") / Decimal("3")
+    return total.quantize(Decimal("0.01"))
+
+
+def measure_ops(func: Callable[[], object], min_time: float = 0.5, repeat: int = 3) -> float:
+    """Best-of-``repeat`` calls per second, each run lasting at least ``min_time`` seconds."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 10:
+            break
+        loops *= 2
+    loops = max(1, int(loops * (min_time / elapsed)))
+
+    best = 0.0
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            best = max(best, loops / (time.perf_counter() - started))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def peak_bytes_per_op(func: Callable[[], object], calls: int = 200) -> int:
+    """Largest transient allocation of a single call, measured with tracemalloc."""
+    func()
+    tracemalloc.start()
+    try:
+        worst = 0
+        for _ in range(calls):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            worst = max(worst, peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return worst
+
+
+def calibrate(min_time: float = 0.5) -> float:
+    return measure_ops(_calibration_op, min_time=min_time)
+
+
+def _loops_for(func: Callable[[], object], run_time: float) -> int:
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= run_time / 4:
+            return max(1, int(loops * run_time / elapsed))
+        loops *= 2
+
+
+def _rate(func: Callable[[], object], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return loops / (time.perf_counter() - started)
+
+
+def run_cases(
+    cases: dict[str, Callable[[], object]], min_time: float = 0.5, rounds: int = 9
+) -> tuple[float, list[CaseResult]]:
+    """Median over ``rounds`` of each case's ops/s divided by the adjacent calibration runs.
+
+    ``min_time`` is the total measuring time per case, split across the rounds.
+    """
+    run_time = min_time / rounds
+    calibration_loops = _loops_for(_calibration_op, run_time)
+    loops = {name: _loops_for(func, run_time) for name, func in cases.items()}
+    rates: dict[str, list[float]] = {name: [] for name in cases}
+    ratios: dict[str, list[float]] = {name: [] for name in cases}
+    references: list[float] = []
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            before = _rate(_calibration_op, calibration_loops)
+            references.append(before)
+            for name, func in cases.items():
+                rate = _rate(func, loops[name])
+                after = _rate(_calibration_op, calibration_loops)
+                rates[name].append(rate)
+                ratios[name].append(rate / ((before + after) / 2))
+                references.append(after)
+                before = after
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    results = [
+        CaseResult(
+            name=name,
+            ops_per_second=statistics.median(rates[name]),
+            normalized=statistics.median(ratios[name]),
+            peak_bytes_per_op=peak_bytes_per_op(func),
+        )
+        for name, func in cases.items()
+    ]
+    return statistics.median(references), results
+
+
+def load_baseline(name: str) -> dict[str, dict[str, float]]:
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))["cases"]
+
+
+def save_baseline(name: str, reference: float, results: list[CaseResult]) -> Path:
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_ops_per_second": round(reference, 1),
+        "cases": {
+            result.name: {
+                "ops_per_second": round(result.ops_per_second, 1),
+                "normalized": round(result.normalized, 4),
+                "peak_bytes_per_op": result.peak_bytes_per_op,
+            }
+            for result in results
+        },
+    }
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return path
+
+
+def find_regressions(
+    results: list[CaseResult], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """Cases more than ``threshold`` (0.2 = 20%) slower, or allocating more, than the baseline."""
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if not expected:
+            continue
+        if result.normalized < expected["normalized"] * (1 - threshold):
+            drop = 1 - result.normalized / expected["normalized"]
+            regressions.append(f"{result.name}: {drop:.0%} mais lento que a linha de base")
+        if result.peak_bytes_per_op > expected["peak_bytes_per_op"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: pico de {result.peak_bytes_per_op} B/op "
+                f"(linha de base {expected['peak_bytes_per_op']} B/op)"
+            )
+    return regressions
+
+
+def print_results(reference: float, results: list[CaseResult], baseline: dict[str, dict[str, float]]) -> None:
+    print(f"calibracao {reference:,.0f} ops/s")
+    for result in results:
+        expected = baseline.get(result.name)
+        delta = f"{result.normalized / expected['normalized'] - 1:+7.1%}" if expected else "   novo"
+        print(
+            f"{result.name:<28} {result.ops_per_second:12,.0f} ops/s  {delta}  "
+            f"pico {result.peak_bytes_per_op:7,d} B/op"
+        )
@@ -0,0 +1,219 @@
+"""Synthetic quote data shared by the benchmarks.
+
+Rows are generated lazily from a small pool of priced templates, so even
+millions of rows cost little memory and almost no pricing work up front.
+Suppliers and products follow a Zipf-like distribution (a few are very
+common, most are rare) and the number of versions per quote is skewed the
+same way, which is closer to real history than uniform data.
+
+It can also fill a database file directly:
+
+  python -m benchmarks.synthetic data/escala.db --quotes 1000000 --versions 20 --audit 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+import random
+import time
+from typing import Iterator
+
+from erp.domain.models import PurchaseInput, QuoteRecord, SaleInput
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import prepare_quote
+
+
+STATUSES = ("RASCUNHO", "ENVIADA", "APROVADA", "REPROVADA")
+CATEGORIES = ("Eletrica", "Hidraulica", "Ferragens", "Tintas", "Ferramentas", "Geral")
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_TEMPLATES = 64
+_QUOTE_COLUMNS = (
+    "id", "version", "status", "product_name", "category_name", "supplier_name", "owner_user", "notes",
+    "purchase_payload", "sale_payload", "result_payload", "created_at", "updated_at",
+)
+_VERSION_COLUMNS = (
+    "quote_id", "version", "status", "product_name", "category_name", "supplier_name", "owner_user", "notes",
+    "purchase_payload", "sale_payload", "result_payload", "created_at",
+)
+
+
+def _templates(seed: int) -> list[tuple[str, str, str]]:
+    rng = random.Random(seed)
+    engine = PricingEngine()
+    payloads = []
+    for _ in range(_TEMPLATES):
+        purchase = PurchaseInput(
+            base_price=Decimal(rng.randint(500, 500000)) / 100,
+            ipi_rate_pct=Decimal(rng.choice((0, 5, 10, 15))),
+            st_rate_pct=Decimal(rng.choice((0, 0, 4))),
+            icms_rate_pct=Decimal(rng.choice((7, 12, 18))),
+            pis_rate_pct=Decimal("1.65"),
+            cofins_rate_pct=Decimal("7.6"),
+            credit_icms=True,
+            credit_pis=True,
+            credit_cofins=True,
+        )
+        sale = SaleInput(
+            pis_rate_pct=Decimal("1.65"),
+            cofins_rate_pct=Decimal("7.6"),
+            icms_rate_pct=Decimal(rng.choice((7, 12, 18))),
+        )
+        result = engine.calculate_from_margin(purchase, sale, Decimal(rng.randint(5, 60)))
+        quote = QuoteRecord(None, 1, "RASCUNHO", "", "", "", "", "", purchase, sale, result)
+        prepared = prepare_quote(quote)
+        payloads.append((prepared.purchase_payload, prepared.sale_payload, prepared.result_payload))
+    return payloads
+
+
+class _Zipf:
+    """Draws ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s."""
+
+    def __init__(self, n: int, s: float = 1.1):
+        self.cumulative = list(accumulate(1 / (rank + 1) ** s for rank in range(max(1, n))))
+        self.total = self.cumulative[-1]
+
+    def draw(self, rng: random.Random) -> int:
+        return bisect_left(self.cumulative, rng.random() * self.total)
+
+
+def iter_quote_rows(
+    count: int,
+    seed: int = 7,
+    suppliers: int = 500,
+    products: int = 20000,
+    mean_versions: float = 1.0,
+    start_id: int = 1,
+) -> Iterator[dict[str, object]]:
+    """Yields raw quote rows shaped like ``SELECT * FROM quotes``.
+
+    ``version`` carries the number of versions the quote went through, so
+    :func:`iter_version_rows` can rebuild its history.
+    """
+    rng = random.Random(seed * 1_000_003 + start_id)
+    templates = _templates(seed)
+    supplier_dist = _Zipf(suppliers)
+    product_dist = _Zipf(products)
+    extra_versions = max(0.0, mean_versions - 1)
+    for idx in range(start_id, start_id + count):
+        purchase_payload, sale_payload, result_payload = templates[rng.randrange(_TEMPLATES)]
+        versions = 1 + (int(rng.expovariate(1 / extra_versions)) if extra_versions else 0)
+        created = START + timedelta(minutes=idx)
+        product = product_dist.draw(rng)
+        yield {
+            "id": idx,
+            "version": versions,
+            "status": rng.choice(STATUSES),
+            "product_name": f"Produto {product}",
+            "category_name": CATEGORIES[product % len(CATEGORIES)],
+            "supplier_name": f"Fornecedor {supplier_dist.draw(rng)}",
+            "owner_user": f"vendedor{rng.randrange(20)}",
+            "notes": "",
+            "purchase_payload": purchase_payload,
+            "sale_payload": sale_payload,
+            "result_payload": result_payload,
+            "created_at": created.isoformat(),
+            "updated_at": (created + timedelta(seconds=30 * (versions - 1))).isoformat(),
+        }
+
+
+def iter_version_rows(row: dict[str, object], templates: list[tuple[str, str, str]]) -> Iterator[tuple]:
+    """Rebuilds the snapshot history of a generated quote; the last one matches the quote row."""
+    created = datetime.fromisoformat(str(row["created_at"]))
+    versions = int(row["version"])
+    for version in range(1, versions + 1):
+        if version == versions:
+            payloads = (row["purchase_payload"], row["sale_payload"], row["result_payload"])
+            status = row["status"]
+        else:
+            payloads = templates[(int(row["id"]) + version) % _TEMPLATES]
+            status = "RASCUNHO"
+        yield (
+            row["id"], version, status, row["product_name"], row["category_name"], row["supplier_name"],
+            row["owner_user"], row["notes"], *payloads,
+            (created + timedelta(seconds=30 * (version - 1))).isoformat(),
+        )
+
+
+def iter_chunks(count: int, chunk_size: int, seed: int = 7) -> Iterator[list[dict[str, object]]]:
+    chunk: list[dict[str, object]] = []
+    for row in iter_quote_rows(count, seed=seed):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def seed_database(
+    database: Database,
+    count: int,
+    seed: int = 7,
+    batch: int = 20000,
+    mean_versions: float = 1.0,
+    start_id: int = 1,
+    audit_rows: int = 0,
+) -> None:
+    """Bulk-loads ``count`` synthetic quotes with their version history and audit rows."""
+    templates = _templates(seed)
+    quote_sql = f"INSERT INTO quotes ({', '.join(_QUOTE_COLUMNS)}) VALUES ({', '.join('?' * len(_QUOTE_COLUMNS))})"
+    version_sql = (
+        f"INSERT INTO quote_versions ({', '.join(_VERSION_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_VERSION_COLUMNS))})"
+    )
+    rows = iter_quote_rows(count, seed=seed, mean_versions=mean_versions, start_id=start_id)
+    while True:
+        chunk = [row for _, row in zip(range(batch), rows)]
+        if not chunk:
+            break
+        with database.connect() as conn:
+            conn.executemany(quote_sql, [tuple(row[column] for column in _QUOTE_COLUMNS) for row in chunk])
+            conn.executemany(version_sql, (version for row in chunk for version in iter_version_rows(row, templates)))
+
+    if audit_rows:
+        rng = random.Random(seed)
+        repository = AuditRepository(database)
+        actions = ("SAVE", "SAVE", "SAVE", "LOAD", "DUPLICATE", "LOGIN")
+        last_id = start_id + count - 1
+        for offset in range(0, audit_rows, batch):
+            repository.log_many(
+                AuditEvent(
+                    username=f"vendedor{rng.randrange(20)}",
+                    action=rng.choice(actions),
+                    entity_type="quote",
+                    entity_id=str(rng.randint(1, last_id)),
+                    details="sintetico",
+                    created_at=(START + timedelta(seconds=offset + idx)).isoformat(),
+                )
+                for idx in range(min(batch, audit_rows - offset))
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db")
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--versions", type=float, default=5.0, help="media de versoes por cotacao")
+    parser.add_argument("--audit", type=int, default=0, help="linhas de auditoria")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    database.initialize()
+    with database.connect() as conn:
+        start_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM quotes").fetchone()[0]) + 1
+    started = time.perf_counter()
+    seed_database(
+        database, args.quotes, seed=args.seed, mean_versions=args.versions, start_id=start_id, audit_rows=args.audit
+    )
+    print(f"{args.quotes} cotacoes geradas em {args.db} em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
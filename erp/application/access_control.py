@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from erp.domain.permissions import PermissionDeniedError
+
+if TYPE_CHECKING:
+    from erp.infrastructure.auth_repository import AuthRepository
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class AccessControl:
+    """User capabilities, read from the database once and kept in memory.
+
+    Every check is a dict lookup plus a frozenset membership test. Call
+    :meth:`invalidate` after changing users, roles or role permissions;
+    the next check reloads everything in one query.
+    """
+
+    def __init__(self, repository: AuthRepository):
+        self.repository = repository
+        self._permissions: dict[str, frozenset[str]] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, frozenset[str]]:
+        with self._lock:
+            if self._permissions is None:
+                self._permissions = self.repository.load_permissions()
+            return self._permissions
+
+    def permissions_for(self, username: str) -> frozenset[str]:
+        permissions = self._permissions
+        if permissions is None:
+            permissions = self._load()
+        return permissions.get(username, frozenset())
+
+    def can(self, username: str, capability: str) -> bool:
+        return capability in self.permissions_for(username)
+
+    def check(self, username: str, capability: str) -> None:
+        if capability not in self.permissions_for(username):
+            raise PermissionDeniedError(username, capability)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._permissions = None
+
+
+def requires(capability: str) -> Callable[[F], F]:
+    """Guards a service method with ``self.access`` / ``self.current_user``.
+
+    Services built without an AccessControl (CLI, batch jobs, tests) are
+    trusted and skip the check.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if self.access is not None:
+                self.access.check(self.current_user or "", capability)
+            return func(self, *args, **kwargs)
+
+        wrapper.required_capability = capability  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
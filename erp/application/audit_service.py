@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+from erp.infrastructure.audit_chain import AuditChainVerifier, ChainVerification
 from erp.infrastructure.audit_repository import AuditRepository
+from erp.infrastructure.audit_writer import AuditWriter
 
 
 class AuditService:
-    def __init__(self, repository: AuditRepository):
+    def __init__(self, repository: AuditRepository, writer: AuditWriter | None = None):
         self.repository = repository
+        self.writer = writer
 
     def log(self, username: str, action: str, entity_type: str, entity_id: str, details: str) -> None:
-        self.repository.log(
+        sink = self.writer or self.repository
+        sink.log(
             username=username,
             action=action,
             entity_type=entity_type,
@@ -17,5 +21,27 @@ class AuditService:
         )
 
     def list_recent(self, limit: int = 300) -> list[dict[str, str]]:
+        if self.writer is not None:
+            self.writer.flush()
         return self.repository.list_recent(limit=limit)
 
+    def query(
+        self, filters: dict[str, str] | None = None, cursor: str | None = None, limit: int = 100
+    ) -> tuple[list[dict[str, str]], str | None]:
+        if self.writer is not None:
+            self.writer.flush()
+        return self.repository.query(filters=filters, cursor=cursor, limit=limit)
+
+    def archive(self, retention_days: int = 365) -> dict[str, int]:
+        if self.writer is not None:
+            self.writer.flush()
+        return self.repository.archive_older_than(retention_days)
+
+    def verify_chain(self, full: bool = False) -> ChainVerification:
+        if self.writer is not None:
+            self.writer.flush()
+        return AuditChainVerifier(self.repository).verify(full=full)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
@@ -1,21 +1,72 @@
 from __future__ import annotations
 
+from erp.application.access_control import AccessControl, requires
+from erp.application.login_throttle import LoginThrottle
+from erp.application.session_store import SessionStore
+from erp.domain.permissions import CAPABILITY_LABELS, MANAGE_USERS
 from erp.infrastructure.auth_repository import AuthRepository
 
 
 class AuthService:
-    def __init__(self, repository: AuthRepository):
+    def __init__(
+        self,
+        repository: AuthRepository,
+        throttle: LoginThrottle | None = None,
+        sessions: SessionStore | None = None,
+        access: AccessControl | None = None,
+        current_user: str | None = None,
+    ):
         self.repository = repository
+        self.throttle = throttle or LoginThrottle()
+        self.sessions = sessions or SessionStore()
+        # Pass the same AccessControl to QuoteService so role changes made here reach its checks.
+        self.permissions = access or AccessControl(repository)
+        # User management is only checked for an acting user; bootstrap and the CLI run without one.
+        self.access = self.permissions if current_user is not None else None
+        self.current_user = current_user
 
     def bootstrap(self) -> None:
         self.repository.ensure_default_admin()
+        self.permissions.invalidate()
 
-    def login(self, username: str, password: str) -> dict[str, str] | None:
-        return self.repository.authenticate(username, password)
+    def login(self, username: str, password: str, source: str | None = None) -> dict[str, str] | None:
+        # Raises LoginThrottledError before any hashing while the user or source is locked.
+        self.throttle.check(username, source)
+        user = self.repository.authenticate(username, password)
+        if user is None:
+            self.throttle.record_failure(username, source)
+        else:
+            self.throttle.record_success(username, source)
+        return user
+
+    def start_session(self, username: str, password: str, source: str | None = None) -> str | None:
+        user = self.login(username, password, source)
+        return None if user is None else self.sessions.issue(user)
+
+    def session_user(self, token: str) -> dict[str, str] | None:
+        return self.sessions.resolve(token)
+
+    def end_session(self, token: str) -> None:
+        self.sessions.revoke(token)
 
     def list_users(self) -> list[dict[str, str]]:
         return self.repository.list_users()
 
+    @requires(MANAGE_USERS)
     def create_user(self, username: str, password: str, role: str) -> None:
         self.repository.create_user(username=username, password=password, role=role)
+        self.permissions.invalidate()
+
+    @requires(MANAGE_USERS)
+    def set_role(self, username: str, role: str) -> None:
+        self.repository.set_role(username, role)
+        self.permissions.invalidate()
+        self.sessions.revoke_user(username)
 
+    @requires(MANAGE_USERS)
+    def set_role_permissions(self, role: str, capabilities: set[str]) -> None:
+        unknown = sorted(set(capabilities) - set(CAPABILITY_LABELS))
+        if unknown:
+            raise ValueError(f"Permissao invalida: {', '.join(unknown)}")
+        self.repository.set_role_permissions(role, capabilities)
+        self.permissions.invalidate()
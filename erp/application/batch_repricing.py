@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+import os
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+from erp.domain.models import PurchaseInput, SaleInput, parse_decimal
+from erp.domain.pricing_engine import PricingEngine
+from erp.domain.pricing_rules import BusinessRules
+from erp.infrastructure.quote_repository import (
+    PreparedQuote,
+    QuoteRepository,
+    prepare_quote,
+    record_from_row,
+)
+from erp.infrastructure.settings_repository import SettingsRepository
+
+
+KEEP_MODES = ("margin", "price")
+_TRUE_VALUES = {"1", "true", "sim", "s", "yes"}
+_PURCHASE_FIELDS = {item.name: item.type for item in fields(PurchaseInput)}
+_SALE_FIELDS = {item.name: item.type for item in fields(SaleInput)}
+
+RowChunk = list[dict[str, object]]
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    quotes: list[PreparedQuote]
+    failed: list[tuple[int, str]]
+    last_id: int = 0
+
+
+@dataclass
+class RepricingReport:
+    processed: int = 0
+    saved: int = 0
+    conflicts: list[int] = field(default_factory=list)
+    failed: list[tuple[int, str]] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.processed / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def parse_overrides(items: Iterable[str]) -> dict[str, str]:
+    """Parses ``section.field=value`` items, e.g. ``sale.icms_rate_pct=12``."""
+    overrides: dict[str, str] = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        key = key.strip()
+        section, _, name = key.partition(".")
+        known = _PURCHASE_FIELDS if section == "purchase" else _SALE_FIELDS if section == "sale" else {}
+        if not sep or name not in known:
+            raise ValueError(f"Campo de reprecificacao invalido: {item}")
+        overrides[key] = value.strip()
+    return overrides
+
+
+def _split_overrides(overrides: dict[str, str]) -> tuple[dict[str, Any], dict[str, Any]]:
+    purchase: dict[str, Any] = {}
+    sale: dict[str, Any] = {}
+    for key, value in overrides.items():
+        section, _, name = key.partition(".")
+        target, known = (purchase, _PURCHASE_FIELDS) if section == "purchase" else (sale, _SALE_FIELDS)
+        if known[name] == "bool":
+            target[name] = value.lower() in _TRUE_VALUES
+        else:
+            target[name] = parse_decimal(value)
+    return purchase, sale
+
+
+def reprice_chunk(rows: RowChunk, overrides: dict[str, str], keep: str, rules: BusinessRules) -> ChunkResult:
+    """Recomputes one chunk of raw quote rows, with the business rules; runs inside worker processes."""
+    engine = PricingEngine()
+    purchase_changes, sale_changes = _split_overrides(overrides)
+    quotes: list[PreparedQuote] = []
+    failed: list[tuple[int, str]] = []
+    for row in rows:
+        record = record_from_row(row)
+        purchase = replace(record.purchase, **purchase_changes)
+        sale = replace(record.sale, **sale_changes)
+        try:
+            if keep == "price":
+                result = engine.calculate_from_price(purchase, sale, record.result.sale_price)
+            else:
+                result = engine.calculate_from_margin(purchase, sale, record.result.margin_pct)
+            result = rules.apply(engine, purchase, sale, result, record.product_name, record.category_name)
+        except ValueError as exc:
+            failed.append((int(record.quote_id), str(exc)))
+            continue
+        quotes.append(prepare_quote(replace(record, purchase=purchase, sale=sale, result=result)))
+    last_id = int(rows[-1]["id"]) if rows else 0
+    return ChunkResult(quotes=quotes, failed=failed, last_id=last_id)
+
+
+def ordered_map(
+    executor: Executor | None,
+    func: Callable[..., Any],
+    chunks: Iterable[Any],
+    *args: Any,
+    max_in_flight: int = 4,
+) -> Iterator[Any]:
+    """Yields ``func(chunk, *args)`` in input order with at most ``max_in_flight`` chunks pending.
+
+    Chunks are pulled from ``chunks`` lazily, so the source is never materialized.
+    """
+    if executor is None:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+
+    pending: deque = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(func, chunk, *args))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class BatchRepricer:
+    """Applies rate changes to many quotes using a process pool.
+
+    Rows are streamed from the repository in id order, recomputed in worker
+    processes and persisted as new versions in the same order, one
+    transaction per chunk. Each new result goes through the business rules
+    (rounding strategy and minimum prices) saved in the settings, read once
+    per run unless ``rules`` is given.
+    """
+
+    def __init__(
+        self,
+        repository: QuoteRepository,
+        workers: int | None = None,
+        chunk_size: int = 1000,
+        max_in_flight: int | None = None,
+        rules: BusinessRules | None = None,
+    ):
+        self.repository = repository
+        self.rules = rules
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.max_in_flight = max_in_flight or self.workers * 2
+
+    def run(
+        self,
+        overrides: dict[str, str],
+        keep: str = "margin",
+        filters: dict[str, str] | None = None,
+        dry_run: bool = False,
+        progress: Callable[[RepricingReport], None] | None = None,
+    ) -> RepricingReport:
+        if keep not in KEEP_MODES:
+            raise ValueError(f"Modo de reprecificacao invalido: {keep}")
+        # Whole-value filters: a bulk write for "Cabo" must not also rewrite "Cabos".
+        chunks = self.repository.iter_row_chunks(filters=filters, chunk_size=self.chunk_size, exact=True)
+        return self.process(chunks, overrides, keep=keep, persist=not dry_run, progress=progress)
+
+    def process(
+        self,
+        chunks: Iterable[RowChunk],
+        overrides: dict[str, str],
+        keep: str = "margin",
+        persist: bool = True,
+        progress: Callable[[RepricingReport], None] | None = None,
+        checkpoint: Callable[[ChunkResult, list[int]], tuple[str, str]] | None = None,
+        report: RepricingReport | None = None,
+    ) -> RepricingReport:
+        report = report or RepricingReport()
+        started = time.perf_counter()
+        rules = self.rules
+        if rules is None:
+            rules = SettingsRepository(self.repository.database).load_business_rules()
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            results = ordered_map(
+                executor, reprice_chunk, chunks, overrides, keep, rules, max_in_flight=self.max_in_flight
+            )
+            for result in results:
+                report.processed += len(result.quotes) + len(result.failed)
+                report.failed.extend(result.failed)
+                # Built inside the chunk's transaction, once its conflicts are known.
+                marker = (lambda conflicts, result=result: checkpoint(result, conflicts)) if checkpoint else None
+                if persist and (result.quotes or marker is not None):
+                    saved = self.repository.save_many(result.quotes, checkpoint=marker)
+                    report.saved += saved.saved
+                    report.conflicts.extend(saved.conflicts)
+                if progress is not None:
+                    report.elapsed_s = time.perf_counter() - started
+                    progress(report)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        report.elapsed_s = time.perf_counter() - started
+        return report
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import threading
+import time
+from typing import Callable
+
+
+class LoginThrottledError(ValueError):
+    def __init__(self, retry_after_s: float):
+        self.retry_after_s = retry_after_s
+        super().__init__(f"Muitas tentativas de login. Tente novamente em {math.ceil(retry_after_s)} s.")
+
+
+@dataclass
+class _Failures:
+    count: int = 0
+    last_failure: float = 0.0
+    locked_until: float = 0.0
+
+
+class LoginThrottle:
+    """Exponential backoff of failed logins per username and per source.
+
+    After ``free_attempts`` failures on a key, each further failure locks it
+    for ``base_delay_s * 2 ** n`` seconds (capped at ``max_delay_s``). A
+    locked login is refused before the password hash is computed, so a
+    burst of attempts costs almost no CPU. Counters are forgotten after
+    ``window_s`` without failures; a successful login only clears the
+    username, so one good account does not reset a source that is
+    guessing others. Without a source (a local login) only the username is
+    throttled, so one user's failures never lock everyone else out.
+    """
+
+    def __init__(
+        self,
+        free_attempts: int = 3,
+        base_delay_s: float = 1.0,
+        max_delay_s: float = 300.0,
+        window_s: float = 900.0,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.free_attempts = max(0, free_attempts)
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.window_s = window_s
+        self.max_keys = max_keys
+        self.clock = clock
+        self._failures: dict[tuple[str, str], _Failures] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(username: str, source: str | None) -> tuple[tuple[str, str], ...]:
+        user_key = ("user", username.strip().lower())
+        return (user_key,) if source is None else (user_key, ("source", source))
+
+    def retry_after(self, username: str, source: str | None = None) -> float:
+        """Seconds until this login may be attempted again (0 when allowed)."""
+        now = self.clock()
+        with self._lock:
+            waits = [
+                entry.locked_until - now
+                for entry in map(self._failures.get, self._keys(username, source))
+                if entry is not None
+            ]
+        return max([0.0, *waits])
+
+    def check(self, username: str, source: str | None = None) -> None:
+        wait = self.retry_after(username, source)
+        if wait > 0:
+            raise LoginThrottledError(wait)
+
+    def record_failure(self, username: str, source: str | None = None) -> float:
+        """Counts a failed login and returns the resulting lock time in seconds."""
+        now = self.clock()
+        lock_s = 0.0
+        with self._lock:
+            if len(self._failures) >= self.max_keys:
+                self._prune(now)
+            for key in self._keys(username, source):
+                entry = self._failures.get(key)
+                if entry is None or now - entry.last_failure > self.window_s:
+                    entry = self._failures[key] = _Failures()
+                entry.count += 1
+                entry.last_failure = now
+                excess = entry.count - self.free_attempts
+                if excess > 0:
+                    delay = min(self.max_delay_s, self.base_delay_s * 2 ** (excess - 1))
+                    entry.locked_until = now + delay
+                    lock_s = max(lock_s, delay)
+        return lock_s
+
+    def record_success(self, username: str, source: str | None = None) -> None:
+        with self._lock:
+            self._failures.pop(self._keys(username, source)[0], None)
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            key for key, entry in self._failures.items()
+            if now - entry.last_failure > self.window_s and entry.locked_until <= now
+        ]
+        for key in expired:
+            del self._failures[key]
+        overflow = len(self._failures) - self.max_keys + 1
+        if overflow > 0:
+            # Still full of live entries: drop the oldest ones rather than grow without bound.
+            for key in sorted(self._failures, key=lambda item: self._failures[item].last_failure)[:overflow]:
+                del self._failures[key]
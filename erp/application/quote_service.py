@@ -2,15 +2,35 @@ from __future__ import annotations
 
 from decimal import Decimal
 
+from erp.application.access_control import AccessControl, requires
 from erp.domain.models import PricingResult, PurchaseInput, QuoteRecord, SaleInput
+from erp.domain.permissions import APPROVE_QUOTE, EDIT_PRICE, OVERRIDE_MIN_PRICE
 from erp.domain.pricing_engine import PricingEngine
+from erp.domain.pricing_rules import apply_business_rules
+from erp.domain.quote_merge import QuoteConflictError, merge_quotes
 from erp.infrastructure.quote_repository import QuoteRepository
+from erp.infrastructure.settings_repository import SettingsRepository
 
 
 class QuoteService:
-    def __init__(self, pricing_engine: PricingEngine, repository: QuoteRepository):
+    def __init__(
+        self,
+        pricing_engine: PricingEngine,
+        repository: QuoteRepository,
+        access: AccessControl | None = None,
+        current_user: str | None = None,
+        merge_retries: int = 3,
+        settings: SettingsRepository | None = None,
+    ):
         self.pricing_engine = pricing_engine
         self.repository = repository
+        self.settings = settings or SettingsRepository(repository.database)
+        self.merge_retries = merge_retries
+        self.access = access
+        self.current_user = current_user
+
+    def can(self, capability: str) -> bool:
+        return self.access is None or self.access.can(self.current_user or "", capability)
 
     def calculate_from_margin(
         self, purchase: PurchaseInput, sale: SaleInput, margin_pct: Decimal
@@ -30,37 +50,54 @@ class QuoteService:
         rounding_strategy: str,
         min_sale_price: Decimal,
     ) -> PricingResult:
-        adjusted_price = result.sale_price
-
-        strategy = (rounding_strategy or "NORMAL").strip().upper()
-        if strategy == "X90":
-            int_part = int(adjusted_price)
-            adjusted_price = Decimal(f"{int_part}.90")
-            if adjusted_price < result.sale_price:
-                adjusted_price = Decimal(f"{int_part + 1}.90")
-        elif strategy == "X99":
-            int_part = int(adjusted_price)
-            adjusted_price = Decimal(f"{int_part}.99")
-            if adjusted_price < result.sale_price:
-                adjusted_price = Decimal(f"{int_part + 1}.99")
-
-        if min_sale_price > Decimal("0") and adjusted_price < min_sale_price:
-            adjusted_price = min_sale_price
-
-        if adjusted_price == result.sale_price:
-            return result
-        return self.pricing_engine.calculate_from_price(purchase, sale, adjusted_price)
+        return apply_business_rules(self.pricing_engine, purchase, sale, result, rounding_strategy, min_sale_price)
 
+    @requires(EDIT_PRICE)
     def save_quote(self, quote: QuoteRecord) -> QuoteRecord:
+        if self.access is not None:
+            if quote.status == "APROVADA":
+                self.access.check(self.current_user or "", APPROVE_QUOTE)
+            if self._below_min_price(quote):
+                self.access.check(self.current_user or "", OVERRIDE_MIN_PRICE)
+        return self._save_merging(quote)
+
+    def _below_min_price(self, quote: QuoteRecord) -> bool:
+        min_price = self.settings.get_min_price(quote.product_name, quote.category_name)
+        return min_price > Decimal("0") and quote.result.sale_price < min_price
+
+    def _save_merging(self, quote: QuoteRecord) -> QuoteRecord:
+        # Optimistic: on a stale version, read the competing version and the common
+        # base outside any transaction, merge field by field and write again.
+        for _attempt in range(self.merge_retries):
+            try:
+                return self.repository.save(quote)
+            except QuoteConflictError:
+                pass
+            try:
+                base = self.repository.get_version(int(quote.quote_id), quote.version)
+            except ValueError:
+                raise QuoteConflictError(quote.quote_id) from None
+            theirs = self.repository.get(int(quote.quote_id))
+            quote = merge_quotes(base, quote, theirs)
         return self.repository.save(quote)
 
     def get_quote(self, quote_id: int) -> QuoteRecord:
         return self.repository.get(quote_id)
 
     def list_recent_quotes(
-        self, limit: int = 200, filters: dict[str, str] | None = None
+        self,
+        limit: int = 200,
+        filters: dict[str, str] | None = None,
+        before: tuple[str, int] | None = None,
+        after: tuple[str, int] | None = None,
     ) -> list[dict[str, str]]:
-        return self.repository.list_recent(limit=limit, filters=filters)
+        return self.repository.list_recent(limit=limit, filters=filters, before=before, after=after)
+
+    def change_seq(self) -> int:
+        return self.repository.change_seq()
+
+    def changes_since(self, seq: int, limit: int = 500) -> list[dict[str, str]]:
+        return self.repository.changes_since(seq, limit=limit)
 
     def list_quote_versions(self, quote_id: int) -> list[dict[str, str]]:
         return self.repository.list_versions(quote_id)
@@ -68,5 +105,6 @@ class QuoteService:
     def get_quote_version(self, quote_id: int, version: int) -> QuoteRecord:
         return self.repository.get_version(quote_id, version)
 
+    @requires(EDIT_PRICE)
     def duplicate_quote(self, quote_id: int, owner_user: str) -> QuoteRecord:
         return self.repository.duplicate(quote_id, owner_user)
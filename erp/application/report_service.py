@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from erp.infrastructure.database import SUMMARY_DIMENSIONS
+from erp.infrastructure.report_repository import ReportRepository
+
+
+class ReportService:
+    def __init__(self, repository: ReportRepository):
+        self.repository = repository
+
+    def dashboard(self, date_from: str | None = None, date_to: str | None = None) -> dict[str, object]:
+        return {
+            "totals": self.repository.totals(date_from, date_to),
+            **{
+                dimension: self.repository.breakdown(dimension, date_from, date_to)
+                for dimension in SUMMARY_DIMENSIONS
+            },
+        }
+
+    def period_totals(self, date_from: str | None = None, date_to: str | None = None) -> dict[str, object]:
+        return self.repository.totals(date_from, date_to)
+
+    def breakdown(
+        self, dimension: str, date_from: str | None = None, date_to: str | None = None
+    ) -> list[dict[str, object]]:
+        return self.repository.breakdown(dimension, date_from, date_to)
+
+    def daily_series(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        dimension: str = "status",
+        key: str | None = None,
+    ) -> list[dict[str, object]]:
+        return self.repository.daily(date_from, date_to, dimension=dimension, key=key)
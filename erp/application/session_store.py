@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+import threading
+import time
+from typing import Callable
+
+
+class SessionStore:
+    """Short-lived in-memory session tokens.
+
+    A client authenticates once with its password (one full PBKDF2 run) and
+    then presents the token, which costs a SHA-256 and a dict lookup. Only
+    the token digest is kept, so the store never holds usable tokens.
+    """
+
+    def __init__(self, ttl_s: float = 900.0, max_sessions: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._sessions: dict[str, tuple[float, dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def issue(self, user: dict[str, str]) -> str:
+        token = secrets.token_urlsafe(32)
+        now = self.clock()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self._prune(now)
+            self._sessions[self._digest(token)] = (now + self.ttl_s, dict(user))
+        return token
+
+    def resolve(self, token: str) -> dict[str, str] | None:
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._sessions.get(digest)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= self.clock():
+                del self._sessions[digest]
+                return None
+        return dict(user)
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(self._digest(token), None)
+
+    def revoke_user(self, username: str) -> int:
+        with self._lock:
+            digests = [digest for digest, (_expires, user) in self._sessions.items() if user["username"] == username]
+            for digest in digests:
+                del self._sessions[digest]
+        return len(digests)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _prune(self, now: float) -> None:
+        for digest in [digest for digest, (expires_at, _user) in self._sessions.items() if expires_at <= now]:
+            del self._sessions[digest]
+        while len(self._sessions) >= self.max_sessions:
+            # Dicts keep insertion order: the first entry is the oldest session.
+            del self._sessions[next(iter(self._sessions))]
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+import hashlib
+import json
+from itertools import chain
+from typing import Callable, Iterator
+
+from erp.application.batch_repricing import (
+    KEEP_MODES,
+    BatchRepricer,
+    ChunkResult,
+    RepricingReport,
+    parse_overrides,
+)
+from erp.domain.models import parse_decimal
+from erp.infrastructure.quote_repository import QuoteRepository
+from erp.infrastructure.settings_repository import SettingsRepository
+
+
+JOB_KEY_PREFIX = "tax_change_job:"
+OPEN_STATUSES = "RASCUNHO,ENVIADA"
+
+
+@dataclass(frozen=True)
+class TaxChange:
+    field: str
+    new_rate: Decimal
+    old_rate: Decimal | None = None
+
+
+@dataclass
+class TaxChangeReport(RepricingReport):
+    job_id: str = ""
+    resumed_from: int = 0
+    completed: bool = False
+    # Quotes that failed in earlier runs of the job; they are not retried.
+    failed_earlier: list[tuple[int, str]] = field(default_factory=list)
+
+
+def parse_tax_change(text: str) -> TaxChange:
+    """Parses ``sale.icms_rate_pct=18:12`` (old:new) or ``sale.icms_rate_pct=12`` (any old rate)."""
+    key, value = next(iter(parse_overrides([text]).items()))
+    old, sep, new = value.partition(":")
+    if not sep:
+        old, new = "", old
+    if not new.strip():
+        raise ValueError(f"Nova aliquota ausente: {text}")
+    return TaxChange(
+        field=key,
+        new_rate=parse_decimal(new),
+        old_rate=parse_decimal(old) if old.strip() else None,
+    )
+
+
+class TaxChangeJob:
+    """Propagates a tax-rate change to stored quotes, one new version per quote.
+
+    Progress (the last quote id of each committed chunk, the quotes that
+    conflicted and the quotes that failed) is stored in app_settings in the
+    same transaction as the chunk, so running again with the same parameters
+    resumes where it stopped and retries the conflicts first. A failure (the
+    engine rejecting the new rates) is final: it is kept in the state and
+    reported, not retried. The job is done once a run ends with no conflict
+    left to retry; ``restart`` starts over, failed quotes included.
+    """
+
+    def __init__(
+        self,
+        repository: QuoteRepository,
+        workers: int | None = 1,
+        chunk_size: int = 500,
+    ):
+        self.repository = repository
+        self.settings = SettingsRepository(repository.database)
+        self.repricer = BatchRepricer(repository, workers=workers, chunk_size=chunk_size)
+
+    def run(
+        self,
+        changes: list[TaxChange],
+        filters: dict[str, str] | None = None,
+        keep: str = "margin",
+        job_id: str | None = None,
+        restart: bool = False,
+        progress: Callable[[RepricingReport], None] | None = None,
+    ) -> TaxChangeReport:
+        if not changes:
+            raise ValueError("Informe ao menos uma alteracao de aliquota.")
+        if keep not in KEEP_MODES:
+            raise ValueError(f"Modo de reprecificacao invalido: {keep}")
+        filters = {"status": OPEN_STATUSES, **(filters or {})}
+
+        signature = json.dumps(
+            {
+                "changes": [[change.field, str(change.old_rate), str(change.new_rate)] for change in changes],
+                "filters": filters,
+                "keep": keep,
+            },
+            sort_keys=True,
+        )
+        job_id = job_id or hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        key = f"{JOB_KEY_PREFIX}{job_id}"
+
+        state = None if restart else self._load_state(key)
+        if state is not None and state["params"] != signature:
+            raise ValueError(f"O job {job_id} ja existe com outros parametros. Use restart para recomecar.")
+        after_id = int(state["last_id"]) if state else 0
+        retry = sorted(int(quote_id) for quote_id in state.get("retry", ())) if state else []
+        failed_earlier = [(int(quote_id), message) for quote_id, message in state.get("failed", ())] if state else []
+        report = TaxChangeReport(job_id=job_id, resumed_from=after_id, failed_earlier=failed_earlier)
+        if state is not None and state.get("done"):
+            report.completed = True
+            return report
+
+        last_id = after_id
+        pending = retry
+        skipped: list[int] = []
+        failed = list(failed_earlier)
+
+        def checkpoint(result: ChunkResult, conflicts: list[int]) -> tuple[str, str]:
+            nonlocal last_id, pending
+            # Retried quotes come first, in id order and below after_id, so every
+            # retry id up to this chunk's last id has been handled.
+            last_id = max(last_id, result.last_id)
+            pending = [quote_id for quote_id in pending if quote_id > result.last_id]
+            skipped.extend(conflicts)
+            failed.extend(result.failed)
+            return key, self._state(signature, last_id, pending + skipped, failed, done=False)
+
+        select = dict(
+            filters=filters,
+            chunk_size=self.repricer.chunk_size,
+            rates={change.field: change.old_rate for change in changes if change.old_rate is not None},
+            exact=True,
+        )
+        chunks = chain(
+            self._retry_chunks(retry, select),
+            self.repository.iter_row_chunks(after_id=after_id, **select),
+        )
+        self.repricer.process(
+            chunks,
+            {change.field: str(change.new_rate) for change in changes},
+            keep=keep,
+            progress=progress,
+            checkpoint=checkpoint,
+            report=report,
+        )
+
+        report.completed = not skipped
+        self.settings.set_value(key, self._state(signature, last_id, skipped, failed, done=report.completed))
+        return report
+
+    def _retry_chunks(self, retry: list[int], select: dict) -> Iterator[list[dict[str, object]]]:
+        # Quotes that no longer match (e.g. already at the new rate) simply drop out.
+        size = self.repricer.chunk_size
+        for start in range(0, len(retry), size):
+            yield from self.repository.iter_row_chunks(ids=retry[start:start + size], **select)
+
+    @staticmethod
+    def _state(
+        signature: str, last_id: int, retry: list[int], failed: list[tuple[int, str]], done: bool
+    ) -> str:
+        return json.dumps(
+            {
+                "params": signature,
+                "last_id": last_id,
+                "retry": sorted(set(retry)),
+                "failed": sorted(dict(failed).items()),
+                "done": done,
+            }
+        )
+
+    def _load_state(self, key: str) -> dict | None:
+        value = self.settings.get_value(key)
+        return json.loads(value) if value else None
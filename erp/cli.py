@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from erp.infrastructure.backup_chain import BackupChain
+    from erp.infrastructure.database import Database
+
+
+DEFAULT_DB_PATH = Path("data") / "erp_comercial.db"
+DEFAULT_BACKUP_DIR = Path("data") / "backups"
+DEFAULT_PRICE_SNAPSHOT = Path("data") / "precos.bin"
+
+
+# Subcommand dependencies are imported inside their handlers so that each
+# command only pays for the modules it actually uses.
+def _database(args: argparse.Namespace, **kwargs: object) -> Database:
+    from erp.infrastructure.database import Database
+
+    database = Database(args.db, profiler=args.profiler, **kwargs)
+    database.initialize()
+    return database
+
+
+def _backup_chain(args: argparse.Namespace) -> BackupChain:
+    from erp.infrastructure.backup_chain import BackupChain, RetentionPolicy
+    from erp.infrastructure.backup_service import BackupService
+
+    service = BackupService(Path(args.db), Path(args.backup_dir))
+    policy = RetentionPolicy(hourly=args.keep_hourly, daily=args.keep_daily, weekly=args.keep_weekly)
+    return BackupChain(service, policy=policy, full_every=args.full_every)
+
+
+def _cmd_backup(args: argparse.Namespace) -> int:
+    chain = _backup_chain(args)
+    started = time.perf_counter()
+    entry = chain.create(incremental=not args.full)
+    if entry is None:
+        print(f"Banco {args.db} nao encontrado.")
+        return 1
+    elapsed = time.perf_counter() - started
+    print(
+        f"Backup {entry.name} ({entry.kind}): {entry.changed_pages}/{entry.page_count} paginas "
+        f"em {elapsed:.2f}s"
+    )
+    return 0
+
+
+def _cmd_restore(args: argparse.Namespace) -> int:
+    chain = _backup_chain(args)
+    started = time.perf_counter()
+    target = chain.restore(Path(args.target), name=args.name)
+    print(f"Restaurado em {target} em {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def _cmd_backup_list(args: argparse.Namespace) -> int:
+    for entry in _backup_chain(args).entries():
+        print(f"{entry.name}  {entry.kind:<11}  {entry.changed_pages:>8} paginas  {entry.created_at}")
+    return 0
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    from erp.application.quote_service import QuoteService
+    from erp.domain.pricing_engine import PricingEngine
+    from erp.infrastructure.quote_repository import QuoteRepository
+    from erp.presentation.http_api import run_server
+
+    database = _database(args, reuse_connections=True)
+    service = QuoteService(pricing_engine=PricingEngine(), repository=QuoteRepository(database))
+    run_server(service, host=args.host, port=args.port, workers=args.workers)
+    return 0
+
+
+def _cmd_reprice(args: argparse.Namespace) -> int:
+    from erp.application.batch_repricing import BatchRepricer, RepricingReport, parse_overrides
+    from erp.infrastructure.quote_repository import QuoteRepository
+
+    database = _database(args)
+    filters = {"status": args.status or "", "supplier": args.supplier or "", "product": args.product or ""}
+    repricer = BatchRepricer(
+        QuoteRepository(database), workers=args.workers, chunk_size=args.chunk_size
+    )
+
+    def progress(report: RepricingReport) -> None:
+        print(f"  {report.processed} cotacoes ({report.rows_per_second:.0f}/s)", end="\r", flush=True)
+
+    report = repricer.run(
+        parse_overrides(args.set),
+        keep=args.keep,
+        filters=filters,
+        dry_run=args.dry_run,
+        progress=progress,
+    )
+    print(
+        f"Reprecificadas {report.processed} cotacoes em {report.elapsed_s:.2f}s "
+        f"({report.rows_per_second:.0f}/s, {repricer.workers} processos): "
+        f"{report.saved} gravadas, {len(report.conflicts)} conflitos, {len(report.failed)} falhas"
+    )
+    for quote_id, message in report.failed[:20]:
+        print(f"  #{quote_id}: {message}")
+    return 1 if report.failed or report.conflicts else 0
+
+
+def _cmd_tax_change(args: argparse.Namespace) -> int:
+    from erp.application.tax_change_job import TaxChangeJob, parse_tax_change
+    from erp.infrastructure.quote_repository import QuoteRepository
+
+    database = _database(args)
+    filters = {
+        name: value
+        for name, value in (
+            ("status", args.status),
+            ("category", args.category),
+            ("supplier", args.supplier),
+        )
+        if value is not None
+    }
+    job = TaxChangeJob(QuoteRepository(database), workers=args.workers, chunk_size=args.chunk_size)
+    report = job.run(
+        [parse_tax_change(item) for item in args.rate],
+        filters=filters,
+        keep=args.keep,
+        job_id=args.job,
+        restart=args.restart,
+    )
+    resumed = f", retomado apos #{report.resumed_from}" if report.resumed_from else ""
+    print(
+        f"Job {report.job_id}{resumed}: {report.processed} cotacoes em {report.elapsed_s:.2f}s, "
+        f"{report.saved} novas versoes, {len(report.conflicts)} conflitos, {len(report.failed)} falhas"
+    )
+    for quote_id in report.conflicts[:20]:
+        print(f"  #{quote_id}: alterada durante o job; rode novamente para reprocessar")
+    for quote_id, message in report.failed[:20]:
+        print(f"  #{quote_id}: {message}")
+    if report.failed_earlier:
+        print(f"  {len(report.failed_earlier)} falhas em execucoes anteriores (--restart tenta de novo):")
+    for quote_id, message in report.failed_earlier[:20]:
+        print(f"  #{quote_id}: {message}")
+    return 1 if report.failed or report.failed_earlier or report.conflicts else 0
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    from erp.infrastructure.quote_export import QuoteExporter
+
+    database = _database(args)
+    filters = {
+        "status": args.status or "",
+        "supplier": args.supplier or "",
+        "product": args.product or "",
+        "owner_user": args.owner or "",
+        "date_from": args.date_from or "",
+        "date_to": args.date_to or "",
+    }
+    fmt = args.format or ("jsonl" if str(args.output).endswith(".jsonl") else "csv")
+    exporter = QuoteExporter(database, batch_size=args.batch_size)
+    if args.output == "-":
+        result = exporter.export(sys.stdout, table=args.table, fmt=fmt, filters=filters)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as output:
+            result = exporter.export(output, table=args.table, fmt=fmt, filters=filters)
+    print(
+        f"Exportadas {result.rows} linhas em {result.elapsed_s:.2f}s ({result.rows_per_second:.0f}/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _cmd_hash_calibrate(args: argparse.Namespace) -> int:
+    from erp.infrastructure.security import calibrate
+
+    params, elapsed = calibrate(target_ms=args.target_ms, algorithm=args.algorithm)
+    print(f"{params.encode()}: {elapsed:.0f} ms por verificacao (alvo {args.target_ms:g} ms)")
+    if args.save:
+        from erp.infrastructure.auth_repository import AuthRepository
+
+        AuthRepository(_database(args)).set_hash_params(params)
+        print("Gravado. Senhas existentes sao atualizadas no proximo login de cada usuario.")
+    return 0
+
+
+def _cmd_publish_prices(args: argparse.Namespace) -> int:
+    from erp.infrastructure.price_snapshot import PriceSnapshotPublisher
+
+    result = PriceSnapshotPublisher(_database(args), args.output).publish(full=args.full)
+    mode = "completa" if result.full else f"incremental, {result.changes} cotacoes alteradas"
+    print(f"{result.entries} precos publicados em {args.output} ({mode}) em {result.elapsed_s:.2f}s")
+    return 0
+
+
+def _add_backup_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--backup-dir", default=str(DEFAULT_BACKUP_DIR))
+    parser.add_argument("--keep-hourly", type=int, default=24)
+    parser.add_argument("--keep-daily", type=int, default=7)
+    parser.add_argument("--keep-weekly", type=int, default=4)
+    parser.add_argument("--full-every", type=int, default=24, help="backups por cadeia antes de um novo completo")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m erp.cli", description="Ferramentas do ERP Comercial.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH))
+    parser.add_argument(
+        "--instrument",
+        metavar="ARQUIVO",
+        help="mede chamadas e SQL do comando e grava o resultado em JSON neste arquivo",
+    )
+    parser.add_argument(
+        "--slow-sql",
+        metavar="ARQUIVO",
+        help="registra as instrucoes SQL lentas, com o plano de consulta, neste arquivo JSON Lines",
+    )
+    parser.add_argument("--slow-ms", type=float, default=100.0, help="limite para --slow-sql (padrao: 100)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup = commands.add_parser("backup", help="cria backup (incremental por padrao)")
+    _add_backup_options(backup)
+    backup.add_argument("--full", action="store_true", help="forca backup completo")
+    backup.set_defaults(handler=_cmd_backup)
+
+    restore = commands.add_parser("restore", help="reconstroi o banco a partir da cadeia de backups")
+    _add_backup_options(restore)
+    restore.add_argument("target", help="arquivo de destino")
+    restore.add_argument("--name", help="backup a restaurar (padrao: o mais recente)")
+    restore.set_defaults(handler=_cmd_restore)
+
+    backup_list = commands.add_parser("backup-list", help="lista a cadeia de backups")
+    _add_backup_options(backup_list)
+    backup_list.set_defaults(handler=_cmd_backup_list)
+
+    serve = commands.add_parser("serve", help="inicia a API HTTP/JSON de precos")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, default=4)
+    serve.set_defaults(handler=_cmd_serve)
+
+    reprice = commands.add_parser("reprice", help="recalcula cotacoes em lote com novas aliquotas")
+    reprice.add_argument(
+        "--set",
+        action="append",
+        required=True,
+        metavar="CAMPO=VALOR",
+        help="aliquota a aplicar, ex.: sale.icms_rate_pct=12 (repetivel)",
+    )
+    reprice.add_argument("--keep", choices=("margin", "price"), default="margin", help="valor preservado")
+    reprice.add_argument("--status")
+    reprice.add_argument("--supplier")
+    reprice.add_argument("--product")
+    reprice.add_argument("--workers", type=int, default=None, help="processos (padrao: numero de CPUs)")
+    reprice.add_argument("--chunk-size", type=int, default=1000)
+    reprice.add_argument("--dry-run", action="store_true", help="calcula sem gravar")
+    reprice.set_defaults(handler=_cmd_reprice)
+
+    tax_change = commands.add_parser("tax-change", help="propaga mudanca de aliquota para as cotacoes abertas")
+    tax_change.add_argument(
+        "--rate",
+        action="append",
+        required=True,
+        metavar="CAMPO=ANTIGA:NOVA",
+        help="ex.: sale.icms_rate_pct=18:12 (sem ANTIGA altera qualquer aliquota)",
+    )
+    tax_change.add_argument("--status", help="status separados por virgula (padrao: RASCUNHO,ENVIADA)")
+    tax_change.add_argument("--category")
+    tax_change.add_argument("--supplier")
+    tax_change.add_argument("--keep", choices=("margin", "price"), default="margin")
+    tax_change.add_argument("--job", help="identificador do job para retomada (padrao: derivado dos parametros)")
+    tax_change.add_argument("--restart", action="store_true", help="ignora o progresso salvo")
+    tax_change.add_argument("--workers", type=int, default=1)
+    tax_change.add_argument("--chunk-size", type=int, default=500)
+    tax_change.set_defaults(handler=_cmd_tax_change)
+
+    export = commands.add_parser("export", help="exporta cotacoes ou versoes para CSV ou JSON Lines")
+    export.add_argument("table", choices=("quotes", "versions"))
+    export.add_argument("output", help="arquivo de saida ou - para a saida padrao")
+    export.add_argument("--format", choices=("csv", "jsonl"), help="padrao: pela extensao do arquivo")
+    export.add_argument("--status")
+    export.add_argument("--supplier")
+    export.add_argument("--product")
+    export.add_argument("--owner")
+    export.add_argument("--date-from", help="AAAA-MM-DD")
+    export.add_argument("--date-to", help="AAAA-MM-DD")
+    export.add_argument("--batch-size", type=int, default=2000)
+    export.set_defaults(handler=_cmd_export)
+
+    hash_calibrate = commands.add_parser(
+        "hash-calibrate", help="escolhe o custo do hash de senha para um tempo alvo nesta maquina"
+    )
+    hash_calibrate.add_argument("--target-ms", type=float, default=250.0, help="tempo por verificacao (padrao: 250)")
+    hash_calibrate.add_argument("--algorithm", choices=("pbkdf2_sha256", "scrypt"), default="pbkdf2_sha256")
+    hash_calibrate.add_argument("--save", action="store_true", help="grava os parametros no banco")
+    hash_calibrate.set_defaults(handler=_cmd_hash_calibrate)
+
+    publish_prices = commands.add_parser(
+        "publish-prices", help="publica o preco de venda atual por produto em arquivo binario (mmap)"
+    )
+    publish_prices.add_argument("output", nargs="?", default=str(DEFAULT_PRICE_SNAPSHOT))
+    publish_prices.add_argument("--full", action="store_true", help="reconstroi a partir de todas as aprovadas")
+    publish_prices.set_defaults(handler=_cmd_publish_prices)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.profiler = None
+    if args.slow_sql:
+        from erp.infrastructure.query_profiler import QueryProfiler
+
+        args.profiler = QueryProfiler(threshold_ms=args.slow_ms, log_path=args.slow_sql)
+    if args.instrument:
+        from erp.infrastructure.instrumentation import INSTRUMENTATION
+
+        INSTRUMENTATION.enable()
+    try:
+        return args.handler(args)
+    finally:
+        if args.instrument:
+            INSTRUMENTATION.disable()
+            print(f"Instrumentacao gravada em {INSTRUMENTATION.dump(args.instrument)}", file=sys.stderr)
+        if args.profiler is not None:
+            args.profiler.flush()
+            slow = len(args.profiler.slow_queries())
+            print(f"{slow} instrucoes SQL acima de {args.slow_ms:g} ms em {args.slow_sql}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -111,3 +111,51 @@ class QuoteRecord:
     result: PricingResult
     created_at: str | None = None
     updated_at: str | None = None
+
+
+def purchase_from_payload(payload: dict[str, object]) -> PurchaseInput:
+    return PurchaseInput(
+        base_price=parse_decimal(payload["base_price"]),
+        ipi_rate_pct=parse_decimal(payload["ipi_rate_pct"]),
+        st_rate_pct=parse_decimal(payload["st_rate_pct"]),
+        icms_rate_pct=parse_decimal(payload["icms_rate_pct"]),
+        pis_rate_pct=parse_decimal(payload["pis_rate_pct"]),
+        cofins_rate_pct=parse_decimal(payload["cofins_rate_pct"]),
+        credit_icms=bool(payload["credit_icms"]),
+        credit_pis=bool(payload["credit_pis"]),
+        credit_cofins=bool(payload["credit_cofins"]),
+    )
+
+
+def sale_from_payload(payload: dict[str, object]) -> SaleInput:
+    return SaleInput(
+        pis_rate_pct=parse_decimal(payload["pis_rate_pct"]),
+        cofins_rate_pct=parse_decimal(payload["cofins_rate_pct"]),
+        icms_rate_pct=parse_decimal(payload["icms_rate_pct"]),
+        markup_rate_pct=parse_decimal(payload.get("markup_rate_pct")),
+        apply_markup=bool(payload.get("apply_markup", False)),
+    )
+
+
+def result_from_payload(payload: dict[str, object]) -> PricingResult:
+    sale_price = parse_decimal(payload["sale_price"])
+    return PricingResult(
+        ipi_value=parse_decimal(payload["ipi_value"]),
+        st_value=parse_decimal(payload["st_value"]),
+        icms_purchase_value=parse_decimal(payload["icms_purchase_value"]),
+        pis_purchase_value=parse_decimal(payload["pis_purchase_value"]),
+        cofins_purchase_value=parse_decimal(payload["cofins_purchase_value"]),
+        purchase_taxes_total=parse_decimal(payload["purchase_taxes_total"]),
+        purchase_credits_total=parse_decimal(payload["purchase_credits_total"]),
+        effective_cost=parse_decimal(payload["effective_cost"]),
+        sales_tax_rate_pct=parse_decimal(payload["sales_tax_rate_pct"]),
+        sale_price_base=parse_decimal(payload.get("sale_price_base"), default=sale_price),
+        sale_price=sale_price,
+        markup_rate_pct=parse_decimal(payload.get("markup_rate_pct")),
+        markup_value=parse_decimal(payload.get("markup_value")),
+        margin_pct=parse_decimal(payload["margin_pct"]),
+        sale_taxes_value=parse_decimal(payload["sale_taxes_value"]),
+        net_revenue=parse_decimal(payload["net_revenue"]),
+        net_profit=parse_decimal(payload["net_profit"]),
+        real_margin_pct=parse_decimal(payload["real_margin_pct"]),
+    )
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+
+EDIT_PRICE = "edit_price"
+OVERRIDE_MIN_PRICE = "override_min_price"
+APPROVE_QUOTE = "approve_quote"
+MANAGE_USERS = "manage_users"
+
+CAPABILITY_LABELS = {
+    EDIT_PRICE: "editar precos",
+    OVERRIDE_MIN_PRICE: "liberar preco abaixo do minimo",
+    APPROVE_QUOTE: "aprovar cotacoes",
+    MANAGE_USERS: "gerenciar usuarios",
+}
+
+# Seeded into role_permissions when the schema is created; editable afterwards.
+DEFAULT_ROLE_PERMISSIONS = {
+    "GERENCIA": frozenset(CAPABILITY_LABELS),
+    "COMERCIAL": frozenset({EDIT_PRICE}),
+}
+
+
+class PermissionDeniedError(PermissionError):
+    def __init__(self, username: str, capability: str):
+        self.username = username
+        self.capability = capability
+        super().__init__(
+            f"Usuario {username} sem permissao para {CAPABILITY_LABELS.get(capability, capability)}."
+        )
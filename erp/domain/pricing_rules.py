@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from erp.domain.models import ZERO, PricingResult, PurchaseInput, SaleInput
+from erp.domain.pricing_engine import PricingEngine
+
+
+def apply_business_rules(
+    engine: PricingEngine,
+    purchase: PurchaseInput,
+    sale: SaleInput,
+    result: PricingResult,
+    rounding_strategy: str,
+    min_sale_price: Decimal,
+) -> PricingResult:
+    """Rounds the sale price (X90/X99) and raises it to the minimum, recalculating when it moves."""
+    adjusted_price = result.sale_price
+
+    strategy = (rounding_strategy or "NORMAL").strip().upper()
+    if strategy == "X90":
+        int_part = int(adjusted_price)
+        adjusted_price = Decimal(f"{int_part}.90")
+        if adjusted_price < result.sale_price:
+            adjusted_price = Decimal(f"{int_part + 1}.90")
+    elif strategy == "X99":
+        int_part = int(adjusted_price)
+        adjusted_price = Decimal(f"{int_part}.99")
+        if adjusted_price < result.sale_price:
+            adjusted_price = Decimal(f"{int_part + 1}.99")
+
+    if min_sale_price > ZERO and adjusted_price < min_sale_price:
+        adjusted_price = min_sale_price
+
+    if adjusted_price == result.sale_price:
+        return result
+    return engine.calculate_from_price(purchase, sale, adjusted_price)
+
+
+def _scope_key(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+@dataclass(frozen=True)
+class BusinessRules:
+    """Rounding strategy and active minimum prices, loaded once for a batch of quotes."""
+
+    rounding_strategy: str = "NORMAL"
+    product_min_prices: dict[str, Decimal] = field(default_factory=dict)
+    category_min_prices: dict[str, Decimal] = field(default_factory=dict)
+
+    def min_sale_price(self, product_name: str, category_name: str) -> Decimal:
+        # A product rule wins over its category's, as in SettingsRepository.get_min_price.
+        product_price = self.product_min_prices.get(_scope_key(product_name))
+        if product_price is not None:
+            return product_price
+        return self.category_min_prices.get(_scope_key(category_name), ZERO)
+
+    def apply(
+        self,
+        engine: PricingEngine,
+        purchase: PurchaseInput,
+        sale: SaleInput,
+        result: PricingResult,
+        product_name: str,
+        category_name: str,
+    ) -> PricingResult:
+        return apply_business_rules(
+            engine,
+            purchase,
+            sale,
+            result,
+            self.rounding_strategy,
+            self.min_sale_price(product_name, category_name),
+        )
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import fields, replace
+from typing import Iterable
+
+from erp.domain.models import PurchaseInput, QuoteRecord, SaleInput
+
+
+_RECORD_FIELDS = ("status", "product_name", "category_name", "supplier_name", "owner_user", "notes")
+_PURCHASE_FIELDS = tuple(item.name for item in fields(PurchaseInput))
+_SALE_FIELDS = tuple(item.name for item in fields(SaleInput))
+
+
+class QuoteConflictError(ValueError):
+    """The quote changed since it was loaded; ``fields`` lists edits that could not be merged."""
+
+    def __init__(self, quote_id: int | None, fields: Iterable[str] = ()):
+        self.quote_id = quote_id
+        self.fields = tuple(fields)
+        if self.fields:
+            message = (
+                "A cotacao foi alterada por outro processo nos mesmos campos "
+                f"({', '.join(self.fields)}). Recarregue o historico."
+            )
+        else:
+            message = "A cotacao foi alterada por outro processo. Recarregue o historico."
+        super().__init__(message)
+
+
+def _merge_values(
+    prefix: str, names: Iterable[str], base: object, mine: object, theirs: object, conflicts: list[str]
+) -> dict[str, object]:
+    merged = {}
+    for name in names:
+        base_value, my_value, their_value = getattr(base, name), getattr(mine, name), getattr(theirs, name)
+        if my_value == their_value or their_value == base_value:
+            merged[name] = my_value
+        elif my_value == base_value:
+            merged[name] = their_value
+        else:
+            conflicts.append(prefix + name)
+            merged[name] = my_value
+    return merged
+
+
+def merge_quotes(base: QuoteRecord, mine: QuoteRecord, theirs: QuoteRecord) -> QuoteRecord:
+    """Three-way, field-level merge of two edits of the same quote version.
+
+    Fields changed on one side only are taken from that side; a field
+    changed on both sides to different values is a conflict. Pricing is
+    taken whole from the one side that changed it. When both sides
+    repriced, it is a conflict even on different fields: the record does
+    not say whether the price came from a margin or a typed price, nor
+    which rounding and minimum-price rules were applied, so the result
+    cannot be recalculated on the user's behalf. The merged quote carries
+    the version of ``theirs`` so it can be written on top of it.
+    """
+    conflicts: list[str] = []
+    record = _merge_values("", _RECORD_FIELDS, base, mine, theirs, conflicts)
+
+    def pricing(quote: QuoteRecord) -> tuple[object, ...]:
+        return quote.purchase, quote.sale, quote.result
+
+    if pricing(theirs) == pricing(base) or pricing(mine) == pricing(theirs):
+        purchase, sale, result = mine.purchase, mine.sale, mine.result
+    elif pricing(mine) == pricing(base):
+        purchase, sale, result = theirs.purchase, theirs.sale, theirs.result
+    else:
+        # Only collects the fields both sides changed, to name them in the error.
+        pricing_conflicts: list[str] = []
+        _merge_values("compra.", _PURCHASE_FIELDS, base.purchase, mine.purchase, theirs.purchase, pricing_conflicts)
+        _merge_values("venda.", _SALE_FIELDS, base.sale, mine.sale, theirs.sale, pricing_conflicts)
+        conflicts.extend(pricing_conflicts or ["resultado"])
+        purchase, sale, result = mine.purchase, mine.sale, mine.result
+
+    if conflicts:
+        raise QuoteConflictError(mine.quote_id, conflicts)
+    return replace(mine, version=theirs.version, purchase=purchase, sale=sale, result=result, **record)
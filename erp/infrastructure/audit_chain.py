@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository, compute_entry_hash
+from erp.infrastructure.database import AUDIT_CHAIN_START_KEY
+
+
+CHECKPOINT_KEY = "audit_chain_checkpoint"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(frozen=True)
+class ChainVerification:
+    ok: bool
+    checked_rows: int
+    last_id: int
+    broken_id: int | None = None
+    message: str = ""
+
+
+class AuditChainVerifier:
+    """Checks the audit hash chain from the last verified checkpoint onwards."""
+
+    def __init__(self, repository: AuditRepository):
+        self.repository = repository
+        self.database = repository.database
+
+    def verify(self, full: bool = False) -> ChainVerification:
+        last_id, expected_prev = (0, "") if full else self._load_checkpoint()
+        chain_start = self._chain_start()
+        checked = 0
+        for row in self.repository.iter_chain(after_id=last_id):
+            entry_hash = row["entry_hash"] or ""
+            if not entry_hash:
+                if expected_prev or int(row["id"]) > chain_start:
+                    return self._broken(row, checked, last_id, "Registro de auditoria sem hash.")
+                # Rows written before the chain existed carry no hash.
+                last_id = int(row["id"])
+                continue
+            if row["prev_hash"] != expected_prev:
+                return self._broken(row, checked, last_id, "Encadeamento da auditoria rompido.")
+            event = AuditEvent(
+                username=row["username"],
+                action=row["action"],
+                entity_type=row["entity_type"],
+                entity_id=row["entity_id"],
+                details=row["details"],
+                created_at=row["created_at"],
+            )
+            if compute_entry_hash(expected_prev, event) != entry_hash:
+                return self._broken(row, checked, last_id, "Registro de auditoria adulterado.")
+            expected_prev = entry_hash
+            last_id = int(row["id"])
+            checked += 1
+
+        self._save_checkpoint(last_id, expected_prev)
+        return ChainVerification(ok=True, checked_rows=checked, last_id=last_id)
+
+    def _broken(self, row, checked: int, last_id: int, message: str) -> ChainVerification:
+        return ChainVerification(
+            ok=False,
+            checked_rows=checked,
+            last_id=last_id,
+            broken_id=int(row["id"]),
+            message=message,
+        )
+
+    def _chain_start(self) -> int:
+        with self.database.connect() as conn:
+            row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (AUDIT_CHAIN_START_KEY,)).fetchone()
+        return int(row["value"]) if row is not None else 0
+
+    def _load_checkpoint(self) -> tuple[int, str]:
+        with self.database.connect() as conn:
+            row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (CHECKPOINT_KEY,)).fetchone()
+        if row is None:
+            return 0, ""
+        last_id, _, last_hash = row["value"].partition(":")
+        try:
+            return int(last_id), last_hash
+        except ValueError:
+            return 0, ""
+
+    def _save_checkpoint(self, last_id: int, last_hash: str) -> None:
+        with self.database.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO app_settings (key, value, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                (CHECKPOINT_KEY, f"{last_id}:{last_hash}", _now_iso()),
+            )
@@ -1,27 +1,262 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import heapq
+import re
+import sqlite3
+from typing import Iterable, Iterator
 
 from erp.infrastructure.database import Database
 
 
+ARCHIVE_PREFIX = "audit_logs_archive_"
+_ARCHIVE_NAME = re.compile(r"^audit_logs_archive_(\d{6})$")
+_QUERY_FILTERS = ("username", "action", "entity_type", "entity_id")
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    if mon == 12:
+        return f"{year + 1:04d}-01"
+    return f"{year:04d}-{mon + 1:02d}"
+
+
+def _parse_day(day: str) -> date:
+    try:
+        return date.fromisoformat(day)
+    except ValueError as exc:
+        raise ValueError(f"Data invalida: {day}") from exc
+
+
+def _next_day(day: str) -> str:
+    return (_parse_day(day) + timedelta(days=1)).isoformat()
+
+
+def archive_table_name(month: str) -> str:
+    return f"{ARCHIVE_PREFIX}{month.replace('-', '')}"
+
+
+def _encode_cursor(row: sqlite3.Row) -> str:
+    return f"{row['created_at']}|{row['id']}"
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        created_at, row_id = cursor.rsplit("|", 1)
+        return created_at, int(row_id)
+    except ValueError as exc:
+        raise ValueError("Cursor de paginacao invalido.") from exc
+
+
+@dataclass(frozen=True)
+class AuditEvent:
+    username: str
+    action: str
+    entity_type: str
+    entity_id: str
+    details: str
+    created_at: str = field(default_factory=_now_iso)
+
+
+def compute_entry_hash(prev_hash: str, event: AuditEvent) -> str:
+    payload = "\x1f".join(
+        (prev_hash, event.username, event.action, event.entity_type, event.entity_id, event.details, event.created_at)
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class AuditRepository:
     def __init__(self, database: Database):
         self.database = database
 
     def log(self, username: str, action: str, entity_type: str, entity_id: str, details: str) -> None:
+        self.log_many(
+            [
+                AuditEvent(
+                    username=username,
+                    action=action,
+                    entity_type=entity_type,
+                    entity_id=entity_id,
+                    details=details,
+                )
+            ]
+        )
+
+    def log_many(self, events: Iterable[AuditEvent]) -> int:
+        events = list(events)
+        if not events:
+            return 0
         with self.database.connect() as conn:
-            conn.execute(
+            # The write lock is taken before reading the chain head so concurrent
+            # writers (other threads or processes) cannot fork the hash chain.
+            conn.execute("BEGIN IMMEDIATE")
+            prev_hash = self._chain_head(conn)
+            rows = []
+            for event in events:
+                entry_hash = compute_entry_hash(prev_hash, event)
+                rows.append(
+                    (
+                        event.username,
+                        event.action,
+                        event.entity_type,
+                        event.entity_id,
+                        event.details,
+                        event.created_at,
+                        prev_hash,
+                        entry_hash,
+                    )
+                )
+                prev_hash = entry_hash
+            conn.executemany(
                 """
-                INSERT INTO audit_logs (username, action, entity_type, entity_id, details, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO audit_logs (
+                    username, action, entity_type, entity_id, details, created_at, prev_hash, entry_hash
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (username, action, entity_type, entity_id, details, _now_iso()),
+                rows,
             )
+        return len(rows)
+
+    def archive_older_than(self, retention_days: int, now: datetime | None = None) -> dict[str, int]:
+        if retention_days < 1:
+            raise ValueError("Retencao deve ser de ao menos 1 dia.")
+        cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=retention_days)).isoformat()
+        moved: dict[str, int] = {}
+        with self.database.connect() as conn:
+            months = [
+                row["month"]
+                for row in conn.execute(
+                    """
+                    SELECT DISTINCT substr(created_at, 1, 7) AS month
+                    FROM audit_logs
+                    WHERE created_at < ?
+                    """,
+                    (cutoff,),
+                ).fetchall()
+            ]
+            for month in sorted(months):
+                table = self._ensure_archive_table(conn, month)
+                columns = ", ".join(self._column_names(conn, "audit_logs"))
+                upper = min(cutoff, _next_month(month))
+                conn.execute(
+                    f"""
+                    INSERT INTO {table} ({columns})
+                    SELECT {columns} FROM audit_logs
+                    WHERE created_at >= ? AND created_at < ?
+                    """,
+                    (month, upper),
+                )
+                cursor = conn.execute(
+                    "DELETE FROM audit_logs WHERE created_at >= ? AND created_at < ?",
+                    (month, upper),
+                )
+                moved[month] = cursor.rowcount
+        return moved
+
+    def list_archive_months(self) -> list[str]:
+        with self.database.connect() as conn:
+            return self._archive_months(conn)
+
+    def iter_chain(self, after_id: int = 0, batch_size: int = 5000) -> Iterator[sqlite3.Row]:
+        with self.database.connect() as conn:
+            tables = ["audit_logs", *(archive_table_name(month) for month in self._archive_months(conn))]
+            streams = [self._iter_table_chain(conn, table, after_id, batch_size) for table in tables]
+            # Ids follow insertion order, which is what the chain links; archival by
+            # month does not preserve it, so the per-table streams are merged by id.
+            yield from heapq.merge(*streams, key=lambda row: row["id"])
+
+    @staticmethod
+    def _iter_table_chain(
+        conn: sqlite3.Connection, table: str, after_id: int, batch_size: int
+    ) -> Iterator[sqlite3.Row]:
+        cursor = conn.execute(
+            f"""
+            SELECT id, username, action, entity_type, entity_id, details, created_at,
+                   prev_hash, entry_hash
+            FROM {table}
+            WHERE id > ?
+            ORDER BY id
+            """,
+            (after_id,),
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def query(
+        self,
+        filters: dict[str, str] | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+        include_archive: bool = True,
+    ) -> tuple[list[dict[str, str]], str | None]:
+        safe_limit = max(1, min(limit, 2000))
+        filters = filters or {}
+
+        clauses: list[str] = []
+        params: list[object] = []
+        for name in _QUERY_FILTERS:
+            value = (filters.get(name) or "").strip()
+            if value:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        date_from = (filters.get("date_from") or "").strip()
+        date_to = (filters.get("date_to") or "").strip()
+        if date_from:
+            date_from = _parse_day(date_from).isoformat()
+            clauses.append("created_at >= ?")
+            params.append(f"{date_from}T00:00:00")
+        if date_to:
+            date_to = _parse_day(date_to).isoformat()
+            # Exclusive bound on the next day, so fractional seconds and offsets still match.
+            clauses.append("created_at < ?")
+            params.append(_next_day(date_to))
+        if cursor:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(_decode_cursor(cursor))
+        where_sql = " AND ".join(clauses) or "1=1"
+
+        rows: list[sqlite3.Row] = []
+        with self.database.connect() as conn:
+            tables = ["audit_logs"]
+            if include_archive:
+                # Archived rows are always older than live rows, so walking the
+                # monthly tables newest first keeps the global ordering intact.
+                tables.extend(
+                    archive_table_name(month)
+                    for month in reversed(self._archive_months(conn))
+                    if (not date_from or _next_month(month) > date_from)
+                    and (not date_to or month <= date_to[:7])
+                    and (not cursor or month <= cursor[:7])
+                )
+            for table in tables:
+                rows.extend(
+                    conn.execute(
+                        f"""
+                        SELECT id, username, action, entity_type, entity_id, details, created_at
+                        FROM {table}
+                        WHERE {where_sql}
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT ?
+                        """,
+                        (*params, safe_limit + 1 - len(rows)),
+                    ).fetchall()
+                )
+                if len(rows) > safe_limit:
+                    break
+
+        page = rows[:safe_limit]
+        next_cursor = _encode_cursor(page[-1]) if len(rows) > safe_limit else None
+        return [self._row_to_dict(row) for row in page], next_cursor
 
     def list_recent(self, limit: int = 300) -> list[dict[str, str]]:
         safe_limit = max(1, min(limit, 2000))
@@ -47,3 +282,84 @@ class AuditRepository:
             for row in rows
         ]
 
+    def _chain_head(self, conn: sqlite3.Connection) -> str:
+        # The last id handed out is normally still in the live table; the
+        # archives are only searched once that row has been archived.
+        row = conn.execute(
+            """
+            SELECT entry_hash FROM audit_logs
+            WHERE id = (SELECT seq FROM sqlite_sequence WHERE name = 'audit_logs')
+            """
+        ).fetchone()
+        if row is not None:
+            return row["entry_hash"] or ""
+        tables = ["audit_logs", *(archive_table_name(month) for month in self._archive_months(conn))]
+        head_id, head_hash = 0, ""
+        for table in tables:
+            row = conn.execute(f"SELECT id, entry_hash FROM {table} ORDER BY id DESC LIMIT 1").fetchone()
+            if row is not None and int(row["id"]) > head_id:
+                head_id, head_hash = int(row["id"]), row["entry_hash"] or ""
+        return head_hash
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> dict[str, str]:
+        return {
+            "id": str(row["id"]),
+            "username": row["username"],
+            "action": row["action"],
+            "entity_type": row["entity_type"],
+            "entity_id": row["entity_id"],
+            "details": row["details"],
+            "created_at": row["created_at"],
+        }
+
+    @staticmethod
+    def _column_names(conn: sqlite3.Connection, table_name: str) -> list[str]:
+        return [row["name"] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+    @staticmethod
+    def _archive_months(conn: sqlite3.Connection) -> list[str]:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+            (f"{ARCHIVE_PREFIX}%",),
+        ).fetchall()
+        months = []
+        for row in rows:
+            match = _ARCHIVE_NAME.match(row["name"])
+            if match:
+                digits = match.group(1)
+                months.append(f"{digits[:4]}-{digits[4:]}")
+        return sorted(months)
+
+    def _ensure_archive_table(self, conn: sqlite3.Connection, month: str) -> str:
+        table = archive_table_name(month)
+        if not _ARCHIVE_NAME.match(table):
+            raise ValueError("Mes de arquivamento invalido.")
+        live_columns = conn.execute("PRAGMA table_info(audit_logs)").fetchall()
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                action TEXT NOT NULL,
+                entity_type TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                details TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        archived = set(self._column_names(conn, table))
+        for column in live_columns:
+            if column["name"] not in archived:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column['name']} {column['type']}")
+        # Same layout as the live table: the rowid already completes the created_at key.
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_keyset")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table}(created_at DESC)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table}(username, created_at DESC, id DESC)")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_entity "
+            f"ON {table}(entity_type, entity_id, created_at DESC, id DESC)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_action ON {table}(action, created_at DESC, id DESC)")
+        return table
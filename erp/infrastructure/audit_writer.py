@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Exception | None = None
+
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Background audit sink that writes queued events in batched transactions."""
+
+    def __init__(
+        self,
+        repository: AuditRepository,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10000,
+        put_timeout: float = 2.0,
+    ):
+        self.repository = repository
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval)
+        self.put_timeout = put_timeout
+        self.last_error: Exception | None = None
+        self.written_count = 0
+        self.batch_count = 0
+        self.dropped_count = 0
+
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=max(1, max_queue_size))
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._producers = 0
+        self._closed = False
+
+    def __enter__(self) -> AuditWriter:
+        self.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def start(self) -> None:
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if self._closed:
+            raise RuntimeError("Gravador de auditoria encerrado.")
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, username: str, action: str, entity_type: str, entity_id: str, details: str) -> bool:
+        """Queues the event; False when the queue stayed full for put_timeout and it was dropped."""
+        event = AuditEvent(
+            username=username,
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            details=details,
+        )
+        with self._lock:
+            self._start_locked()
+            self._producers += 1
+        queued = False
+        try:
+            queued = self._put(event)
+        finally:
+            self._end_put(dropped=not queued)
+        return queued
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits for queued events; False on timeout or when they could not be written (see last_error)."""
+        request = _FlushRequest()
+        with self._lock:
+            if self._closed or self._thread is None:
+                return True
+            if not self._thread.is_alive():
+                return self._queue.empty() and self.last_error is None
+            self._producers += 1
+        try:
+            if not self._put(request):
+                return False
+        finally:
+            self._end_put()
+        return request.done.wait(timeout) and request.error is None
+
+    def _put(self, item: object) -> bool:
+        # Backpressure: producers wait up to put_timeout for room, outside the
+        # lock, so a stalled writer delays callers but never blocks close().
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            if not self._thread.is_alive():
+                raise RuntimeError("Gravador de auditoria parado.") from self.last_error
+            return False
+
+    def _end_put(self, dropped: bool = False) -> None:
+        with self._lock:
+            self._producers -= 1
+            if dropped:
+                self.dropped_count += 1
+            self._idle.notify_all()
+
+    def close(self, timeout: float | None = None) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            # Producers already past the closed check finish within put_timeout,
+            # so nothing can be queued behind the stop marker.
+            while self._producers:
+                self._idle.wait()
+        if thread is None:
+            return
+        while thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=self.put_timeout)
+                break
+            except queue.Full:
+                continue
+        thread.join(timeout)
+        if self.last_error is not None:
+            raise RuntimeError("Falha ao gravar eventos de auditoria pendentes.") from self.last_error
+        if self.dropped_count:
+            raise RuntimeError(f"{self.dropped_count} eventos de auditoria descartados com a fila cheia.")
+
+    def _run(self) -> None:
+        batch: list[AuditEvent] = []
+        deadline = 0.0
+        while True:
+            wait = self.flush_interval if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, AuditEvent):
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+                batch = self._write(batch)
+            elif isinstance(item, _FlushRequest):
+                requests = [item]
+                stop = self._drain_into(batch, requests)
+                batch = self._write(batch)
+                for request in requests:
+                    request.error = self.last_error if batch else None
+                    request.done.set()
+                if stop:
+                    self._write_final(batch)
+                    return
+            elif item is _STOP:
+                self._drain_into(batch, [])
+                self._write_final(batch)
+                return
+            elif batch and time.monotonic() >= deadline:
+                batch = self._write(batch)
+                if batch:
+                    deadline = time.monotonic() + self.flush_interval
+
+    def _drain_into(self, batch: list[AuditEvent], requests: list[_FlushRequest]) -> bool:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if isinstance(item, AuditEvent):
+                batch.append(item)
+            elif isinstance(item, _FlushRequest):
+                requests.append(item)
+            elif item is _STOP:
+                return True
+
+    def _write_final(self, batch: list[AuditEvent], attempts: int = 3) -> None:
+        for _ in range(attempts):
+            batch = self._write(batch)
+            if not batch:
+                return
+
+    def _write(self, batch: list[AuditEvent]) -> list[AuditEvent]:
+        if not batch:
+            return batch
+        try:
+            self.repository.log_many(batch)
+        except Exception as exc:
+            self.last_error = exc
+            # Slow down consumption so the bounded queue pushes back on producers.
+            time.sleep(self.flush_interval)
+            return batch
+        self.last_error = None
+        self.written_count += len(batch)
+        self.batch_count += 1
+        return []
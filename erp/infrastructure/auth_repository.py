@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+import sqlite3
 
 from erp.infrastructure.database import Database
-from erp.infrastructure.security import hash_password, verify_password
+from erp.infrastructure.security import DEFAULT_HASH_PARAMS, HashParams, hash_password, needs_rehash, verify_password
+
+
+# app_settings key with the encoded HashParams used for new hashes (see "hash-calibrate").
+HASH_PARAMS_KEY = "password_hash_params"
 
 
 def _now_iso() -> str:
@@ -14,6 +19,15 @@ class AuthRepository:
     def __init__(self, database: Database):
         self.database = database
 
+    @staticmethod
+    def _hash_params(conn: sqlite3.Connection) -> HashParams:
+        row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (HASH_PARAMS_KEY,)).fetchone()
+        return DEFAULT_HASH_PARAMS if row is None else HashParams.decode(row["value"])
+
+    def hash_params(self) -> HashParams:
+        with self.database.connect() as conn:
+            return self._hash_params(conn)
+
     def ensure_default_admin(self) -> None:
         with self.database.connect() as conn:
             row = conn.execute("SELECT id FROM users WHERE username = ?", ("admin",)).fetchone()
@@ -23,7 +37,7 @@ class AuthRepository:
                     INSERT INTO users (username, password_hash, role, is_active, created_at)
                     VALUES (?, ?, ?, ?, ?)
                     """,
-                    ("admin", hash_password("admin123"), "GERENCIA", 1, _now_iso()),
+                    ("admin", hash_password("admin123", self._hash_params(conn)), "GERENCIA", 1, _now_iso()),
                 )
 
     def authenticate(self, username: str, password: str) -> dict[str, str] | None:
@@ -41,13 +55,68 @@ class AuthRepository:
             if not verify_password(password, row["password_hash"]):
                 return None
 
-            conn.execute(
-                "UPDATE users SET last_login_at = ? WHERE username = ?",
-                (_now_iso(), username),
+            # The password is known only now: upgrade hashes made with older parameters.
+            # Hashed before the first write so the write lock is not held meanwhile.
+            params = self._hash_params(conn)
+            password_hash = row["password_hash"]
+            if needs_rehash(password_hash, params):
+                password_hash = hash_password(password, params)
+
+            # Guarded by the verified hash: a password changed meanwhile is not overwritten
+            # and the old password no longer logs in.
+            cursor = conn.execute(
+                "UPDATE users SET last_login_at = ?, password_hash = ? WHERE username = ? AND password_hash = ?",
+                (_now_iso(), password_hash, username, row["password_hash"]),
             )
+            if cursor.rowcount == 0:
+                return None
 
         return {"username": row["username"], "role": row["role"]}
 
+    def set_hash_params(self, params: HashParams) -> None:
+        """New parameters apply to new users and to existing ones at their next login."""
+        with self.database.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO app_settings (key, value, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                (HASH_PARAMS_KEY, params.encode(), _now_iso()),
+            )
+
+    def load_permissions(self) -> dict[str, frozenset[str]]:
+        """Capabilities of every active user, from their role."""
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT u.username, rp.capability
+                FROM users u
+                LEFT JOIN role_permissions rp ON rp.role = u.role
+                WHERE u.is_active = 1
+                """
+            ).fetchall()
+        permissions: dict[str, set[str]] = {}
+        for row in rows:
+            capabilities = permissions.setdefault(row["username"], set())
+            if row["capability"] is not None:
+                capabilities.add(row["capability"])
+        return {username: frozenset(capabilities) for username, capabilities in permissions.items()}
+
+    def set_role(self, username: str, role: str) -> None:
+        with self.database.connect() as conn:
+            updated = conn.execute("UPDATE users SET role = ? WHERE username = ?", (role.strip(), username)).rowcount
+        if not updated:
+            raise ValueError(f"Usuario nao encontrado: {username}")
+
+    def set_role_permissions(self, role: str, capabilities: set[str] | frozenset[str]) -> None:
+        with self.database.connect() as conn:
+            conn.execute("DELETE FROM role_permissions WHERE role = ?", (role,))
+            conn.executemany(
+                "INSERT INTO role_permissions (role, capability) VALUES (?, ?)",
+                [(role, capability) for capability in sorted(capabilities)],
+            )
+
     def list_users(self) -> list[dict[str, str]]:
         with self.database.connect() as conn:
             rows = conn.execute(
@@ -70,11 +139,12 @@ class AuthRepository:
         if len(password) < 6:
             raise ValueError("Senha deve ter ao menos 6 caracteres.")
         with self.database.connect() as conn:
+            password_hash = hash_password(password, self._hash_params(conn))
             conn.execute(
                 """
                 INSERT INTO users (username, password_hash, role, is_active, created_at)
                 VALUES (?, ?, ?, ?, ?)
                 """,
-                (username.strip(), hash_password(password), role.strip() or "COMERCIAL", 1, _now_iso()),
+                (username.strip(), password_hash, role.strip() or "COMERCIAL", 1, _now_iso()),
             )
 
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import struct
+from typing import BinaryIO, Iterator
+
+from erp.infrastructure.backup_service import BackupService, ProgressCallback
+
+
+_PAGE_NO = struct.Struct(">I")
+_DIGEST_SIZE = 16
+_READ_PAGES = 256
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    hourly: int = 24
+    daily: int = 7
+    weekly: int = 4
+
+
+@dataclass(frozen=True)
+class ChainEntry:
+    name: str
+    kind: str
+    parent: str | None
+    created_at: str
+    page_size: int
+    page_count: int
+    changed_pages: int
+    data_file: str
+    hash_file: str = ""
+
+
+def _page_size(snapshot: Path) -> int:
+    with snapshot.open("rb") as handle:
+        header = handle.read(100)
+    size = struct.unpack(">H", header[16:18])[0]
+    return 65536 if size == 1 else size
+
+
+def _iter_pages(snapshot: Path, page_size: int) -> Iterator[tuple[int, bytes]]:
+    page_no = 0
+    with snapshot.open("rb") as handle:
+        while True:
+            block = handle.read(page_size * _READ_PAGES)
+            if not block:
+                return
+            for offset in range(0, len(block), page_size):
+                yield page_no, block[offset : offset + page_size]
+                page_no += 1
+
+
+class BackupChain:
+    """Full + incremental (changed pages) gzip backups with a retention policy."""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(
+        self,
+        backup_service: BackupService,
+        chain_dir: Path | None = None,
+        policy: RetentionPolicy | None = None,
+        full_every: int = 24,
+        compress_level: int = 6,
+    ):
+        self.backup_service = backup_service
+        self.chain_dir = chain_dir or backup_service.backup_dir / "chain"
+        self.policy = policy or RetentionPolicy()
+        self.full_every = max(1, full_every)
+        self.compress_level = compress_level
+        self.chain_dir.mkdir(parents=True, exist_ok=True)
+
+    def entries(self) -> list[ChainEntry]:
+        manifest = self.chain_dir / self.MANIFEST
+        if not manifest.exists():
+            return []
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+        return [ChainEntry(**item) for item in data["entries"]]
+
+    def create(
+        self,
+        incremental: bool = True,
+        progress: ProgressCallback | None = None,
+        now: datetime | None = None,
+    ) -> ChainEntry | None:
+        if not self.backup_service.db_path.exists():
+            return None
+        now = now or datetime.now()
+        entries = self.entries()
+        parent = entries[-1] if entries else None
+        name = self._unique_name(now, entries)
+
+        snapshot = self.chain_dir / f"{name}.snapshot"
+        try:
+            self.backup_service.copy_to(snapshot, progress)
+            page_size = _page_size(snapshot)
+            previous_hashes = self._load_hashes(parent) if incremental and parent else None
+            if (
+                previous_hashes is None
+                or parent.page_size != page_size
+                or self._chain_length(parent, entries) >= self.full_every
+            ):
+                entry = self._write_full(name, snapshot, page_size, now)
+            else:
+                entry = self._write_incremental(name, parent, snapshot, page_size, previous_hashes, now)
+        finally:
+            if snapshot.exists():
+                snapshot.unlink()
+
+        if parent is not None and parent.hash_file:
+            # Only the newest entry is ever diffed against.
+            (self.chain_dir / parent.hash_file).unlink(missing_ok=True)
+            entries[-1] = ChainEntry(**{**asdict(parent), "hash_file": ""})
+        entries.append(entry)
+        self._save_manifest(entries)
+        self.prune(now=now)
+        return entry
+
+    def restore(self, target: Path, name: str | None = None) -> Path:
+        entries = {entry.name: entry for entry in self.entries()}
+        if not entries:
+            raise ValueError("Nenhum backup disponivel para restauracao.")
+        if name is None:
+            name = self.entries()[-1].name
+        if name not in entries:
+            raise ValueError(f"Backup {name} nao encontrado.")
+
+        chain = []
+        current: ChainEntry | None = entries[name]
+        while current is not None:
+            chain.append(current)
+            current = entries.get(current.parent) if current.parent else None
+            if chain[-1].parent and current is None:
+                raise ValueError("Cadeia de backup incompleta.")
+        chain.reverse()
+
+        partial = target.with_name(f"{target.name}.partial")
+        with gzip.open(self.chain_dir / chain[0].data_file, "rb") as source, partial.open("wb") as output:
+            shutil.copyfileobj(source, output, length=1024 * 1024)
+        with partial.open("r+b") as output:
+            for entry in chain[1:]:
+                self._apply_incremental(entry, output)
+        try:
+            self.backup_service.check_integrity(partial)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+        os.replace(partial, target)
+        return target
+
+    def prune(self, now: datetime | None = None) -> list[str]:
+        entries = self.entries()
+        if not entries:
+            return []
+        keep = {entries[-1].name}
+        ordered = sorted(entries, key=lambda entry: entry.created_at, reverse=True)
+        buckets = (
+            (self.policy.hourly, "%Y%m%d%H"),
+            (self.policy.daily, "%Y%m%d"),
+            (self.policy.weekly, "%G%V"),
+        )
+        for limit, pattern in buckets:
+            seen: set[str] = set()
+            for entry in ordered:
+                if len(seen) >= limit:
+                    break
+                bucket = datetime.fromisoformat(entry.created_at).strftime(pattern)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    keep.add(entry.name)
+
+        by_name = {entry.name: entry for entry in entries}
+        for name in list(keep):
+            parent = by_name[name].parent
+            while parent and parent not in keep:
+                keep.add(parent)
+                parent = by_name[parent].parent
+
+        removed = [entry for entry in entries if entry.name not in keep]
+        if not removed:
+            return []
+        self._save_manifest([entry for entry in entries if entry.name in keep])
+        for entry in removed:
+            (self.chain_dir / entry.data_file).unlink(missing_ok=True)
+            if entry.hash_file:
+                (self.chain_dir / entry.hash_file).unlink(missing_ok=True)
+        return [entry.name for entry in removed]
+
+    def _write_full(self, name: str, snapshot: Path, page_size: int, now: datetime) -> ChainEntry:
+        data_file = f"{name}.full.gz"
+        hash_file = f"{name}.hashes"
+        page_count = 0
+        with self._open_outputs(data_file, hash_file) as (output, hashes):
+            for _page_no, page in _iter_pages(snapshot, page_size):
+                output.write(page)
+                hashes.write(hashlib.blake2b(page, digest_size=_DIGEST_SIZE).digest())
+                page_count += 1
+        return ChainEntry(
+            name=name,
+            kind="full",
+            parent=None,
+            created_at=now.isoformat(),
+            page_size=page_size,
+            page_count=page_count,
+            changed_pages=page_count,
+            data_file=data_file,
+            hash_file=hash_file,
+        )
+
+    def _write_incremental(
+        self,
+        name: str,
+        parent: ChainEntry,
+        snapshot: Path,
+        page_size: int,
+        previous_hashes: bytes,
+        now: datetime,
+    ) -> ChainEntry:
+        data_file = f"{name}.incr.gz"
+        hash_file = f"{name}.hashes"
+        page_count = 0
+        changed = 0
+        with self._open_outputs(data_file, hash_file) as (output, hashes):
+            for page_no, page in _iter_pages(snapshot, page_size):
+                digest = hashlib.blake2b(page, digest_size=_DIGEST_SIZE).digest()
+                hashes.write(digest)
+                offset = page_no * _DIGEST_SIZE
+                if previous_hashes[offset : offset + _DIGEST_SIZE] != digest:
+                    output.write(_PAGE_NO.pack(page_no))
+                    output.write(page)
+                    changed += 1
+                page_count += 1
+        return ChainEntry(
+            name=name,
+            kind="incremental",
+            parent=parent.name,
+            created_at=now.isoformat(),
+            page_size=page_size,
+            page_count=page_count,
+            changed_pages=changed,
+            data_file=data_file,
+            hash_file=hash_file,
+        )
+
+    @contextmanager
+    def _open_outputs(self, data_file: str, hash_file: str) -> Iterator[tuple[BinaryIO, BinaryIO]]:
+        # Written under .partial names and renamed only once both files are
+        # complete, so a failed backup leaves nothing behind in the chain.
+        data_path = self.chain_dir / data_file
+        hash_path = self.chain_dir / hash_file
+        data_partial = data_path.with_name(f"{data_file}.partial")
+        hash_partial = hash_path.with_name(f"{hash_file}.partial")
+        try:
+            with (
+                gzip.open(data_partial, "wb", compresslevel=self.compress_level) as output,
+                hash_partial.open("wb") as hashes,
+            ):
+                yield output, hashes
+        except BaseException:
+            data_partial.unlink(missing_ok=True)
+            hash_partial.unlink(missing_ok=True)
+            raise
+        os.replace(data_partial, data_path)
+        os.replace(hash_partial, hash_path)
+
+    def _apply_incremental(self, entry: ChainEntry, output: BinaryIO) -> None:
+        record_size = _PAGE_NO.size + entry.page_size
+        with gzip.open(self.chain_dir / entry.data_file, "rb") as source:
+            while True:
+                record = source.read(record_size)
+                if not record:
+                    break
+                if len(record) != record_size:
+                    raise ValueError(f"Backup incremental {entry.name} truncado.")
+                (page_no,) = _PAGE_NO.unpack_from(record)
+                output.seek(page_no * entry.page_size)
+                output.write(record[_PAGE_NO.size :])
+        output.truncate(entry.page_count * entry.page_size)
+
+    def _load_hashes(self, entry: ChainEntry) -> bytes | None:
+        if not entry.hash_file:
+            return None
+        path = self.chain_dir / entry.hash_file
+        if not path.exists():
+            return None
+        return path.read_bytes()
+
+    @staticmethod
+    def _chain_length(entry: ChainEntry, entries: list[ChainEntry]) -> int:
+        by_name = {item.name: item for item in entries}
+        length = 1
+        while entry.parent:
+            entry = by_name[entry.parent]
+            length += 1
+        return length
+
+    @staticmethod
+    def _unique_name(now: datetime, entries: list[ChainEntry]) -> str:
+        base = now.strftime("%Y%m%d_%H%M%S")
+        names = {entry.name for entry in entries}
+        name = base
+        suffix = 1
+        while name in names:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        return name
+
+    def _save_manifest(self, entries: list[ChainEntry]) -> None:
+        manifest = self.chain_dir / self.MANIFEST
+        partial = manifest.with_suffix(".json.partial")
+        partial.write_text(
+            json.dumps({"entries": [asdict(entry) for entry in entries]}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(partial, manifest)
@@ -1,21 +1,86 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
 from datetime import datetime
+import os
 from pathlib import Path
-import shutil
+import sqlite3
+import threading
+from typing import Callable
+
+
+ProgressCallback = Callable[[int, int], None]
 
 
 class BackupService:
-    def __init__(self, db_path: Path, backup_dir: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        backup_dir: Path,
+        pages_per_step: int = 256,
+        step_pause: float = 0.005,
+    ):
         self.db_path = db_path
         self.backup_dir = backup_dir
+        self.pages_per_step = max(1, pages_per_step)
+        self.step_pause = max(0.0, step_pause)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
 
-    def create_backup(self) -> Path | None:
+    def create_backup(self, progress: ProgressCallback | None = None) -> Path | None:
         if not self.db_path.exists():
             return None
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         target = self.backup_dir / f"erp_backup_{timestamp}.db"
-        shutil.copy2(self.db_path, target)
+        partial = target.with_suffix(".db.partial")
+        if partial.exists():
+            partial.unlink()
+
+        try:
+            self.copy_to(partial, progress)
+            self.check_integrity(partial)
+        except Exception:
+            if partial.exists():
+                partial.unlink()
+            raise
+        os.replace(partial, target)
         return target
 
+    def create_backup_async(self, progress: ProgressCallback | None = None) -> Future[Path | None]:
+        future: Future[Path | None] = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.create_backup(progress))
+            except Exception as exc:
+                future.set_exception(exc)
+
+        threading.Thread(target=run, name="erp-backup", daemon=True).start()
+        return future
+
+    def copy_to(self, target: Path, progress: ProgressCallback | None = None) -> None:
+        source = sqlite3.connect(self.db_path)
+        destination = sqlite3.connect(target)
+        try:
+            # Copying a few pages per step only holds a short read lock on the source
+            # between pauses, so the application keeps writing while the backup runs.
+            source.backup(
+                destination,
+                pages=self.pages_per_step,
+                progress=(lambda _status, remaining, total: progress(total - remaining, total)) if progress else None,
+                sleep=self.step_pause,
+            )
+        finally:
+            destination.close()
+            source.close()
+
+    @staticmethod
+    def check_integrity(path: Path) -> None:
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != "ok":
+            raise RuntimeError(f"Backup gerado esta corrompido: {result}")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import sqlite3
+
+from erp.infrastructure.database import Database
+
+
+class DataVersionWatcher:
+    """Cheaply detects commits made to the database file by any other connection or process.
+
+    ``PRAGMA data_version`` on a dedicated connection changes whenever another
+    connection commits. Reading it touches no table, so it can be polled from
+    the UI thread; it says *that* something changed, and the change feed
+    (``QuoteRepository.changes_since``) says what.
+    """
+
+    def __init__(self, database: Database):
+        self.db_path = database.db_path
+        self._conn: sqlite3.Connection | None = None
+        self._version: int | None = None
+
+    def changed(self) -> bool:
+        try:
+            if self._conn is None:
+                # timeout=0: while another process holds the write lock, report
+                # "no news" and look again on the next poll instead of blocking.
+                self._conn = sqlite3.connect(self.db_path, timeout=0, check_same_thread=False)
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return False
+        previous, self._version = self._version, version
+        # Without a baseline we cannot know, so the first poll always reports a change.
+        return previous != version
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
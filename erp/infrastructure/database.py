@@ -1,138 +1,369 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 import sqlite3
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from erp.domain.permissions import DEFAULT_ROLE_PERMISSIONS
+
+if TYPE_CHECKING:
+    from erp.infrastructure.query_profiler import QueryProfiler
+
+
+SCHEMA_VERSION = 7
+
+# app_settings key holding the last audit_logs id written before the hash chain existed.
+AUDIT_CHAIN_START_KEY = "audit_chain_start"
+
+# quote_daily_summary dimensions -> quotes column.
+SUMMARY_DIMENSIONS = {
+    "supplier": "supplier_name",
+    "category": "category_name",
+    "user": "owner_user",
+    "status": "status",
+}
+
+# Scaled to integers (hundredths of a percent, centavos) so the trigger deltas
+# add up exactly, as in the price snapshot records.
+_SUMMARY_MARGIN_SQL = "CAST(ROUND(json_extract({row}result_payload, '$.margin_pct') * 100) AS INTEGER)"
+_SUMMARY_PROFIT_SQL = "CAST(ROUND(json_extract({row}result_payload, '$.net_profit') * 100) AS INTEGER)"
+
+# Evaluated when a quote is written and stored in quotes.below_min_price, so the
+# summaries stay exact even if the rules change later. Format with the column
+# names or "?" placeholders for result_payload, product_name and category_name.
+BELOW_MIN_PRICE_SQL = """
+    CAST(json_extract({result_payload}, '$.sale_price') AS REAL) < COALESCE(
+        (SELECT min_price FROM min_price_rules
+          WHERE scope_type = 'product' AND scope_key = LOWER(TRIM({product_name})) AND is_active = 1),
+        (SELECT min_price FROM min_price_rules
+          WHERE scope_type = 'category' AND scope_key = LOWER(TRIM({category_name})) AND is_active = 1),
+        0
+    )
+"""
 
 
 class Database:
-    def __init__(self, db_path: str):
+    # Swapped for a timing subclass while instrumentation is enabled.
+    connection_factory: type[sqlite3.Connection] = sqlite3.Connection
+
+    def __init__(self, db_path: str, reuse_connections: bool = False, profiler: QueryProfiler | None = None):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.reuse_connections = reuse_connections
+        self.profiler = profiler
+        self._local = threading.local()
 
     def connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        # Callers use "with database.connect() as conn", which only commits or rolls
+        # back; long-running services can therefore keep one connection per thread.
+        if self.reuse_connections:
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._open()
+                self._local.conn = conn
+            return conn
+        return self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, factory=self.connection_factory)
         conn.row_factory = sqlite3.Row
+        if self.profiler is not None:
+            self.profiler.attach(conn, self.db_path)
         return conn
 
     def initialize(self) -> None:
         with self.connect() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS quotes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    version INTEGER NOT NULL DEFAULT 1,
-                    status TEXT NOT NULL,
-                    product_name TEXT NOT NULL,
-                    category_name TEXT NOT NULL DEFAULT '',
-                    supplier_name TEXT NOT NULL,
-                    owner_user TEXT NOT NULL DEFAULT 'admin',
-                    notes TEXT NOT NULL,
-                    purchase_payload TEXT NOT NULL,
-                    sale_payload TEXT NOT NULL,
-                    result_payload TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """
+            # Startup fast path: skip the DDL when the stored schema is already current.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            self._create_schema(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quotes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                version INTEGER NOT NULL DEFAULT 1,
+                status TEXT NOT NULL,
+                product_name TEXT NOT NULL,
+                category_name TEXT NOT NULL DEFAULT '',
+                supplier_name TEXT NOT NULL,
+                owner_user TEXT NOT NULL DEFAULT 'admin',
+                notes TEXT NOT NULL,
+                purchase_payload TEXT NOT NULL,
+                sale_payload TEXT NOT NULL,
+                result_payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
             )
-            self._ensure_column(conn, "quotes", "category_name", "TEXT NOT NULL DEFAULT ''")
-            self._ensure_column(conn, "quotes", "owner_user", "TEXT NOT NULL DEFAULT 'admin'")
-            conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_quotes_updated_at
-                ON quotes(updated_at DESC)
-                """
+            """
+        )
+        self._ensure_column(conn, "quotes", "category_name", "TEXT NOT NULL DEFAULT ''")
+        self._ensure_column(conn, "quotes", "owner_user", "TEXT NOT NULL DEFAULT 'admin'")
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quotes_updated_at
+            ON quotes(updated_at DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quotes_keyset
+            ON quotes(updated_at DESC, id DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quote_versions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                quote_id INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                product_name TEXT NOT NULL,
+                category_name TEXT NOT NULL DEFAULT '',
+                supplier_name TEXT NOT NULL,
+                owner_user TEXT NOT NULL DEFAULT 'admin',
+                notes TEXT NOT NULL,
+                purchase_payload TEXT NOT NULL,
+                sale_payload TEXT NOT NULL,
+                result_payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (quote_id) REFERENCES quotes(id)
             )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS quote_versions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    quote_id INTEGER NOT NULL,
-                    version INTEGER NOT NULL,
-                    status TEXT NOT NULL,
-                    product_name TEXT NOT NULL,
-                    category_name TEXT NOT NULL DEFAULT '',
-                    supplier_name TEXT NOT NULL,
-                    owner_user TEXT NOT NULL DEFAULT 'admin',
-                    notes TEXT NOT NULL,
-                    purchase_payload TEXT NOT NULL,
-                    sale_payload TEXT NOT NULL,
-                    result_payload TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY (quote_id) REFERENCES quotes(id)
-                )
-                """
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_quote_versions_quote
+            ON quote_versions(quote_id, version DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password_hash TEXT NOT NULL,
+                role TEXT NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                last_login_at TEXT
             )
-            conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_quote_versions_quote
-                ON quote_versions(quote_id, version DESC)
-                """
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS role_permissions (
+                role TEXT NOT NULL,
+                capability TEXT NOT NULL,
+                PRIMARY KEY (role, capability)
+            ) WITHOUT ROWID
+            """
+        )
+        if conn.execute("SELECT 1 FROM role_permissions LIMIT 1").fetchone() is None:
+            conn.executemany(
+                "INSERT INTO role_permissions (role, capability) VALUES (?, ?)",
+                [
+                    (role, capability)
+                    for role, capabilities in DEFAULT_ROLE_PERMISSIONS.items()
+                    for capability in sorted(capabilities)
+                ],
             )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE,
-                    password_hash TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    is_active INTEGER NOT NULL DEFAULT 1,
-                    created_at TEXT NOT NULL,
-                    last_login_at TEXT
-                )
-                """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                action TEXT NOT NULL,
+                entity_type TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                details TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                prev_hash TEXT NOT NULL DEFAULT '',
+                entry_hash TEXT NOT NULL DEFAULT ''
             )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS audit_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    entity_type TEXT NOT NULL,
-                    entity_id TEXT NOT NULL,
-                    details TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-                """
+            """
+        )
+        self._ensure_column(conn, "audit_logs", "prev_hash", "TEXT NOT NULL DEFAULT ''")
+        self._ensure_column(conn, "audit_logs", "entry_hash", "TEXT NOT NULL DEFAULT ''")
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_logs_created
+            ON audit_logs(created_at DESC)
+            """
+        )
+        # Covered by idx_audit_logs_created, which already carries the rowid.
+        conn.execute("DROP INDEX IF EXISTS idx_audit_logs_keyset")
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'audit_logs_archive_%'"
+        ).fetchall():
+            table = row["name"]
+            conn.execute(f"DROP INDEX IF EXISTS idx_{table}_keyset")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table}(created_at DESC)")
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_logs_user
+            ON audit_logs(username, created_at DESC, id DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_logs_entity
+            ON audit_logs(entity_type, entity_id, created_at DESC, id DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_audit_logs_action
+            ON audit_logs(action, created_at DESC, id DESC)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS min_price_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope_type TEXT NOT NULL,
+                scope_key TEXT NOT NULL,
+                min_price REAL NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
             )
-            conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_audit_logs_created
-                ON audit_logs(created_at DESC)
-                """
+            """
+        )
+        conn.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_min_price_unique
+            ON min_price_rules(scope_type, scope_key)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS app_settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at TEXT NOT NULL
             )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS min_price_rules (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scope_type TEXT NOT NULL,
-                    scope_key TEXT NOT NULL,
-                    min_price REAL NOT NULL,
-                    is_active INTEGER NOT NULL DEFAULT 1,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """
+            """
+        )
+        self._record_audit_chain_start(conn)
+        self._create_report_schema(conn)
+
+    @staticmethod
+    def _record_audit_chain_start(conn: sqlite3.Connection) -> None:
+        # Recorded once: rows up to this id predate the chain and may carry no hash.
+        if conn.execute("SELECT 1 FROM app_settings WHERE key = ?", (AUDIT_CHAIN_START_KEY,)).fetchone():
+            return
+        tables = ["audit_logs"] + [
+            row["name"]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'audit_logs_archive_%'"
             )
-            conn.execute(
-                """
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_min_price_unique
-                ON min_price_rules(scope_type, scope_key)
-                """
+        ]
+        first_hashed = None
+        last_id = 0
+        for table in tables:
+            row = conn.execute(
+                f"SELECT MIN(CASE WHEN entry_hash != '' THEN id END), COALESCE(MAX(id), 0) FROM {table}"
+            ).fetchone()
+            if row[0] is not None:
+                first_hashed = row[0] if first_hashed is None else min(first_hashed, row[0])
+            last_id = max(last_id, row[1])
+        start = first_hashed - 1 if first_hashed is not None else last_id
+        conn.execute(
+            "INSERT INTO app_settings (key, value, updated_at) VALUES (?, ?, ?)",
+            (AUDIT_CHAIN_START_KEY, str(start), datetime.now(timezone.utc).isoformat()),
+        )
+
+    def _create_report_schema(self, conn: sqlite3.Connection) -> None:
+        # Daily per-dimension aggregates of the current state of every quote,
+        # maintained by triggers in the same transaction as each quote write.
+        self._ensure_column(conn, "quotes", "below_min_price", "INTEGER NOT NULL DEFAULT 0")
+        columns = self._column_names(conn, "quote_daily_summary")
+        if "margin_sum" in columns:
+            # Older layout summed REAL values; rebuild it with integer sums.
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER IF EXISTS trg_quotes_summary_{event}")
+            conn.execute("DROP TABLE quote_daily_summary")
+            columns = []
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quote_daily_summary (
+                dimension TEXT NOT NULL,
+                day TEXT NOT NULL,
+                dim_key TEXT NOT NULL,
+                quote_count INTEGER NOT NULL,
+                margin_hundredths INTEGER NOT NULL,
+                net_profit_cents INTEGER NOT NULL,
+                below_min_count INTEGER NOT NULL,
+                PRIMARY KEY (dimension, day, dim_key)
+            ) WITHOUT ROWID
+            """
+        )
+        if not columns:
+            below_min = BELOW_MIN_PRICE_SQL.format(
+                result_payload="result_payload", product_name="product_name", category_name="category_name"
             )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS app_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
+            conn.execute(f"UPDATE quotes SET below_min_price = ({below_min})")
+            for dimension, column in SUMMARY_DIMENSIONS.items():
+                conn.execute(
+                    f"""
+                    INSERT INTO quote_daily_summary
+                    SELECT ?, substr(created_at, 1, 10), {column}, COUNT(*),
+                           SUM({_SUMMARY_MARGIN_SQL.format(row="")}),
+                           SUM({_SUMMARY_PROFIT_SQL.format(row="")}),
+                           SUM(below_min_price)
+                      FROM quotes
+                  GROUP BY 2, 3
+                    """,
+                    (dimension,),
                 )
+
+        for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+            statements = "".join(
+                self._summary_upsert(dimension, column, row)
+                for row in rows
+                for dimension, column in SUMMARY_DIMENSIONS.items()
+            )
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_quotes_summary_{event.lower()}
+                AFTER {event} ON quotes
+                BEGIN
+                {statements}
+                END
                 """
             )
 
     @staticmethod
-    def _ensure_column(conn: sqlite3.Connection, table_name: str, column_name: str, definition: str) -> None:
-        existing = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
-        if any(row["name"] == column_name for row in existing):
+    def _summary_upsert(dimension: str, column: str, row: str) -> str:
+        sign = "-" if row == "OLD" else ""
+        return f"""
+                    INSERT INTO quote_daily_summary VALUES (
+                        '{dimension}',
+                        substr({row}.created_at, 1, 10),
+                        {row}.{column},
+                        {sign}1,
+                        {sign}{_SUMMARY_MARGIN_SQL.format(row=row + ".")},
+                        {sign}{_SUMMARY_PROFIT_SQL.format(row=row + ".")},
+                        {sign}{row}.below_min_price
+                    )
+                    ON CONFLICT (dimension, day, dim_key) DO UPDATE SET
+                        quote_count = quote_count + excluded.quote_count,
+                        margin_hundredths = margin_hundredths + excluded.margin_hundredths,
+                        net_profit_cents = net_profit_cents + excluded.net_profit_cents,
+                        below_min_count = below_min_count + excluded.below_min_count;
+        """
+
+    @staticmethod
+    def _column_names(conn: sqlite3.Connection, table_name: str) -> list[str]:
+        return [row["name"] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+    @classmethod
+    def _ensure_column(cls, conn: sqlite3.Connection, table_name: str, column_name: str, definition: str) -> None:
+        if column_name in cls._column_names(conn, table_name):
             return
         conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
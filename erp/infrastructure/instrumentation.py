@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+import functools
+import importlib
+import inspect
+import json
+from pathlib import Path
+import sqlite3
+import threading
+from time import perf_counter
+from typing import Any, Callable
+
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# (module, class) whose public methods are timed while instrumentation is enabled.
+DEFAULT_TARGETS = (
+    ("erp.application.quote_service", "QuoteService"),
+    ("erp.infrastructure.database", "Database"),
+    ("erp.infrastructure.quote_repository", "QuoteRepository"),
+    ("erp.infrastructure.audit_repository", "AuditRepository"),
+    ("erp.infrastructure.auth_repository", "AuthRepository"),
+    ("erp.infrastructure.settings_repository", "SettingsRepository"),
+    ("erp.infrastructure.report_repository", "ReportRepository"),
+)
+
+
+def normalize_sql(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms: float) -> None:
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= target and amount:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.mean_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                (f"<={bound}" if index < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}"): amount
+                for index, (bound, amount) in enumerate(zip((*BUCKET_BOUNDS_MS, None), self.buckets))
+                if amount
+            },
+        }
+
+
+class SqlStats(LatencyHistogram):
+    """Execution latency of one statement plus the time spent fetching its rows."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fetch_ms = 0.0
+        self.rows = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**super().as_dict(), "fetch_ms": round(self.fetch_ms, 3), "rows": self.rows}
+
+
+class Instrumentation:
+    """Opt-in call counts, latency histograms and SQL timings.
+
+    Enabling swaps the public methods of the target classes for timing
+    wrappers and makes Database open timing connections; disabling puts the
+    originals back, so the disabled path costs nothing at all. Connections
+    already cached by ``Database(reuse_connections=True)`` keep the class
+    they were opened with.
+    """
+
+    def __init__(self, targets: tuple[tuple[str, str], ...] = DEFAULT_TARGETS):
+        self.targets = targets
+        self.enabled = False
+        self.started_at: str | None = None
+        self.calls: dict[str, LatencyHistogram] = {}
+        self.sql: dict[str, SqlStats] = {}
+        self._lock = threading.Lock()
+        self._originals: list[tuple[type, str, Any]] = []
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        from erp.infrastructure.database import Database
+
+        for module_name, class_name in self.targets:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            for name, member in list(vars(cls).items()):
+                if name.startswith("_") or not inspect.isfunction(member):
+                    continue
+                self._originals.append((cls, name, member))
+                setattr(cls, name, self._timed(f"{class_name}.{name}", member))
+        self._originals.append((Database, "connection_factory", Database.__dict__["connection_factory"]))
+        Database.connection_factory = TimedConnection
+        self.enabled = True
+        if self.started_at is None:
+            self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def disable(self) -> None:
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = {}
+            self.sql = {}
+            self.started_at = datetime.now(timezone.utc).isoformat() if self.enabled else None
+
+    def _timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        record = self.record_call
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (perf_counter() - started) * 1000)
+
+        return wrapper
+
+    def record_call(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            histogram = self.calls.get(name)
+            if histogram is None:
+                histogram = self.calls[name] = LatencyHistogram()
+            histogram.add(elapsed_ms)
+
+    def record_sql(self, sql: str, elapsed_ms: float) -> None:
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.sql.get(key)
+            if stats is None:
+                stats = self.sql[key] = SqlStats()
+            stats.add(elapsed_ms)
+
+    def record_fetch(self, sql: str, elapsed_ms: float, rows: int) -> None:
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.sql.get(key)
+            if stats is None:
+                stats = self.sql[key] = SqlStats()
+            stats.fetch_ms += elapsed_ms
+            stats.rows += rows
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "started_at": self.started_at,
+                "captured_at": datetime.now(timezone.utc).isoformat(),
+                "calls": {name: item.as_dict() for name, item in sorted(self.calls.items())},
+                "sql": {
+                    sql: item.as_dict()
+                    for sql, item in sorted(self.sql.items(), key=lambda entry: -entry[1].total_ms)
+                },
+            }
+
+    def report(self, limit: int = 25) -> str:
+        data = self.snapshot()
+        lines = [
+            f"Instrumentacao {'ativa' if data['enabled'] else 'inativa'} desde {data['started_at'] or '-'}",
+            "",
+            f"{'chamada':<44} {'qtd':>7} {'media':>9} {'p95':>9} {'max':>9}  ms",
+        ]
+        calls = sorted(data["calls"].items(), key=lambda entry: -entry[1]["total_ms"])
+        for name, item in calls[:limit]:
+            lines.append(
+                f"{name:<44} {item['count']:>7} {item['mean_ms']:>9.3f} {item['p95_ms']:>9.3f} {item['max_ms']:>9.3f}"
+            )
+        lines += ["", f"{'sql':<60} {'qtd':>7} {'total':>10} {'p95':>9} {'leitura':>9}  ms"]
+        for sql, item in list(data["sql"].items())[:limit]:
+            text = sql if len(sql) <= 60 else sql[:57] + "..."
+            lines.append(
+                f"{text:<60} {item['count']:>7} {item['total_ms']:>10.3f} {item['p95_ms']:>9.3f} {item['fetch_ms']:>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str | Path) -> Path:
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(self.snapshot(), indent=2) + "\n", encoding="utf-8")
+        return target
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+class TimedCursor(sqlite3.Cursor):
+    _sql = ""
+
+    def execute(self, sql: str, parameters: Any = (), /) -> TimedCursor:
+        self._sql = sql
+        started = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            INSTRUMENTATION.record_sql(sql, (perf_counter() - started) * 1000)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> TimedCursor:
+        self._sql = sql
+        started = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            INSTRUMENTATION.record_sql(sql, (perf_counter() - started) * 1000)
+
+    def fetchone(self) -> Any:
+        started = perf_counter()
+        row = super().fetchone()
+        INSTRUMENTATION.record_fetch(self._sql, (perf_counter() - started) * 1000, int(row is not None))
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        started = perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        INSTRUMENTATION.record_fetch(self._sql, (perf_counter() - started) * 1000, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        started = perf_counter()
+        rows = super().fetchall()
+        INSTRUMENTATION.record_fetch(self._sql, (perf_counter() - started) * 1000, len(rows))
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors record per-statement timings.
+
+    Fetch time is counted for rows read with fetchone/fetchmany/fetchall;
+    iterating the cursor directly is not timed.
+    """
+
+    def cursor(self, factory: type[sqlite3.Cursor] = TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str, /) -> sqlite3.Cursor:
+        started = perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            INSTRUMENTATION.record_sql(sql_script, (perf_counter() - started) * 1000)
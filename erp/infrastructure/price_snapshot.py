@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import mmap
+import os
+from pathlib import Path
+import struct
+import time
+from typing import Iterable, Iterator
+
+from erp.domain.models import round_money, round_pct
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+SNAPSHOT_MAGIC = b"ERPPRC01"
+KEY_BYTES = 48
+# magic, record size, record count, change seq, published at (us since epoch)
+_HEADER = struct.Struct("<8sIIqq")
+# product key (UTF-8, NUL padded), quote id, sale price (centavos), margin (hundredths of %), updated at (us)
+_RECORD = struct.Struct(f"<{KEY_BYTES}sqqqq")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ID_CHUNK = 500
+_CHANGES_PAGE = 1000
+_REPLACE_ATTEMPTS = 20
+
+Record = tuple[bytes, int, int, int, int]
+
+
+def product_key(product_name: str) -> bytes:
+    """Lowercase, whitespace-collapsed UTF-8 name, cut to KEY_BYTES without splitting a character."""
+    encoded = " ".join(product_name.split()).lower().encode("utf-8")[:KEY_BYTES]
+    return encoded.decode("utf-8", "ignore").encode("utf-8")
+
+
+def _micros(iso_text: str) -> int:
+    moment = datetime.fromisoformat(iso_text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class PriceEntry:
+    product_key: str
+    quote_id: int
+    sale_price: Decimal
+    margin_pct: Decimal
+    updated_at: datetime
+
+
+class PriceSnapshot:
+    """Read-only, memory-mapped view of a published price file.
+
+    Records are fixed width and sorted by the padded key bytes, so a lookup
+    is a binary search over the map that decodes only the record it finds.
+    Call :meth:`reload_if_changed` between batches of lookups to pick up a
+    newer publication.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self._identity: tuple[int, int, int] | None = None
+        self.count = 0
+        self.change_seq = 0
+        self.published_at = _EPOCH
+        self._open()
+
+    def _open(self) -> None:
+        handle = open(self.path, "rb")
+        try:
+            stat = os.fstat(handle.fileno())
+            if stat.st_size < _HEADER.size:
+                raise ValueError(f"Arquivo de precos invalido: {self.path}")
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            handle.close()
+            raise
+        magic, record_size, count, change_seq, published_us = _HEADER.unpack_from(mapped, 0)
+        if (
+            magic != SNAPSHOT_MAGIC
+            or record_size != _RECORD.size
+            or len(mapped) != _HEADER.size + count * record_size
+        ):
+            mapped.close()
+            handle.close()
+            raise ValueError(f"Arquivo de precos invalido: {self.path}")
+        self._file, self._map = handle, mapped
+        self._identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.count, self.change_seq = count, change_seq
+        self.published_at = _EPOCH + timedelta(microseconds=published_us)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> PriceSnapshot:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reload_if_changed(self) -> bool:
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._identity:
+            return False
+        self.close()
+        self._open()
+        return True
+
+    def lookup(self, product_name: str) -> PriceEntry | None:
+        key = product_key(product_name).ljust(KEY_BYTES, b"\0")
+        mapped, size = self._map, _RECORD.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _HEADER.size + mid * size
+            if mapped[offset:offset + KEY_BYTES] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        offset = _HEADER.size + lo * size
+        if lo < self.count and mapped[offset:offset + KEY_BYTES] == key:
+            return self._entry(_RECORD.unpack_from(mapped, offset))
+        return None
+
+    def records(self) -> Iterator[Record]:
+        for index in range(self.count):
+            key, *values = _RECORD.unpack_from(self._map, _HEADER.size + index * _RECORD.size)
+            yield (key.rstrip(b"\0"), *values)
+
+    def __iter__(self) -> Iterator[PriceEntry]:
+        return (self._entry(record) for record in self.records())
+
+    @staticmethod
+    def _entry(record: tuple) -> PriceEntry:
+        key, quote_id, price_cents, margin_hundredths, updated_us = record
+        return PriceEntry(
+            product_key=key.rstrip(b"\0").decode("utf-8"),
+            quote_id=quote_id,
+            sale_price=Decimal(price_cents).scaleb(-2),
+            margin_pct=Decimal(margin_hundredths).scaleb(-2),
+            updated_at=_EPOCH + timedelta(microseconds=updated_us),
+        )
+
+
+def write_snapshot(path: Path, records: Iterable[Record], change_seq: int) -> int:
+    """Writes ``records`` sorted by key next to ``path`` and swaps the file in."""
+    ordered = sorted(records, key=lambda record: record[0])
+    published_us = (datetime.now(timezone.utc) - _EPOCH) // timedelta(microseconds=1)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as output:
+        output.write(_HEADER.pack(SNAPSHOT_MAGIC, _RECORD.size, len(ordered), change_seq, published_us))
+        output.write(b"".join(_RECORD.pack(*record) for record in ordered))
+        output.flush()
+        os.fsync(output.fileno())
+    # Readers that already mapped the old file keep it until they reload. On
+    # Windows the rename fails while a reader holds the file open, so retry briefly.
+    for attempt in range(_REPLACE_ATTEMPTS):
+        try:
+            os.replace(tmp_path, path)
+            break
+        except PermissionError:
+            if attempt == _REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.05)
+    return len(ordered)
+
+
+@dataclass(frozen=True)
+class PublishResult:
+    entries: int
+    changes: int
+    full: bool
+    change_seq: int
+    elapsed_s: float
+
+
+class PriceSnapshotPublisher:
+    """Publishes the current sale price per product, taken from approved quotes.
+
+    A product's price comes from its most recently updated approved quote.
+    The file records the change sequence it was built from, so the next
+    publication only reads quotes saved since then (the quote change feed)
+    and merges them into the existing records. It rescans every approved
+    quote when there is no valid file or when a quote that supplied a price
+    is no longer approved or was renamed.
+    """
+
+    def __init__(self, database: Database, path: str | Path):
+        self.database = database
+        self.path = Path(path)
+        self.repository = QuoteRepository(database)
+
+    def publish(self, full: bool = False) -> PublishResult:
+        started = time.perf_counter()
+        records: dict[bytes, Record] | None = None
+        changes = 0
+        snapshot = None if full else self._open_current()
+        if snapshot is not None:
+            with snapshot:
+                changed_ids, seq = self._changed_since(snapshot.change_seq)
+                if not changed_ids:
+                    # Nothing saved since the last publication: leave the file, and the readers' maps, alone.
+                    return PublishResult(len(snapshot), 0, False, seq, time.perf_counter() - started)
+                records = {record[0]: record for record in snapshot.records()}
+            records = self._merge(records, changed_ids)
+            changes = len(changed_ids)
+
+        if records is None:
+            # Read the sequence first: a save landing during the scan is merged again next time.
+            seq = self.repository.change_seq()
+            records = {}
+            for record in self._approved_records():
+                self._keep_latest(records, record)
+            changes = 0
+            full = True
+
+        entries = write_snapshot(self.path, records.values(), seq)
+        return PublishResult(entries, changes, full, seq, time.perf_counter() - started)
+
+    def _open_current(self) -> PriceSnapshot | None:
+        try:
+            return PriceSnapshot(self.path)
+        except (OSError, ValueError):
+            return None
+
+    def _changed_since(self, seq: int) -> tuple[list[int], int]:
+        changed_ids: list[int] = []
+        while True:
+            page = self.repository.changes_since(seq, limit=_CHANGES_PAGE)
+            changed_ids.extend(int(row["id"]) for row in page)
+            if page:
+                seq = int(page[-1]["seq"])
+            if len(page) < _CHANGES_PAGE:
+                return changed_ids, seq
+
+    def _merge(self, records: dict[bytes, Record], changed_ids: list[int]) -> dict[bytes, Record] | None:
+        approved = {record[1]: record for record in self._approved_records(changed_ids)}
+        sources = {record[1]: key for key, record in records.items()}
+        for quote_id in changed_ids:
+            key = sources.get(quote_id)
+            if key is not None and (quote_id not in approved or approved[quote_id][0] != key):
+                # The product lost the quote that priced it; only a full scan finds the next one.
+                return None
+        for record in approved.values():
+            self._keep_latest(records, record)
+        return records
+
+    @staticmethod
+    def _keep_latest(records: dict[bytes, Record], record: Record) -> None:
+        current = records.get(record[0])
+        if current is None or (record[4], record[1]) > (current[4], current[1]):
+            records[record[0]] = record
+
+    def _approved_records(self, quote_ids: list[int] | None = None) -> Iterator[Record]:
+        sql = """
+            SELECT id, product_name,
+                   json_extract(result_payload, '$.sale_price') AS sale_price,
+                   json_extract(result_payload, '$.margin_pct') AS margin_pct,
+                   updated_at
+              FROM quotes
+             WHERE status = 'APROVADA'
+        """
+        if quote_ids is None:
+            batches: list[list[int] | None] = [None]
+        else:
+            batches = [quote_ids[start:start + _ID_CHUNK] for start in range(0, len(quote_ids), _ID_CHUNK)]
+        with self.database.connect() as conn:
+            for batch in batches:
+                if batch is None:
+                    rows = conn.execute(sql)
+                else:
+                    rows = conn.execute(f"{sql} AND id IN ({', '.join('?' * len(batch))})", batch)
+                for row in rows:
+                    yield (
+                        product_key(row["product_name"]),
+                        int(row["id"]),
+                        int(round_money(Decimal(str(row["sale_price"]))) * 100),
+                        int(round_pct(Decimal(str(row["margin_pct"]))) * 100),
+                        _micros(row["updated_at"]),
+                    )
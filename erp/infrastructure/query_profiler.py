@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import re
+import sqlite3
+import threading
+from time import perf_counter
+import weakref
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_BLOB = re.compile(r"\b[xX]\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+_MAX_SQL_CHARS = 2000
+
+
+def normalize_statement(sql: str) -> str:
+    """Replaces literals with ``?`` so executions with different values aggregate together."""
+    text = _STRING.sub("?", sql)
+    text = _BLOB.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = " ".join(text.split())
+    # IN (...) and VALUES (...) lists of any length count as one statement.
+    return _PARAM_LIST.sub("(?)", text)
+
+
+@dataclass
+class StatementStats:
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow_count: int = 0
+    example: str = ""
+    plan: list[str] = field(default_factory=list)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class _Tracker:
+    """Statement currently running on one connection."""
+
+    def __init__(self, profiler: QueryProfiler, db_path: Path):
+        self.profiler = profiler
+        self.db_path = db_path
+        self.sql: str | None = None
+        self.started = 0.0
+        self.last = 0.0
+
+
+class QueryProfiler:
+    """Slow-query log built on SQLite's trace callback and progress handler.
+
+    The trace callback reports each statement (with bound values expanded)
+    when it starts; the progress handler ticks every ``progress_steps``
+    virtual machine instructions while it runs. A statement's time is the
+    span from its start to its last tick, so statements too short to tick
+    count as zero and a cursor read in batches includes the pauses between
+    fetches. Statements over ``threshold_ms`` are logged with their
+    ``EXPLAIN QUERY PLAN``, captured once per normalized statement on a
+    separate read-only connection.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 100.0,
+        log_path: str | Path | None = None,
+        progress_steps: int = 1000,
+        keep_entries: int = 200,
+    ):
+        self.threshold_ms = threshold_ms
+        self.log_path = Path(log_path) if log_path else None
+        self.progress_steps = max(1, progress_steps)
+        self.entries: deque[dict[str, object]] = deque(maxlen=keep_entries)
+        self._stats: dict[str, StatementStats] = {}
+        self._trackers: set[_Tracker] = set()
+        # Trackers whose connection went away; their last statement is
+        # accounted for by the next attach() or flush(), never by the collector.
+        self._detached: deque[_Tracker] = deque()
+        self._lock = threading.Lock()
+
+    def attach(self, conn: sqlite3.Connection, db_path: str | Path) -> None:
+        tracker = _Tracker(self, Path(db_path))
+
+        def on_statement(sql: str) -> None:
+            # Trigger sub-statements are reported with the text of the statement that fired them.
+            if sql == tracker.sql:
+                return
+            self._finish(tracker)
+            tracker.sql = sql
+            tracker.started = tracker.last = perf_counter()
+
+        def on_progress() -> int:
+            tracker.last = perf_counter()
+            return 0
+
+        conn.set_trace_callback(on_statement)
+        conn.set_progress_handler(on_progress, self.progress_steps)
+        # The callbacks live as long as the connection; only hand the tracker over here.
+        weakref.finalize(on_statement, self._detached.append, tracker)
+        self._finish_detached()
+        with self._lock:
+            self._trackers.add(tracker)
+
+    def flush(self) -> None:
+        """Accounts for the statements still open, including those of closed connections."""
+        self._finish_detached()
+        with self._lock:
+            trackers = list(self._trackers)
+        for tracker in trackers:
+            self._finish(tracker)
+
+    def _finish_detached(self) -> None:
+        while True:
+            try:
+                tracker = self._detached.popleft()
+            except IndexError:
+                return
+            self._finish(tracker)
+            with self._lock:
+                self._trackers.discard(tracker)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self.entries.clear()
+
+    def stats(self) -> list[StatementStats]:
+        with self._lock:
+            return sorted(self._stats.values(), key=lambda item: -item.total_ms)
+
+    def slow_queries(self) -> list[StatementStats]:
+        return sorted((item for item in self.stats() if item.slow_count), key=lambda item: -item.max_ms)
+
+    def _finish(self, tracker: _Tracker) -> None:
+        with self._lock:
+            sql, tracker.sql = tracker.sql, None
+            if sql is None:
+                return
+            elapsed_ms = (tracker.last - tracker.started) * 1000
+            key = normalize_statement(sql)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(key)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+                stats.example = sql[:_MAX_SQL_CHARS]
+            if elapsed_ms <= self.threshold_ms:
+                return
+            stats.slow_count += 1
+            needs_plan = not stats.plan
+
+        plan = self._explain(tracker.db_path, sql) if needs_plan else stats.plan
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "statement": key,
+            "sql": sql[:_MAX_SQL_CHARS],
+            "plan": plan,
+        }
+        with self._lock:
+            if needs_plan:
+                stats.plan = plan
+            self.entries.append(entry)
+            if self.log_path is not None:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.log_path.open("a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _explain(db_path: Path, sql: str) -> list[str]:
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True, timeout=0.5)
+            try:
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as exc:
+            return [f"plano indisponivel: {exc}"]
+        depth: dict[int, int] = {0: -1}
+        lines = []
+        for node_id, parent_id, _unused, detail in rows:
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+
+    def report(self, limit: int = 20) -> str:
+        self.flush()
+        lines = [
+            f"SQL acima de {self.threshold_ms:g} ms",
+            "",
+            f"{'instrucao':<70} {'qtd':>7} {'lentas':>6} {'media':>9} {'max':>9}  ms",
+        ]
+        for item in self.stats()[:limit]:
+            text = item.statement if len(item.statement) <= 70 else item.statement[:67] + "..."
+            lines.append(f"{text:<70} {item.count:>7} {item.slow_count:>6} {item.mean_ms:>9.3f} {item.max_ms:>9.3f}")
+        for item in self.slow_queries()[:limit]:
+            lines += ["", f"{item.max_ms:.1f} ms  {' '.join(item.example.split())[:200]}", *(f"    {line}" for line in item.plan)]
+        return "\n".join(lines)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, fields
+import json
+import time
+from typing import Callable, Iterator, TextIO
+
+from erp.domain.models import PricingResult, PurchaseInput, SaleInput
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+EXPORT_FORMATS = ("csv", "jsonl")
+_PAYLOADS = (
+    ("purchase", [item.name for item in fields(PurchaseInput)]),
+    ("sale", [item.name for item in fields(SaleInput)]),
+    ("result", [item.name for item in fields(PricingResult)]),
+)
+_BASE_COLUMNS = {
+    "quotes": (
+        "id", "version", "status", "product_name", "category_name", "supplier_name",
+        "owner_user", "notes", "created_at", "updated_at",
+    ),
+    "versions": (
+        "id", "quote_id", "version", "status", "product_name", "category_name", "supplier_name",
+        "owner_user", "notes", "created_at",
+    ),
+}
+# Versions have no updated_at; alias created_at so the list_recent filters apply unchanged.
+_SOURCES = {
+    "quotes": "quotes",
+    "versions": "(SELECT *, created_at AS updated_at FROM quote_versions)",
+}
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    rows: int
+    elapsed_s: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def export_columns(table: str) -> list[str]:
+    return [
+        *_BASE_COLUMNS[table],
+        *(f"{section}_{name}" for section, names in _PAYLOADS for name in names),
+    ]
+
+
+class QuoteExporter:
+    """Streams quotes or quote versions to CSV/JSON Lines with flattened payloads.
+
+    Rows are read with fetchmany on a single cursor and written as they arrive,
+    so memory stays flat regardless of the table size.
+    """
+
+    def __init__(self, database: Database, batch_size: int = 2000):
+        self.database = database
+        self.batch_size = max(1, batch_size)
+
+    def export(
+        self,
+        output: TextIO,
+        table: str = "quotes",
+        fmt: str = "csv",
+        filters: dict[str, str] | None = None,
+        progress: Callable[[int], None] | None = None,
+    ) -> ExportResult:
+        if table not in _SOURCES:
+            raise ValueError(f"Tabela de exportacao invalida: {table}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportacao invalido: {fmt}")
+
+        started = time.perf_counter()
+        columns = export_columns(table)
+        if fmt == "csv":
+            writer = csv.writer(output, lineterminator="\n")
+            writer.writerow(columns)
+            write_rows = writer.writerows
+        else:
+            def write_rows(rows: list[list[object]]) -> None:
+                output.writelines(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+                )
+
+        count = 0
+        for batch in self._iter_batches(table, filters):
+            write_rows(batch)
+            count += len(batch)
+            if progress is not None:
+                progress(count)
+        return ExportResult(rows=count, elapsed_s=time.perf_counter() - started)
+
+    def _iter_batches(self, table: str, filters: dict[str, str] | None) -> Iterator[list[list[object]]]:
+        clauses, params = QuoteRepository._filter_clauses(filters)
+        base_columns = _BASE_COLUMNS[table]
+        select_sql = ", ".join((*base_columns, "purchase_payload", "sale_payload", "result_payload"))
+        payload_names = [names for _section, names in _PAYLOADS]
+        width = len(base_columns)
+
+        conn = self.database.connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT {select_sql} FROM {_SOURCES[table]} WHERE {' AND '.join(clauses)} ORDER BY id",
+                params,
+            )
+            cursor.row_factory = None
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    return
+                batch = []
+                for row in rows:
+                    flat = list(row[:width])
+                    for payload, names in zip(row[width:], payload_names):
+                        data = json.loads(payload)
+                        flat.extend(data.get(name, "") for name in names)
+                    batch.append(flat)
+                yield batch
+        finally:
+            if not self.database.reuse_connections:
+                conn.close()
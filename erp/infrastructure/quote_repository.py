@@ -1,186 +1,300 @@
 ﻿from __future__ import annotations
 
 import json
-from dataclasses import asdict
+import sqlite3
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Callable, Iterable, Iterator
 
 from erp.domain.models import (
-    PricingResult,
     PurchaseInput,
     QuoteRecord,
     SaleInput,
-    parse_decimal,
+    purchase_from_payload,
+    result_from_payload,
+    sale_from_payload,
 )
-from erp.infrastructure.database import Database
+from erp.domain.quote_merge import QuoteConflictError
+from erp.infrastructure.database import BELOW_MIN_PRICE_SQL, Database
+
+
+_BELOW_MIN_PRICE = BELOW_MIN_PRICE_SQL.format(result_payload="?", product_name="?", category_name="?")
+_PAYLOAD_FIELDS = {
+    "purchase": {item.name for item in fields(PurchaseInput)},
+    "sale": {item.name for item in fields(SaleInput)},
+}
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def quote_summary(quote: QuoteRecord) -> dict[str, str]:
+    return {
+        "id": str(quote.quote_id),
+        "version": str(quote.version),
+        "status": quote.status,
+        "product_name": quote.product_name,
+        "category_name": quote.category_name,
+        "supplier_name": quote.supplier_name,
+        "owner_user": quote.owner_user,
+        "updated_at": quote.updated_at or "",
+    }
+
+
 def _decimal_default(value: object) -> str:
     if isinstance(value, Decimal):
         return str(value)
     raise TypeError("Invalid non-serializable value")
 
 
+@dataclass(frozen=True)
+class PreparedQuote:
+    """A quote with its payloads already serialized, e.g. by a worker process."""
+
+    quote: QuoteRecord
+    purchase_payload: str
+    sale_payload: str
+    result_payload: str
+
+
+def prepare_quote(quote: QuoteRecord) -> PreparedQuote:
+    return PreparedQuote(
+        quote=quote,
+        purchase_payload=json.dumps(asdict(quote.purchase), default=_decimal_default),
+        sale_payload=json.dumps(asdict(quote.sale), default=_decimal_default),
+        result_payload=json.dumps(asdict(quote.result), default=_decimal_default),
+    )
+
+
+def record_from_row(row) -> QuoteRecord:
+    purchase = purchase_from_payload(json.loads(row["purchase_payload"]))
+    sale = sale_from_payload(json.loads(row["sale_payload"]))
+    result = result_from_payload(json.loads(row["result_payload"]))
+
+    return QuoteRecord(
+        quote_id=int(row["id"]),
+        version=int(row["version"]),
+        status=row["status"],
+        product_name=row["product_name"],
+        category_name=row["category_name"] or "",
+        supplier_name=row["supplier_name"],
+        owner_user=row["owner_user"] if "owner_user" in row.keys() else "admin",
+        notes=row["notes"],
+        purchase=purchase,
+        sale=sale,
+        result=result,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+    )
+
+
+@dataclass(frozen=True)
+class BulkSaveResult:
+    saved: int
+    conflicts: list[int] = field(default_factory=list)
+
+
 class QuoteRepository:
     def __init__(self, database: Database):
         self.database = database
 
     def save(self, quote: QuoteRecord) -> QuoteRecord:
-        now_iso = _now_iso()
-        purchase_payload = json.dumps(asdict(quote.purchase), default=_decimal_default)
-        sale_payload = json.dumps(asdict(quote.sale), default=_decimal_default)
-        result_payload = json.dumps(asdict(quote.result), default=_decimal_default)
-
-        if quote.quote_id is None:
-            saved = self._insert_quote(
-                quote=quote,
-                now_iso=now_iso,
-                purchase_payload=purchase_payload,
-                sale_payload=sale_payload,
-                result_payload=result_payload,
-            )
-        else:
-            saved = self._update_quote(
-                quote=quote,
-                now_iso=now_iso,
-                purchase_payload=purchase_payload,
-                sale_payload=sale_payload,
-                result_payload=result_payload,
-            )
-
-        self._insert_version_snapshot(saved)
-        return saved
+        with self.database.connect() as conn:
+            quote_id = self._write_quote(conn, prepare_quote(quote), _now_iso())
+        return self.get(quote_id)
 
-    def _insert_quote(
+    def save_many(
         self,
-        quote: QuoteRecord,
-        now_iso: str,
-        purchase_payload: str,
-        sale_payload: str,
-        result_payload: str,
-    ) -> QuoteRecord:
+        quotes: Iterable[QuoteRecord | PreparedQuote],
+        checkpoint: tuple[str, str] | Callable[[list[int]], tuple[str, str]] | None = None,
+    ) -> BulkSaveResult:
+        """Persists a batch in one transaction; stale rows are skipped and reported.
+
+        ``checkpoint`` is an app_settings (key, value) pair committed atomically
+        with the batch, so resumable jobs never lose or repeat a chunk. A
+        callable receives the ids skipped as stale and returns the pair.
+        """
+        saved = 0
+        conflicts: list[int] = []
+        now_iso = _now_iso()
         with self.database.connect() as conn:
-            cursor = conn.execute(
-                """
-                INSERT INTO quotes (
-                    version,
-                    status,
-                    product_name,
-                    category_name,
-                    supplier_name,
-                    owner_user,
-                    notes,
-                    purchase_payload,
-                    sale_payload,
-                    result_payload,
-                    created_at,
-                    updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    1,
-                    quote.status,
-                    quote.product_name,
-                    quote.category_name,
-                    quote.supplier_name,
-                    quote.owner_user,
-                    quote.notes,
-                    purchase_payload,
-                    sale_payload,
-                    result_payload,
-                    now_iso,
-                    now_iso,
-                ),
-            )
-            new_id = int(cursor.lastrowid)
-        return self.get(new_id)
+            for item in quotes:
+                prepared = item if isinstance(item, PreparedQuote) else prepare_quote(item)
+                try:
+                    self._write_quote(conn, prepared, now_iso)
+                except QuoteConflictError:
+                    conflicts.append(int(prepared.quote.quote_id))
+                    continue
+                saved += 1
+            if checkpoint is not None:
+                if callable(checkpoint):
+                    checkpoint = checkpoint(conflicts)
+                conn.execute(
+                    """
+                    INSERT INTO app_settings (key, value, updated_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                    """,
+                    (*checkpoint, now_iso),
+                )
+        return BulkSaveResult(saved=saved, conflicts=conflicts)
 
-    def _update_quote(
+    def iter_row_chunks(
         self,
-        quote: QuoteRecord,
-        now_iso: str,
-        purchase_payload: str,
-        sale_payload: str,
-        result_payload: str,
-    ) -> QuoteRecord:
-        with self.database.connect() as conn:
-            cursor = conn.execute(
-                """
-                UPDATE quotes
-                   SET version = version + 1,
-                       status = ?,
-                       product_name = ?,
-                       category_name = ?,
-                       supplier_name = ?,
-                       owner_user = ?,
-                       notes = ?,
-                       purchase_payload = ?,
-                       sale_payload = ?,
-                       result_payload = ?,
-                       updated_at = ?
-                 WHERE id = ? AND version = ?
-                """,
-                (
-                    quote.status,
-                    quote.product_name,
-                    quote.category_name,
-                    quote.supplier_name,
-                    quote.owner_user,
-                    quote.notes,
-                    purchase_payload,
-                    sale_payload,
-                    result_payload,
-                    now_iso,
-                    quote.quote_id,
-                    quote.version,
-                ),
-            )
-            if cursor.rowcount == 0:
-                raise ValueError("A cotacao foi alterada por outro processo. Recarregue o historico.")
-        return self.get(int(quote.quote_id))
+        filters: dict[str, str] | None = None,
+        chunk_size: int = 1000,
+        after_id: int = 0,
+        rates: dict[str, Decimal] | None = None,
+        ids: list[int] | None = None,
+        exact: bool = False,
+    ) -> Iterator[list[dict[str, object]]]:
+        """Streams full quote rows in id order as plain (picklable) dicts.
+
+        ``rates`` restricts the rows to quotes whose stored payload carries the
+        given rate, keyed as ``purchase.<field>`` or ``sale.<field>``; ``ids``
+        to the given quotes. ``exact`` matches the text filters whole instead
+        of as substrings.
+        """
+        clauses, params = self._filter_clauses(filters, exact=exact)
+        if ids is not None:
+            clauses.append(f"id IN ({', '.join('?' * len(ids))})")
+            params.extend(ids)
+        for key, rate in (rates or {}).items():
+            clauses.append(f"CAST(json_extract({self._payload_column(key)}, ?) AS REAL) = ?")
+            params.extend((f"$.{key.partition('.')[2]}", float(rate)))
+        clauses.append("id > ?")
+        where_sql = " AND ".join(clauses)
+        last_id = after_id
+        while True:
+            with self.database.connect() as conn:
+                rows = conn.execute(
+                    f"SELECT * FROM quotes WHERE {where_sql} ORDER BY id LIMIT ?",
+                    (*params, last_id, max(1, chunk_size)),
+                ).fetchall()
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+            last_id = int(rows[-1]["id"])
 
-    def _insert_version_snapshot(self, quote: QuoteRecord) -> None:
-        purchase_payload = json.dumps(asdict(quote.purchase), default=_decimal_default)
-        sale_payload = json.dumps(asdict(quote.sale), default=_decimal_default)
-        result_payload = json.dumps(asdict(quote.result), default=_decimal_default)
+    def _write_quote(self, conn: sqlite3.Connection, prepared: PreparedQuote, now_iso: str) -> int:
+        if prepared.quote.quote_id is None:
+            quote_id = self._insert_quote(conn, prepared, now_iso)
+        else:
+            quote_id = self._update_quote(conn, prepared, now_iso)
+        self._insert_version_snapshot(conn, quote_id)
+        return quote_id
 
-        with self.database.connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO quote_versions (
-                    quote_id,
-                    version,
-                    status,
-                    product_name,
-                    category_name,
-                    supplier_name,
-                    owner_user,
-                    notes,
-                    purchase_payload,
-                    sale_payload,
-                    result_payload,
-                    created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    quote.quote_id,
-                    quote.version,
-                    quote.status,
-                    quote.product_name,
-                    quote.category_name,
-                    quote.supplier_name,
-                    quote.owner_user,
-                    quote.notes,
-                    purchase_payload,
-                    sale_payload,
-                    result_payload,
-                    quote.updated_at or _now_iso(),
-                ),
+    @staticmethod
+    def _insert_quote(conn: sqlite3.Connection, prepared: PreparedQuote, now_iso: str) -> int:
+        quote = prepared.quote
+        cursor = conn.execute(
+            f"""
+            INSERT INTO quotes (
+                version,
+                status,
+                product_name,
+                category_name,
+                supplier_name,
+                owner_user,
+                notes,
+                purchase_payload,
+                sale_payload,
+                result_payload,
+                created_at,
+                updated_at,
+                below_min_price
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ({_BELOW_MIN_PRICE}))
+            """,
+            (
+                1,
+                quote.status,
+                quote.product_name,
+                quote.category_name,
+                quote.supplier_name,
+                quote.owner_user,
+                quote.notes,
+                prepared.purchase_payload,
+                prepared.sale_payload,
+                prepared.result_payload,
+                now_iso,
+                now_iso,
+                prepared.result_payload,
+                quote.product_name,
+                quote.category_name,
+            ),
+        )
+        return int(cursor.lastrowid)
+
+    @staticmethod
+    def _update_quote(conn: sqlite3.Connection, prepared: PreparedQuote, now_iso: str) -> int:
+        quote = prepared.quote
+        cursor = conn.execute(
+            f"""
+            UPDATE quotes
+               SET version = version + 1,
+                   status = ?,
+                   product_name = ?,
+                   category_name = ?,
+                   supplier_name = ?,
+                   owner_user = ?,
+                   notes = ?,
+                   purchase_payload = ?,
+                   sale_payload = ?,
+                   result_payload = ?,
+                   updated_at = ?,
+                   below_min_price = ({_BELOW_MIN_PRICE})
+             WHERE id = ? AND version = ?
+            """,
+            (
+                quote.status,
+                quote.product_name,
+                quote.category_name,
+                quote.supplier_name,
+                quote.owner_user,
+                quote.notes,
+                prepared.purchase_payload,
+                prepared.sale_payload,
+                prepared.result_payload,
+                now_iso,
+                prepared.result_payload,
+                quote.product_name,
+                quote.category_name,
+                quote.quote_id,
+                quote.version,
+            ),
+        )
+        if cursor.rowcount == 0:
+            raise QuoteConflictError(quote.quote_id)
+        return int(quote.quote_id)
+
+    @staticmethod
+    def _insert_version_snapshot(conn: sqlite3.Connection, quote_id: int) -> None:
+        # Snapshot the row as just written, in the same transaction as the write.
+        conn.execute(
+            """
+            INSERT INTO quote_versions (
+                quote_id,
+                version,
+                status,
+                product_name,
+                category_name,
+                supplier_name,
+                owner_user,
+                notes,
+                purchase_payload,
+                sale_payload,
+                result_payload,
+                created_at
             )
+            SELECT id, version, status, product_name, category_name, supplier_name, owner_user,
+                   notes, purchase_payload, sale_payload, result_payload, updated_at
+              FROM quotes
+             WHERE id = ?
+            """,
+            (quote_id,),
+        )
 
     def get(self, quote_id: int) -> QuoteRecord:
         with self.database.connect() as conn:
@@ -226,66 +340,145 @@ class QuoteRepository:
             for row in rows
         ]
 
-    def list_recent(self, limit: int = 200, filters: dict[str, str] | None = None) -> list[dict[str, str]]:
+    def list_recent(
+        self,
+        limit: int = 200,
+        filters: dict[str, str] | None = None,
+        before: tuple[str, int] | None = None,
+        after: tuple[str, int] | None = None,
+    ) -> list[dict[str, str]]:
+        safe_limit = max(1, min(limit, 1000))
+        clauses, params = self._filter_clauses(filters)
+
+        # Keyset pagination on (updated_at, id): "before" walks to older rows,
+        # "after" walks back to newer ones (fetched ascending, then reversed).
+        order_sql = "updated_at DESC, id DESC"
+        if before is not None:
+            clauses.append("(updated_at, id) < (?, ?)")
+            params.extend(before)
+        if after is not None:
+            clauses.append("(updated_at, id) > (?, ?)")
+            params.extend(after)
+            order_sql = "updated_at ASC, id ASC"
+
+        where_sql = " AND ".join(clauses)
+
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, version, status, product_name, category_name, supplier_name, owner_user, updated_at
+                  FROM quotes
+                 WHERE {where_sql}
+              ORDER BY {order_sql}
+                 LIMIT ?
+                """,
+                (*params, safe_limit),
+            ).fetchall()
+
+        summaries = [self._row_to_summary(row) for row in rows]
+        if after is not None:
+            summaries.reverse()
+        return summaries
+
+    def change_seq(self) -> int:
+        with self.database.connect() as conn:
+            return int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM quote_versions").fetchone()[0])
+
+    def changes_since(self, seq: int, limit: int = 500) -> list[dict[str, str]]:
+        """Quotes saved after change ``seq``, oldest change first, each with its own ``seq``.
+
+        Every save appends one quote_versions row in the write transaction and
+        SQLite serializes writers, so its AUTOINCREMENT id is a commit-ordered
+        change sequence: a reader that has seen ``seq`` has seen every earlier
+        change. Pass the last returned ``seq`` to get the next batch.
+        """
         safe_limit = max(1, min(limit, 1000))
+        # NOT INDEXED keeps the planner on the rowid range instead of walking the
+        # whole (quote_id, version) index to avoid sorting the GROUP BY.
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT q.id, q.version, q.status, q.product_name, q.category_name, q.supplier_name,
+                       q.owner_user, q.updated_at, c.seq
+                  FROM (
+                        SELECT quote_id, MAX(id) AS seq
+                          FROM quote_versions NOT INDEXED
+                         WHERE id > ?
+                      GROUP BY quote_id
+                       ) AS c
+                  JOIN quotes q ON q.id = c.quote_id
+              ORDER BY c.seq
+                 LIMIT ?
+                """,
+                (seq, safe_limit),
+            ).fetchall()
+
+        return [{**self._row_to_summary(row), "seq": str(row["seq"])} for row in rows]
+
+    @staticmethod
+    def _filter_clauses(filters: dict[str, str] | None, exact: bool = False) -> tuple[list[str], list[object]]:
         filters = filters or {}
 
         clauses = ["1=1"]
         params: list[object] = []
 
         status = (filters.get("status") or "").strip().upper()
+        category = (filters.get("category") or "").strip().lower()
         supplier = (filters.get("supplier") or "").strip().lower()
         product = (filters.get("product") or "").strip().lower()
         user_name = (filters.get("owner_user") or "").strip().lower()
         date_from = (filters.get("date_from") or "").strip()
         date_to = (filters.get("date_to") or "").strip()
+        # Mass updates (exact) must not catch "Cabos" when asked for "Cabo".
+        text_match = "= ?" if exact else "LIKE ?"
+
+        def text_pattern(value: str) -> str:
+            return value if exact else f"%{value}%"
 
         if status and status != "TODOS":
-            clauses.append("status = ?")
-            params.append(status)
+            statuses = [item.strip() for item in status.split(",") if item.strip()]
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if category:
+            clauses.append(f"LOWER(category_name) {text_match}")
+            params.append(text_pattern(category))
         if supplier:
-            clauses.append("LOWER(supplier_name) LIKE ?")
-            params.append(f"%{supplier}%")
+            clauses.append(f"LOWER(supplier_name) {text_match}")
+            params.append(text_pattern(supplier))
         if product:
-            clauses.append("LOWER(product_name) LIKE ?")
-            params.append(f"%{product}%")
+            clauses.append(f"LOWER(product_name) {text_match}")
+            params.append(text_pattern(product))
         if user_name:
-            clauses.append("LOWER(owner_user) LIKE ?")
-            params.append(f"%{user_name}%")
+            clauses.append(f"LOWER(owner_user) {text_match}")
+            params.append(text_pattern(user_name))
         if date_from:
             clauses.append("updated_at >= ?")
             params.append(f"{date_from}T00:00:00")
         if date_to:
             clauses.append("updated_at <= ?")
             params.append(f"{date_to}T23:59:59")
+        return clauses, params
 
-        where_sql = " AND ".join(clauses)
+    @staticmethod
+    def _payload_column(key: str) -> str:
+        section, _, name = key.partition(".")
+        known = _PAYLOAD_FIELDS.get(section, ())
+        if name not in known:
+            raise ValueError(f"Campo de aliquota invalido: {key}")
+        return f"{section}_payload"
 
-        with self.database.connect() as conn:
-            rows = conn.execute(
-                f"""
-                SELECT id, version, status, product_name, category_name, supplier_name, owner_user, updated_at
-                  FROM quotes
-                 WHERE {where_sql}
-              ORDER BY updated_at DESC
-                 LIMIT ?
-                """,
-                (*params, safe_limit),
-            ).fetchall()
-
-        return [
-            {
-                "id": str(row["id"]),
-                "version": str(row["version"]),
-                "status": row["status"],
-                "product_name": row["product_name"],
-                "category_name": row["category_name"],
-                "supplier_name": row["supplier_name"],
-                "owner_user": row["owner_user"],
-                "updated_at": row["updated_at"],
-            }
-            for row in rows
-        ]
+    @staticmethod
+    def _row_to_summary(row) -> dict[str, str]:
+        return {
+            "id": str(row["id"]),
+            "version": str(row["version"]),
+            "status": row["status"],
+            "product_name": row["product_name"],
+            "category_name": row["category_name"],
+            "supplier_name": row["supplier_name"],
+            "owner_user": row["owner_user"],
+            "updated_at": row["updated_at"],
+        }
 
     def duplicate(self, quote_id: int, owner_user: str) -> QuoteRecord:
         original = self.get(quote_id)
@@ -305,64 +498,4 @@ class QuoteRepository:
         return self.save(duplicated)
 
     def _row_to_record(self, row) -> QuoteRecord:
-        purchase_payload = json.loads(row["purchase_payload"])
-        sale_payload = json.loads(row["sale_payload"])
-        result_payload = json.loads(row["result_payload"])
-
-        purchase = PurchaseInput(
-            base_price=parse_decimal(purchase_payload["base_price"]),
-            ipi_rate_pct=parse_decimal(purchase_payload["ipi_rate_pct"]),
-            st_rate_pct=parse_decimal(purchase_payload["st_rate_pct"]),
-            icms_rate_pct=parse_decimal(purchase_payload["icms_rate_pct"]),
-            pis_rate_pct=parse_decimal(purchase_payload["pis_rate_pct"]),
-            cofins_rate_pct=parse_decimal(purchase_payload["cofins_rate_pct"]),
-            credit_icms=bool(purchase_payload["credit_icms"]),
-            credit_pis=bool(purchase_payload["credit_pis"]),
-            credit_cofins=bool(purchase_payload["credit_cofins"]),
-        )
-        sale = SaleInput(
-            pis_rate_pct=parse_decimal(sale_payload["pis_rate_pct"]),
-            cofins_rate_pct=parse_decimal(sale_payload["cofins_rate_pct"]),
-            icms_rate_pct=parse_decimal(sale_payload["icms_rate_pct"]),
-            markup_rate_pct=parse_decimal(sale_payload.get("markup_rate_pct")),
-            apply_markup=bool(sale_payload.get("apply_markup", False)),
-        )
-        sale_price = parse_decimal(result_payload["sale_price"])
-        sale_price_base = parse_decimal(result_payload.get("sale_price_base"), default=sale_price)
-
-        result = PricingResult(
-            ipi_value=parse_decimal(result_payload["ipi_value"]),
-            st_value=parse_decimal(result_payload["st_value"]),
-            icms_purchase_value=parse_decimal(result_payload["icms_purchase_value"]),
-            pis_purchase_value=parse_decimal(result_payload["pis_purchase_value"]),
-            cofins_purchase_value=parse_decimal(result_payload["cofins_purchase_value"]),
-            purchase_taxes_total=parse_decimal(result_payload["purchase_taxes_total"]),
-            purchase_credits_total=parse_decimal(result_payload["purchase_credits_total"]),
-            effective_cost=parse_decimal(result_payload["effective_cost"]),
-            sales_tax_rate_pct=parse_decimal(result_payload["sales_tax_rate_pct"]),
-            sale_price_base=sale_price_base,
-            sale_price=sale_price,
-            markup_rate_pct=parse_decimal(result_payload.get("markup_rate_pct")),
-            markup_value=parse_decimal(result_payload.get("markup_value")),
-            margin_pct=parse_decimal(result_payload["margin_pct"]),
-            sale_taxes_value=parse_decimal(result_payload["sale_taxes_value"]),
-            net_revenue=parse_decimal(result_payload["net_revenue"]),
-            net_profit=parse_decimal(result_payload["net_profit"]),
-            real_margin_pct=parse_decimal(result_payload["real_margin_pct"]),
-        )
-
-        return QuoteRecord(
-            quote_id=int(row["id"]),
-            version=int(row["version"]),
-            status=row["status"],
-            product_name=row["product_name"],
-            category_name=row["category_name"] or "",
-            supplier_name=row["supplier_name"],
-            owner_user=row["owner_user"] if "owner_user" in row.keys() else "admin",
-            notes=row["notes"],
-            purchase=purchase,
-            sale=sale,
-            result=result,
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-        )
+        return record_from_row(row)
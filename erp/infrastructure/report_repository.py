@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from erp.domain.models import round_money, round_pct
+from erp.infrastructure.database import SUMMARY_DIMENSIONS, Database
+
+
+def _period_clauses(date_from: str | None, date_to: str | None) -> tuple[str, list[object]]:
+    clauses = ["dimension = ?"]
+    params: list[object] = []
+    if date_from:
+        clauses.append("day >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("day <= ?")
+        params.append(date_to)
+    return " AND ".join(clauses), params
+
+
+def _metrics(row) -> dict[str, object]:
+    # Sums are stored as integers: hundredths of margin_pct and centavos of net profit.
+    count = int(row["quote_count"] or 0)
+    margin_sum = Decimal(int(row["margin_hundredths"] or 0)) / 100
+    return {
+        "quote_count": count,
+        "avg_margin_pct": round_pct(margin_sum / count) if count else Decimal("0.00"),
+        "net_profit": round_money(Decimal(int(row["net_profit_cents"] or 0)) / 100),
+        "below_min_count": int(row["below_min_count"] or 0),
+    }
+
+
+class ReportRepository:
+    """Period aggregates read from the materialized quote_daily_summary table.
+
+    Every quote is counted once per dimension, so totals come from the
+    smallest one (status) and never touch the quote payloads.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def totals(self, date_from: str | None = None, date_to: str | None = None) -> dict[str, object]:
+        where_sql, params = _period_clauses(date_from, date_to)
+        with self.database.connect() as conn:
+            row = conn.execute(
+                f"""
+                SELECT SUM(quote_count) AS quote_count, SUM(margin_hundredths) AS margin_hundredths,
+                       SUM(net_profit_cents) AS net_profit_cents, SUM(below_min_count) AS below_min_count
+                  FROM quote_daily_summary
+                 WHERE {where_sql}
+                """,
+                ("status", *params),
+            ).fetchone()
+        return _metrics(row)
+
+    def breakdown(
+        self, dimension: str, date_from: str | None = None, date_to: str | None = None
+    ) -> list[dict[str, object]]:
+        self._check_dimension(dimension)
+        where_sql, params = _period_clauses(date_from, date_to)
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT dim_key, SUM(quote_count) AS quote_count, SUM(margin_hundredths) AS margin_hundredths,
+                       SUM(net_profit_cents) AS net_profit_cents, SUM(below_min_count) AS below_min_count
+                  FROM quote_daily_summary
+                 WHERE {where_sql}
+              GROUP BY dim_key
+                HAVING SUM(quote_count) > 0
+              ORDER BY net_profit_cents DESC, dim_key
+                """,
+                (dimension, *params),
+            ).fetchall()
+        return [{"key": row["dim_key"], **_metrics(row)} for row in rows]
+
+    def daily(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        dimension: str = "status",
+        key: str | None = None,
+    ) -> list[dict[str, object]]:
+        self._check_dimension(dimension)
+        where_sql, params = _period_clauses(date_from, date_to)
+        if key is not None:
+            where_sql += " AND dim_key = ?"
+            params.append(key)
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT day, SUM(quote_count) AS quote_count, SUM(margin_hundredths) AS margin_hundredths,
+                       SUM(net_profit_cents) AS net_profit_cents, SUM(below_min_count) AS below_min_count
+                  FROM quote_daily_summary
+                 WHERE {where_sql}
+              GROUP BY day
+                HAVING SUM(quote_count) > 0
+              ORDER BY day
+                """,
+                (dimension, *params),
+            ).fetchall()
+        return [{"day": row["day"], **_metrics(row)} for row in rows]
+
+    @staticmethod
+    def _check_dimension(dimension: str) -> None:
+        if dimension not in SUMMARY_DIMENSIONS:
+            raise ValueError(f"Dimensao de relatorio invalida: {dimension}")
@@ -1,23 +1,114 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 import hashlib
 import hmac
 import os
+import time
 
 
-def hash_password(password: str) -> str:
-    salt = os.urandom(16)
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 120000)
-    return f"{salt.hex()}:{digest.hex()}"
+ALGORITHMS = ("pbkdf2_sha256", "scrypt")
+MIN_PBKDF2_ITERATIONS = 100_000
+MIN_SCRYPT_N = 2**14
+_MAX_SCRYPT_N = 2**20
+# Hashes written before the format carried its parameters: "salt:digest".
+_LEGACY_ITERATIONS = 120000
 
 
-def verify_password(password: str, stored_hash: str) -> bool:
+@dataclass(frozen=True)
+class HashParams:
+    """Cost parameters, encoded as "pbkdf2_sha256$120000" or "scrypt$n=16384,r=8,p=1"."""
+
+    algorithm: str = "pbkdf2_sha256"
+    iterations: int = 120000
+    n: int = MIN_SCRYPT_N
+    r: int = 8
+    p: int = 1
+
+    def encode(self) -> str:
+        if self.algorithm == "scrypt":
+            return f"scrypt$n={self.n},r={self.r},p={self.p}"
+        return f"pbkdf2_sha256${self.iterations}"
+
+    @classmethod
+    def decode(cls, text: str) -> HashParams:
+        algorithm, _, settings = text.strip().partition("$")
+        try:
+            if algorithm == "pbkdf2_sha256":
+                return cls(iterations=int(settings))
+            if algorithm == "scrypt":
+                values = dict(item.split("=", 1) for item in settings.split(","))
+                return cls(algorithm="scrypt", n=int(values["n"]), r=int(values["r"]), p=int(values["p"]))
+        except (KeyError, ValueError):
+            pass
+        raise ValueError(f"Parametros de hash invalidos: {text}")
+
+    def derive(self, password: str, salt: bytes) -> bytes:
+        secret = password.encode("utf-8")
+        if self.algorithm == "scrypt":
+            # scrypt needs about 128 * r * n bytes; OpenSSL's default limit is 32 MB.
+            maxmem = 256 * self.r * (self.n + self.p + 2)
+            return hashlib.scrypt(secret, salt=salt, n=self.n, r=self.r, p=self.p, maxmem=maxmem, dklen=32)
+        return hashlib.pbkdf2_hmac("sha256", secret, salt, self.iterations)
+
+
+DEFAULT_HASH_PARAMS = HashParams()
+
+
+def _parse(stored_hash: str) -> tuple[HashParams, bytes, bytes] | None:
     try:
-        salt_hex, digest_hex = stored_hash.split(":", 1)
+        if "$" not in stored_hash:
+            salt_hex, digest_hex = stored_hash.split(":", 1)
+            return HashParams(iterations=_LEGACY_ITERATIONS), bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
+        algorithm, settings, salt_hex, digest_hex = stored_hash.split("$")
+        return HashParams.decode(f"{algorithm}${settings}"), bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
     except ValueError:
+        return None
+
+
+def hash_password(password: str, params: HashParams = DEFAULT_HASH_PARAMS) -> str:
+    salt = os.urandom(16)
+    return f"{params.encode()}${salt.hex()}${params.derive(password, salt).hex()}"
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    parsed = _parse(stored_hash)
+    if parsed is None:
         return False
-    salt = bytes.fromhex(salt_hex)
-    expected = bytes.fromhex(digest_hex)
-    got = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 120000)
-    return hmac.compare_digest(got, expected)
+    params, salt, expected = parsed
+    return hmac.compare_digest(params.derive(password, salt), expected)
+
+
+def needs_rehash(stored_hash: str, params: HashParams = DEFAULT_HASH_PARAMS) -> bool:
+    """True for legacy hashes and hashes made with other parameters."""
+    return "$" not in stored_hash or not stored_hash.startswith(params.encode() + "$")
+
+
+def _verify_ms(params: HashParams, repeat: int = 3) -> float:
+    salt = os.urandom(16)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        params.derive("calibracao", salt)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def calibrate(target_ms: float = 250.0, algorithm: str = "pbkdf2_sha256") -> tuple[HashParams, float]:
+    """Parameters whose verification takes about ``target_ms`` on this host, and the measured time."""
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo de hash invalido: {algorithm}")
+    if algorithm == "scrypt":
+        # scrypt cost only grows in powers of two: take the largest n within the target.
+        params = HashParams(algorithm="scrypt")
+        elapsed = _verify_ms(params)
+        while params.n < _MAX_SCRYPT_N and elapsed * 2 <= target_ms:
+            params = HashParams(algorithm="scrypt", n=params.n * 2)
+            elapsed = _verify_ms(params)
+        return params, elapsed
 
+    probe = HashParams(iterations=20000)
+    per_iteration = _verify_ms(probe) / probe.iterations
+    iterations = max(MIN_PBKDF2_ITERATIONS, int(target_ms / per_iteration) // 1000 * 1000)
+    params = HashParams(iterations=iterations)
+    return params, _verify_ms(params)
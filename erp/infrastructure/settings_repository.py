@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 
 from erp.domain.models import parse_decimal
+from erp.domain.pricing_rules import BusinessRules
 from erp.infrastructure.database import Database
 
 
@@ -15,6 +16,22 @@ class SettingsRepository:
     def __init__(self, database: Database):
         self.database = database
 
+    def get_value(self, key: str) -> str | None:
+        with self.database.connect() as conn:
+            row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row["value"]
+
+    def set_value(self, key: str, value: str) -> None:
+        with self.database.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO app_settings (key, value, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                (key, value, _now_iso()),
+            )
+
     def get_rounding_strategy(self) -> str:
         with self.database.connect() as conn:
             row = conn.execute("SELECT value FROM app_settings WHERE key = ?", ("rounding_strategy",)).fetchone()
@@ -81,3 +98,17 @@ class SettingsRepository:
             return Decimal("0")
         return parse_decimal(row["min_price"])
 
+    def load_business_rules(self) -> BusinessRules:
+        """Rounding strategy and every active minimum price, for applying the rules to many quotes."""
+        with self.database.connect() as conn:
+            rows = conn.execute(
+                "SELECT scope_type, scope_key, min_price FROM min_price_rules WHERE is_active = 1"
+            ).fetchall()
+        prices: dict[str, dict[str, Decimal]] = {"product": {}, "category": {}}
+        for row in rows:
+            prices[row["scope_type"]][row["scope_key"]] = parse_decimal(row["min_price"])
+        return BusinessRules(
+            rounding_strategy=self.get_rounding_strategy(),
+            product_min_prices=prices["product"],
+            category_min_prices=prices["category"],
+        )
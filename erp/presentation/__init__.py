@@ -0,0 +1 @@
+"""Presentation helpers for pricing ERP."""
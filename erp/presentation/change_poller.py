@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+
+class ChangePoller:
+    """Runs ``check`` every ``interval_ms`` on the Tk loop and ``on_change`` when it returns True."""
+
+    def __init__(
+        self,
+        widget: Any,
+        check: Callable[[], bool],
+        on_change: Callable[[], None],
+        interval_ms: int = 2000,
+    ):
+        self.widget = widget
+        self.check = check
+        self.on_change = on_change
+        self.interval_ms = interval_ms
+        self.poll_count = 0
+        self.change_count = 0
+        self._after_id: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._after_id is not None
+
+    def start(self) -> None:
+        # interval_ms <= 0 disables polling.
+        if self._after_id is None and self.interval_ms > 0:
+            self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def stop(self) -> None:
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self) -> None:
+        self._after_id = None
+        self.poll_count += 1
+        try:
+            if self.check():
+                self.change_count += 1
+                self.on_change()
+        finally:
+            self.start()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from erp.presentation.ui_worker import UiWorker
+
+
+FetchPage = Callable[..., list[dict[str, str]]]
+FetchChanges = Callable[..., list[dict[str, str]]]
+
+
+def _row_key(row: dict[str, str]) -> tuple[str, int]:
+    return row["updated_at"], int(row["id"])
+
+
+def _row_values(row: dict[str, str]) -> tuple[str, ...]:
+    return (
+        row["id"],
+        row["version"],
+        row["updated_at"].replace("T", " ")[:19],
+        row["status"],
+        row["product_name"],
+        row.get("category_name", ""),
+        row["supplier_name"],
+        row.get("owner_user", "admin"),
+    )
+
+
+class HistoryTable:
+    """Paged, incrementally updated view of the quote history over a ttk.Treeview.
+
+    Rows are fetched one keyset page at a time as the user scrolls and at most
+    ``max_rows`` are kept in the widget; pages trimmed from one end are fetched
+    again when the user scrolls back to them. With ``fetch_changes`` and
+    ``fetch_change_seq`` (the quote change feed), :meth:`refresh_changes`
+    upserts only the rows saved since the last load.
+    """
+
+    def __init__(
+        self,
+        tree: Any,
+        worker: UiWorker,
+        fetch_page: FetchPage,
+        page_size: int = 200,
+        max_rows: int = 1000,
+        on_error: Callable[[Exception], None] | None = None,
+        fetch_changes: FetchChanges | None = None,
+        fetch_change_seq: Callable[[], int] | None = None,
+        changes_limit: int = 200,
+    ):
+        self.tree = tree
+        self.worker = worker
+        self.fetch_page = fetch_page
+        self.page_size = max(1, page_size)
+        self.max_rows = max(self.page_size * 2, max_rows)
+        self.on_error = on_error
+        self.fetch_changes = fetch_changes
+        self.fetch_change_seq = fetch_change_seq
+        self.changes_limit = max(1, changes_limit)
+        self.change_seq: int | None = None
+        self.filters: dict[str, str] | None = None
+        self.has_older = False
+        self.has_newer = False
+        self._keys: dict[str, tuple[str, int]] = {}
+        self._loading = False
+        self._changes_pending = False
+
+    @property
+    def row_count(self) -> int:
+        return len(self._keys)
+
+    def reload(self) -> None:
+        filters = self.filters
+        fetch_change_seq = self.fetch_change_seq
+
+        def load() -> tuple[int | None, list[dict[str, str]]]:
+            # Read the sequence first: a save landing in between is fetched twice, never missed.
+            seq = fetch_change_seq() if fetch_change_seq is not None else None
+            return seq, self.fetch_page(limit=self.page_size, filters=filters)
+
+        self._loading = True
+        self.worker.submit_read(
+            load,
+            on_success=self._on_first_page,
+            on_error=self._on_load_error,
+            channel="history",
+        )
+
+    def refresh_changes(self) -> None:
+        if self.fetch_changes is None:
+            return
+        if self._loading or self.change_seq is None:
+            # Applied once the page being loaded arrives.
+            self._changes_pending = True
+            return
+        seq, limit = self.change_seq, self.changes_limit
+        self.worker.submit_read(
+            lambda: self.fetch_changes(seq, limit=limit),
+            on_success=self._on_changes,
+            on_error=self._on_load_error,
+            channel="history-changes",
+        )
+
+    def on_scroll(self, first: float, last: float) -> None:
+        if self._loading or not self._keys:
+            return
+        if last >= 0.95 and self.has_older:
+            self._load_older()
+        elif first <= 0.0 and self.has_newer:
+            self._load_newer()
+
+    def upsert(self, row: dict[str, str]) -> None:
+        iid = row["id"]
+        if iid in self._keys:
+            self.tree.delete(iid)
+            del self._keys[iid]
+        if self.has_newer:
+            # The newest rows are not loaded; they are fetched when the user scrolls up.
+            return
+        self.tree.insert("", 0, iid=iid, values=_row_values(row))
+        self._keys[iid] = _row_key(row)
+        self._trim_bottom()
+
+    def _load_older(self) -> None:
+        children = self.tree.get_children()
+        before = self._keys[children[-1]]
+        filters = self.filters
+        self._loading = True
+        self.worker.submit_read(
+            lambda: self.fetch_page(limit=self.page_size, filters=filters, before=before),
+            on_success=self._on_older_page,
+            on_error=self._on_load_error,
+            channel="history",
+        )
+
+    def _load_newer(self) -> None:
+        children = self.tree.get_children()
+        after = self._keys[children[0]]
+        filters = self.filters
+        self._loading = True
+        self.worker.submit_read(
+            lambda: self.fetch_page(limit=self.page_size, filters=filters, after=after),
+            on_success=self._on_newer_page,
+            on_error=self._on_load_error,
+            channel="history",
+        )
+
+    def _on_first_page(self, loaded: tuple[int | None, list[dict[str, str]]]) -> None:
+        self._loading = False
+        self.change_seq, rows = loaded
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        for row in rows:
+            self._insert(row, "end")
+        self.has_older = len(rows) >= self.page_size
+        self.has_newer = False
+        self._apply_pending_changes()
+
+    def _on_older_page(self, rows: list[dict[str, str]]) -> None:
+        self._loading = False
+        for row in rows:
+            self._insert(row, "end")
+        self.has_older = len(rows) >= self.page_size
+        excess = self.row_count - self.max_rows
+        if excess > 0:
+            for iid in self.tree.get_children()[:excess]:
+                self._remove(iid)
+            self.has_newer = True
+        self._apply_pending_changes()
+
+    def _on_newer_page(self, rows: list[dict[str, str]]) -> None:
+        self._loading = False
+        for row in reversed(rows):
+            self._insert(row, 0)
+        self.has_newer = len(rows) >= self.page_size
+        self._trim_bottom()
+        self._apply_pending_changes()
+
+    def _on_changes(self, rows: list[dict[str, str]]) -> None:
+        if not rows or self.change_seq is None:
+            return
+        self.change_seq = max(self.change_seq, int(rows[-1]["seq"]))
+        # A filtered view cannot tell whether a changed row still matches, and a full
+        # batch may be followed by more; both fall back to reloading the first page.
+        if len(rows) >= self.changes_limit or any(value for value in (self.filters or {}).values()):
+            self.reload()
+            return
+        for row in rows:
+            self.upsert(row)
+
+    def _apply_pending_changes(self) -> None:
+        if self._changes_pending:
+            self._changes_pending = False
+            self.refresh_changes()
+
+    def _on_load_error(self, exc: Exception) -> None:
+        self._loading = False
+        if self.on_error is not None:
+            self.on_error(exc)
+
+    def _insert(self, row: dict[str, str], index: int | str) -> None:
+        iid = row["id"]
+        if iid in self._keys:
+            self._remove(iid)
+        self.tree.insert("", index, iid=iid, values=_row_values(row))
+        self._keys[iid] = _row_key(row)
+
+    def _remove(self, iid: str) -> None:
+        self.tree.delete(iid)
+        self._keys.pop(iid, None)
+
+    def _trim_bottom(self) -> None:
+        excess = self.row_count - self.max_rows
+        if excess <= 0:
+            return
+        for iid in self.tree.get_children()[-excess:]:
+            self._remove(iid)
+        self.has_older = True
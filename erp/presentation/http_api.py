@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from decimal import Decimal
+from http import HTTPStatus
+import json
+import re
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qsl, urlsplit
+
+from erp.application.quote_service import QuoteService
+from erp.domain.models import (
+    PricingResult,
+    PurchaseInput,
+    QuoteRecord,
+    SaleInput,
+    parse_decimal,
+    purchase_from_payload,
+    sale_from_payload,
+)
+from erp.domain.quote_merge import QuoteConflictError
+
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_ITEMS = 1000
+_QUOTE_PATH = re.compile(r"^/v1/quotes/(\d+)$")
+_QUOTE_VERSIONS_PATH = re.compile(r"^/v1/quotes/(\d+)/versions$")
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError("Invalid non-serializable value")
+
+
+def _require(payload: dict[str, Any], key: str) -> Any:
+    if key not in payload:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Campo obrigatorio ausente: {key}")
+    return payload[key]
+
+
+class PricingApi:
+    """Maps JSON requests onto QuoteService; engine and database calls run in an executor."""
+
+    def __init__(self, service: QuoteService, executor: ThreadPoolExecutor | None = None):
+        self.service = service
+        self.executor = executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix="erp-api")
+
+    async def handle(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = dict(parse_qsl(url.query))
+        payload = self._decode(body) if body else {}
+
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if method == "POST" and path == "/v1/pricing/from-margin":
+            return HTTPStatus.OK, await self._run(self._price_item, {**payload, "mode": "margin"})
+        if method == "POST" and path == "/v1/pricing/from-price":
+            return HTTPStatus.OK, await self._run(self._price_item, {**payload, "mode": "price"})
+        if method == "POST" and path == "/v1/pricing/batch":
+            return HTTPStatus.OK, await self._run(self._price_batch, payload)
+        if method == "GET" and path == "/v1/quotes":
+            return HTTPStatus.OK, await self._run(self._list_quotes, query)
+        if method == "POST" and path == "/v1/quotes":
+            return HTTPStatus.CREATED, await self._run(self._save_quote, payload, None)
+        if method == "GET" and path == "/v1/quotes/changes":
+            return HTTPStatus.OK, await self._run(self._list_changes, query)
+
+        match = _QUOTE_PATH.match(path)
+        if match and method == "GET":
+            return HTTPStatus.OK, await self._run(self._get_quote, int(match.group(1)))
+        if match and method == "PUT":
+            return HTTPStatus.OK, await self._run(self._save_quote, payload, int(match.group(1)))
+        match = _QUOTE_VERSIONS_PATH.match(path)
+        if match and method == "GET":
+            return HTTPStatus.OK, await self._run(self.service.list_quote_versions, int(match.group(1)))
+        raise ApiError(HTTPStatus.NOT_FOUND, "Rota nao encontrada.")
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    @staticmethod
+    def _decode(body: bytes) -> dict[str, Any]:
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "JSON invalido.") from exc
+        if not isinstance(payload, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON.")
+        return payload
+
+    def _price_item(self, item: dict[str, Any]) -> dict[str, Any]:
+        _purchase, _sale, result = self._compute(item)
+        return asdict(result)
+
+    def _compute(self, item: dict[str, Any]) -> tuple[PurchaseInput, SaleInput, PricingResult]:
+        try:
+            purchase = purchase_from_payload(_require(item, "purchase"))
+            sale = sale_from_payload(_require(item, "sale"))
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Entrada de precificacao invalida: {exc}") from exc
+
+        try:
+            if item.get("mode") == "price":
+                result = self.service.calculate_from_price(
+                    purchase, sale, parse_decimal(_require(item, "sale_price"))
+                )
+            else:
+                result = self.service.calculate_from_margin(
+                    purchase, sale, parse_decimal(_require(item, "margin_pct"))
+                )
+            if "rounding_strategy" in item or "min_sale_price" in item:
+                result = self.service.apply_business_rules(
+                    purchase,
+                    sale,
+                    result,
+                    rounding_strategy=str(item.get("rounding_strategy") or "NORMAL"),
+                    min_sale_price=parse_decimal(item.get("min_sale_price")),
+                )
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.UNPROCESSABLE_ENTITY, str(exc)) from exc
+        return purchase, sale, result
+
+    def _price_batch(self, payload: dict[str, Any]) -> dict[str, Any]:
+        items = _require(payload, "items")
+        if not isinstance(items, list) or len(items) > MAX_BATCH_ITEMS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Envie uma lista com ate {MAX_BATCH_ITEMS} itens.")
+        results = []
+        for item in items:
+            try:
+                results.append({"ok": True, "result": self._price_item(item)})
+            except ApiError as exc:
+                results.append({"ok": False, "error": exc.message})
+        return {"results": results}
+
+    def _list_quotes(self, query: dict[str, str]) -> list[dict[str, str]]:
+        try:
+            limit = int(query.pop("limit", "200"))
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Parametro limit invalido.") from exc
+        return self.service.list_recent_quotes(limit=limit, filters=query)
+
+    def _list_changes(self, query: dict[str, str]) -> dict[str, Any]:
+        try:
+            since = int(query.get("since", "0"))
+            limit = int(query.get("limit", "500"))
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Parametro since/limit invalido.") from exc
+        changes = self.service.changes_since(since, limit=limit)
+        return {"seq": int(changes[-1]["seq"]) if changes else since, "changes": changes}
+
+    def _get_quote(self, quote_id: int) -> dict[str, Any]:
+        try:
+            return asdict(self.service.get_quote(quote_id))
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.NOT_FOUND, str(exc)) from exc
+
+    def _save_quote(self, payload: dict[str, Any], quote_id: int | None) -> dict[str, Any]:
+        item = {**payload, "mode": "price" if "sale_price" in payload else "margin"}
+        purchase, sale, result = self._compute(item)
+        try:
+            # An update must say which version it edits; a new quote starts at 1.
+            version = int(_require(payload, "version") if quote_id is not None else payload.get("version", 1))
+        except (TypeError, ValueError) as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Campo version invalido.") from exc
+        if quote_id is not None:
+            self._get_quote(quote_id)
+        quote = QuoteRecord(
+            quote_id=quote_id,
+            version=version,
+            status=str(payload.get("status") or "RASCUNHO").strip().upper(),
+            product_name=str(_require(payload, "product_name")).strip(),
+            category_name=str(payload.get("category_name") or "").strip(),
+            supplier_name=str(_require(payload, "supplier_name")).strip(),
+            owner_user=str(payload.get("owner_user") or "api").strip(),
+            notes=str(payload.get("notes") or ""),
+            purchase=purchase,
+            sale=sale,
+            result=result,
+        )
+        try:
+            return asdict(self.service.save_quote(quote))
+        except QuoteConflictError as exc:
+            raise ApiError(HTTPStatus.CONFLICT, str(exc)) from exc
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(exc)) from exc
+
+
+class PricingHttpServer:
+    """Minimal HTTP/1.1 server (keep-alive, Content-Length bodies) on asyncio streams."""
+
+    def __init__(self, api: PricingApi, host: str = "127.0.0.1", port: int = 8765):
+        self.api = api
+        self.host = host
+        self.port = port
+        self._server: asyncio.base_events.Server | None = None
+        self._connections: set[asyncio.Task] = set()
+        self.connections_accepted = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        # Idle keep-alive connections would otherwise be left waiting on a read.
+        connections = list(self._connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self.connections_accepted += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                status, payload = await self._dispatch(self.api.handle, method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ApiError as exc:
+            self._write_response(writer, exc.status, {"error": exc.message}, keep_alive=False)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _dispatch(
+        handler: Callable[[str, str, bytes], Awaitable[tuple[HTTPStatus, Any]]],
+        method: str,
+        target: str,
+        body: bytes,
+    ) -> tuple[HTTPStatus, Any]:
+        try:
+            return await handler(method, target, body)
+        except ApiError as exc:
+            return exc.status, {"error": exc.message}
+        except Exception:
+            # The exception text may expose internals (paths, SQL); keep it out of the response.
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Erro interno."}
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, str, str, dict[str, str], bytes] | None:
+        request_line = await PricingHttpServer._readline(
+            reader, HTTPStatus.BAD_REQUEST, "Linha de requisicao muito longa."
+        )
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Linha de requisicao invalida.") from exc
+
+        headers: dict[str, str] = {}
+        while True:
+            line = await PricingHttpServer._readline(
+                reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Cabecalho muito grande."
+            )
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length invalido.") from exc
+        if length < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length invalido.")
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisicao muito grande.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version.upper(), headers, body
+
+    @staticmethod
+    async def _readline(reader: asyncio.StreamReader, status: HTTPStatus, message: str) -> bytes:
+        try:
+            return await reader.readline()
+        except ValueError as exc:
+            # readline() reports a line longer than the stream limit as ValueError.
+            raise ApiError(status, message) from exc
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+def run_server(service: QuoteService, host: str = "127.0.0.1", port: int = 8765, workers: int = 4) -> None:
+    api = PricingApi(service, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="erp-api"))
+    server = PricingHttpServer(api, host=host, port=port)
+
+    async def main() -> None:
+        await server.start()
+        print(f"API de precos em http://{server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
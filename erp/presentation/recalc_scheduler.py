@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+
+class RecalcScheduler:
+    """Coalesces bursts of change notifications into one deferred recalculation."""
+
+    def __init__(self, widget: Any, callback: Callable[[], None], delay_ms: int = 40):
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = max(0, delay_ms)
+        self.request_count = 0
+        self.run_count = 0
+        self._after_id: str | None = None
+
+    @property
+    def pending(self) -> bool:
+        return self._after_id is not None
+
+    def request(self) -> None:
+        self.request_count += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+
+    def flush(self) -> None:
+        if self._after_id is None:
+            return
+        self.widget.after_cancel(self._after_id)
+        self._fire()
+
+    def cancel(self) -> None:
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self) -> None:
+        self._after_id = None
+        self.run_count += 1
+        self.callback()
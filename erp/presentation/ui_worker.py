@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import queue
+from typing import Any, Callable
+
+
+class UiWorker:
+    """Runs blocking calls off the Tk thread and delivers results back through after().
+
+    Reads use a small pool and writes a single thread; a newer request on the same
+    channel makes the older one stale and its result is dropped.
+    """
+
+    def __init__(self, widget: Any, read_workers: int = 2, poll_ms: int = 25):
+        self.widget = widget
+        self.poll_ms = max(1, poll_ms)
+        self._readers = ThreadPoolExecutor(max_workers=max(1, read_workers), thread_name_prefix="erp-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="erp-write")
+        self._results: queue.SimpleQueue[tuple[Callable[[], None], str | None, int]] = queue.SimpleQueue()
+        self._generations: dict[str, int] = {}
+        self._in_flight = 0
+        self._poll_id: str | None = None
+        self._closed = False
+        self.on_busy_change: Callable[[bool], None] | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._in_flight > 0
+
+    def submit_read(
+        self,
+        func: Callable[[], Any],
+        on_success: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None = None,
+        channel: str | None = None,
+    ) -> Future:
+        return self._submit(self._readers, func, on_success, on_error, channel)
+
+    def submit_write(
+        self,
+        func: Callable[[], Any],
+        on_success: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None = None,
+        channel: str | None = None,
+    ) -> Future:
+        return self._submit(self._writer, func, on_success, on_error, channel)
+
+    def cancel(self, channel: str) -> None:
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+
+    def shutdown(self) -> None:
+        self._closed = True
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)
+
+    def _submit(
+        self,
+        executor: ThreadPoolExecutor,
+        func: Callable[[], Any],
+        on_success: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None,
+        channel: str | None,
+    ) -> Future:
+        generation = 0
+        if channel is not None:
+            self.cancel(channel)
+            generation = self._generations[channel]
+
+        def run() -> None:
+            if channel is not None and self._generations.get(channel) != generation:
+                self._results.put((lambda: None, channel, generation))
+                return
+            try:
+                value = func()
+            except Exception as exc:
+                error = exc
+                self._results.put((lambda: on_error(error) if on_error else None, channel, generation))
+                return
+            self._results.put((lambda: on_success(value), channel, generation))
+
+        self._in_flight += 1
+        if self._in_flight == 1:
+            self._notify_busy()
+        self._schedule_poll()
+        return executor.submit(run)
+
+    def _schedule_poll(self) -> None:
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.widget.after(self.poll_ms, self._drain)
+
+    def _drain(self) -> None:
+        self._poll_id = None
+        while True:
+            try:
+                deliver, channel, generation = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if channel is None or self._generations.get(channel) == generation:
+                deliver()
+        if self._in_flight > 0:
+            self._schedule_poll()
+        else:
+            self._notify_busy()
+
+    def _notify_busy(self) -> None:
+        if self.on_busy_change is not None:
+            self.on_busy_change(self.busy)
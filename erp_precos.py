@@ -1,16 +1,22 @@
 ﻿from __future__ import annotations
 
 from decimal import Decimal
+import os
 from pathlib import Path
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 
 import customtkinter as ctk
 
 from erp.application.quote_service import QuoteService
 from erp.domain.models import PurchaseInput, QuoteRecord, SaleInput, parse_decimal
 from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.change_watcher import DataVersionWatcher
 from erp.infrastructure.database import Database
-from erp.infrastructure.quote_repository import QuoteRepository
+from erp.infrastructure.quote_repository import QuoteRepository, quote_summary
+from erp.presentation.change_poller import ChangePoller
+from erp.presentation.history_table import HistoryTable
+from erp.presentation.recalc_scheduler import RecalcScheduler
+from erp.presentation.ui_worker import UiWorker
 
 
 class PricingERPApp(ctk.CTk):
@@ -33,22 +39,61 @@ class PricingERPApp(ctk.CTk):
         self._suspend_auto_updates = False
         self._updating_from_price = False
         self._updating_from_margin = False
+        self._calc_error = False
+        self._last_calc_key = None
+        self.engine_call_count = 0
+        self._saving = False
+        self._diagnostics_window = None
 
+        self.worker = UiWorker(self)
         self._build_ui()
+        self.recalc_scheduler = RecalcScheduler(self, self.recalculate_all)
+        # Saves by other instances on the same database show up without F5.
+        # ERP_WATCH_MS sets the poll interval (0 turns it off).
+        self.change_watcher = DataVersionWatcher(self.database)
+        self.change_poller = ChangePoller(
+            self,
+            self.change_watcher.changed,
+            self.history_table.refresh_changes,
+            interval_ms=int(os.environ.get("ERP_WATCH_MS", "2000")),
+        )
+        self.worker.on_busy_change = self._on_worker_busy
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self._bind_events()
         self._load_defaults()
         self._sync_markup_state()
         self.recalculate_all()
-        self.refresh_history()
         self._set_quote_info()
+        # Paint the window first; schema checks and history loading run afterwards.
+        self.after_idle(self._deferred_startup)
 
     def _build_service(self) -> QuoteService:
         database_path = Path("data") / "erp_comercial.db"
-        database = Database(str(database_path))
-        database.initialize()
-        repository = QuoteRepository(database)
+        profiler = None
+        # ERP_SLOW_SQL_MS=50 logs SQL slower than 50 ms, with its query plan, to data/sql_lento.jsonl.
+        if os.environ.get("ERP_SLOW_SQL_MS"):
+            from erp.infrastructure.query_profiler import QueryProfiler
+
+            profiler = QueryProfiler(
+                threshold_ms=float(os.environ["ERP_SLOW_SQL_MS"]),
+                log_path=database_path.parent / "sql_lento.jsonl",
+            )
+        self.database = Database(str(database_path), profiler=profiler)
+        repository = QuoteRepository(self.database)
         return QuoteService(pricing_engine=PricingEngine(), repository=repository)
 
+    def _deferred_startup(self):
+        # Runs on the single writer thread, so any save queued meanwhile waits for the schema.
+        self.worker.submit_write(
+            self.database.initialize,
+            on_success=lambda _result: self._on_database_ready(),
+            on_error=lambda exc: messagebox.showerror("Erro ao abrir banco de dados", str(exc)),
+        )
+
+    def _on_database_ready(self):
+        self.refresh_history()
+        self.change_poller.start()
+
     def _build_ui(self):
         shell = ctk.CTkFrame(self, corner_radius=0, fg_color="#eef2f7")
         shell.pack(fill="both", expand=True)
@@ -81,7 +126,7 @@ class PricingERPApp(ctk.CTk):
 
         ctk.CTkLabel(
             header,
-            text="Atalhos: Ctrl+S salvar | Ctrl+N nova | F5 atualizar",
+            text="Atalhos: Ctrl+S salvar | Ctrl+N nova | F5 atualizar | F12 diagnostico",
             text_color="#cbd5e1",
             font=ctk.CTkFont(size=12),
         ).pack(side="right", padx=20, pady=24)
@@ -369,8 +414,11 @@ class PricingERPApp(ctk.CTk):
             font=ctk.CTkFont(size=18, weight="bold"),
         ).grid(row=0, column=0, sticky="w", padx=14, pady=(12, 6))
 
+        self.history_status_label = ctk.CTkLabel(panel, text="", text_color="#64748b")
+        self.history_status_label.grid(row=0, column=1, sticky="e", padx=14, pady=(12, 6))
+
         table_wrap = ctk.CTkFrame(panel, fg_color="#f8fafc", corner_radius=10)
-        table_wrap.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        table_wrap.grid(row=1, column=0, columnspan=2, sticky="nsew", padx=10, pady=(0, 10))
         table_wrap.grid_columnconfigure(0, weight=1)
         table_wrap.grid_rowconfigure(0, weight=1)
 
@@ -399,7 +447,17 @@ class PricingERPApp(ctk.CTk):
         self.history_tree.column("owner", width=110, anchor="w")
 
         scroll = ttk.Scrollbar(table_wrap, orient="vertical", command=self.history_tree.yview)
-        self.history_tree.configure(yscrollcommand=scroll.set)
+        self.history_tree.configure(
+            yscrollcommand=lambda first, last: self._on_history_scroll(scroll, first, last)
+        )
+        self.history_table = HistoryTable(
+            self.history_tree,
+            self.worker,
+            fetch_page=self.service.list_recent_quotes,
+            fetch_changes=self.service.changes_since,
+            fetch_change_seq=self.service.change_seq,
+            on_error=lambda exc: messagebox.showerror("Erro ao carregar historico", str(exc)),
+        )
 
         self.history_tree.grid(row=0, column=0, sticky="nsew", padx=(8, 0), pady=8)
         scroll.grid(row=0, column=1, sticky="ns", padx=(0, 8), pady=8)
@@ -430,7 +488,7 @@ class PricingERPApp(ctk.CTk):
             self.aplica_acrescimo_var,
         ]
         for var in vars_to_watch:
-            var.trace_add("write", lambda *_: self.recalculate_all())
+            var.trace_add("write", lambda *_: self._request_recalculation())
 
         self.aplica_acrescimo_var.trace_add("write", lambda *_: self._sync_markup_state())
         self.margem_cld_var.trace_add("write", lambda *_: self._on_margin_change())
@@ -439,6 +497,7 @@ class PricingERPApp(ctk.CTk):
         self.bind_all("<Control-s>", lambda _e: self.save_quote())
         self.bind_all("<Control-n>", lambda _e: self.new_quote())
         self.bind_all("<F5>", lambda _e: self.refresh_history())
+        self.bind_all("<F12>", lambda _e: self.open_diagnostics())
 
     def _load_defaults(self):
         self.status_var.set("RASCUNHO")
@@ -460,7 +519,7 @@ class PricingERPApp(ctk.CTk):
             var.set(f"{parse_decimal(var.get()):.2f}")
         finally:
             self._suspend_auto_updates = False
-        self.recalculate_all()
+        self._request_recalculation()
 
     def _format_percent_var(self, var: ctk.StringVar):
         if self._suspend_auto_updates:
@@ -470,9 +529,10 @@ class PricingERPApp(ctk.CTk):
             var.set(f"{parse_decimal(var.get()):.2f}")
         finally:
             self._suspend_auto_updates = False
-        self.recalculate_all()
+        self._request_recalculation()
 
     def _set_calc_status(self, text: str, is_error: bool = False):
+        self._calc_error = is_error
         color = "#b91c1c" if is_error else "#64748b"
         self.calc_status_label.configure(text=text, text_color=color)
 
@@ -505,6 +565,8 @@ class PricingERPApp(ctk.CTk):
         )
 
     def _render_result(self, result):
+        if result == self.last_result and not self._calc_error:
+            return
         self.last_result = result
         margem_liquida_venda = Decimal("0")
         if result.sale_price > Decimal("0"):
@@ -543,7 +605,12 @@ class PricingERPApp(ctk.CTk):
             sale = self._collect_sale_input()
             margin_pct = parse_decimal(self.margem_cld_var.get())
 
+            calc_key = ("margin", purchase, sale, margin_pct)
+            if calc_key == self._last_calc_key and not show_errors:
+                return
+            self.engine_call_count += 1
             result = self.service.calculate_from_margin(purchase, sale, margin_pct)
+            self._last_calc_key = calc_key
 
             self._updating_from_margin = True
             self.preco_venda_var.set(f"{result.sale_price:.2f}")
@@ -562,7 +629,12 @@ class PricingERPApp(ctk.CTk):
             sale = self._collect_sale_input()
             sale_price = parse_decimal(self.preco_venda_var.get())
 
+            calc_key = ("price", purchase, sale, sale_price)
+            if calc_key == self._last_calc_key and not show_errors:
+                return
+            self.engine_call_count += 1
             result = self.service.calculate_from_price(purchase, sale, sale_price)
+            self._last_calc_key = calc_key
 
             self._updating_from_price = True
             self.margem_cld_var.set(f"{result.margin_pct:.2f}")
@@ -579,13 +651,18 @@ class PricingERPApp(ctk.CTk):
         if self._suspend_auto_updates or self._updating_from_price:
             return
         self.last_driver = "margin"
-        self.calculate_price_from_margin(show_errors=False)
+        self.recalc_scheduler.request()
 
     def _on_price_change(self):
         if self._suspend_auto_updates or self._updating_from_margin:
             return
         self.last_driver = "price"
-        self.calculate_margin_from_price(show_errors=False)
+        self.recalc_scheduler.request()
+
+    def _request_recalculation(self):
+        if self._suspend_auto_updates:
+            return
+        self.recalc_scheduler.request()
 
     def recalculate_all(self):
         if self._suspend_auto_updates:
@@ -604,6 +681,9 @@ class PricingERPApp(ctk.CTk):
         )
 
     def save_quote(self):
+        if self._saving:
+            return
+        self.recalc_scheduler.flush()
         if self.last_result is None:
             self.recalculate_all()
         if self.last_result is None:
@@ -624,19 +704,35 @@ class PricingERPApp(ctk.CTk):
             result=self.last_result,
         )
 
-        try:
-            saved = self.service.save_quote(quote)
-        except Exception as exc:
-            messagebox.showerror("Erro ao salvar", str(exc))
-            return
+        self._saving = True
+        self.worker.submit_write(
+            lambda: self.service.save_quote(quote),
+            # A version jump of more than one means another user's edits were merged in.
+            on_success=lambda saved: self._on_quote_saved(
+                saved, merged=quote.quote_id is not None and saved.version > quote.version + 1
+            ),
+            on_error=self._on_save_failed,
+        )
 
+    def _on_quote_saved(self, saved: QuoteRecord, merged: bool = False):
+        self._saving = False
         self.current_quote_id = saved.quote_id
         self.current_quote_version = saved.version
         self.status_var.set(saved.status)
         self._set_quote_info()
-        self.refresh_history()
+        self.history_table.upsert(quote_summary(saved))
+        if merged:
+            self._apply_loaded_quote(saved)
+            messagebox.showinfo(
+                "Sucesso", "Cotacao salva. Alteracoes feitas por outro usuario foram mescladas."
+            )
+            return
         messagebox.showinfo("Sucesso", "Cotacao salva com sucesso.")
 
+    def _on_save_failed(self, exc: Exception):
+        self._saving = False
+        messagebox.showerror("Erro ao salvar", str(exc))
+
     def new_quote(self):
         self._suspend_auto_updates = True
         try:
@@ -673,26 +769,11 @@ class PricingERPApp(ctk.CTk):
         self._set_quote_info()
 
     def refresh_history(self):
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
-        for row in self.service.list_recent_quotes(limit=300):
-            updated = row["updated_at"].replace("T", " ")[:19]
-            self.history_tree.insert(
-                "",
-                "end",
-                iid=row["id"],
-                values=(
-                    row["id"],
-                    row["version"],
-                    updated,
-                    row["status"],
-                    row["product_name"],
-                    row.get("category_name", ""),
-                    row["supplier_name"],
-                    row.get("owner_user", "admin"),
-                ),
-            )
+        self.history_table.reload()
+
+    def _on_history_scroll(self, scroll: ttk.Scrollbar, first: str, last: str):
+        scroll.set(first, last)
+        self.history_table.on_scroll(float(first), float(last))
 
     def _on_history_double_click(self, _event):
         selected = self.history_tree.focus()
@@ -700,12 +781,14 @@ class PricingERPApp(ctk.CTk):
             return
 
         quote_id = int(selected)
-        try:
-            quote = self.service.get_quote(quote_id)
-        except Exception as exc:
-            messagebox.showerror("Erro", str(exc))
-            return
+        self.worker.submit_read(
+            lambda: self.service.get_quote(quote_id),
+            on_success=self._apply_loaded_quote,
+            on_error=lambda exc: messagebox.showerror("Erro", str(exc)),
+            channel="load_quote",
+        )
 
+    def _apply_loaded_quote(self, quote: QuoteRecord):
         self._suspend_auto_updates = True
         try:
             self.current_quote_id = quote.quote_id
@@ -737,12 +820,86 @@ class PricingERPApp(ctk.CTk):
         finally:
             self._suspend_auto_updates = False
 
+        self.recalc_scheduler.cancel()
         self.last_driver = "margin"
         self._render_result(quote.result)
         self._set_quote_info()
 
+    def open_diagnostics(self):
+        if self._diagnostics_window is not None and self._diagnostics_window.winfo_exists():
+            self._diagnostics_window.focus()
+            return
+        # Imported on demand: the instrumentation module is not part of the startup path.
+        from erp.infrastructure.instrumentation import INSTRUMENTATION
+
+        window = ctk.CTkToplevel(self)
+        window.title("Diagnostico de desempenho")
+        window.geometry("980x560")
+        self._diagnostics_window = window
+
+        text = ctk.CTkTextbox(window, font=ctk.CTkFont(family="Consolas", size=12), wrap="none")
+        toggle_var = ctk.StringVar()
+
+        def render():
+            toggle_var.set("Desativar" if INSTRUMENTATION.enabled else "Ativar")
+            text.configure(state="normal")
+            text.delete("1.0", "end")
+            report = INSTRUMENTATION.report()
+            if self.database.profiler is not None:
+                report += "\n\n" + self.database.profiler.report()
+            text.insert("1.0", report)
+            text.configure(state="disabled")
+
+        def toggle():
+            if INSTRUMENTATION.enabled:
+                INSTRUMENTATION.disable()
+            else:
+                INSTRUMENTATION.enable()
+            render()
+
+        def reset():
+            INSTRUMENTATION.reset()
+            if self.database.profiler is not None:
+                self.database.profiler.reset()
+            render()
+
+        def save():
+            path = filedialog.asksaveasfilename(
+                parent=window,
+                defaultextension=".json",
+                filetypes=[("JSON", "*.json")],
+                initialfile="diagnostico_erp.json",
+            )
+            if path:
+                INSTRUMENTATION.dump(path)
+                messagebox.showinfo("Diagnostico", f"Medicoes gravadas em {path}", parent=window)
+
+        buttons = ctk.CTkFrame(window, fg_color="transparent")
+        buttons.pack(fill="x", padx=12, pady=(12, 0))
+        ctk.CTkButton(buttons, textvariable=toggle_var, command=toggle, width=110).pack(side="left", padx=4)
+        ctk.CTkButton(buttons, text="Atualizar", command=render, width=110).pack(side="left", padx=4)
+        ctk.CTkButton(buttons, text="Limpar", command=reset, width=110).pack(side="left", padx=4)
+        ctk.CTkButton(buttons, text="Salvar em arquivo", command=save, width=150).pack(side="left", padx=4)
+        text.pack(fill="both", expand=True, padx=12, pady=12)
+        render()
+
+    def _on_worker_busy(self, busy: bool):
+        self.history_status_label.configure(text="Carregando..." if busy else "")
+
+    def _on_close(self):
+        self.recalc_scheduler.cancel()
+        self.change_poller.stop()
+        self.worker.shutdown()
+        self.change_watcher.close()
+        self.destroy()
+
 
 def main():
+    # ERP_INSTRUMENT=1 measures from startup; otherwise enable it in the F12 window.
+    if os.environ.get("ERP_INSTRUMENT"):
+        from erp.infrastructure.instrumentation import INSTRUMENTATION
+
+        INSTRUMENTATION.enable()
     app = PricingERPApp()
     app.mainloop()
 
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from pathlib import Path
+import tempfile
+import unittest
+
+from erp.domain.models import PurchaseInput, QuoteRecord, SaleInput
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+
+
+def build_quote(product_name="Produto", supplier_name="Fornecedor", base_price="100", margin="25", **overrides):
+    purchase = PurchaseInput(
+        base_price=Decimal(base_price),
+        ipi_rate_pct=Decimal("5"),
+        st_rate_pct=Decimal("0"),
+        icms_rate_pct=Decimal("18"),
+        pis_rate_pct=Decimal("1.65"),
+        cofins_rate_pct=Decimal("7.6"),
+        credit_icms=True,
+        credit_pis=True,
+        credit_cofins=True,
+    )
+    sale = SaleInput(
+        pis_rate_pct=Decimal("1.65"),
+        cofins_rate_pct=Decimal("7.6"),
+        icms_rate_pct=Decimal("18"),
+    )
+    fields = dict(
+        quote_id=None,
+        version=1,
+        status="RASCUNHO",
+        product_name=product_name,
+        category_name="Geral",
+        supplier_name=supplier_name,
+        owner_user="admin",
+        notes="",
+        purchase=purchase,
+        sale=sale,
+        result=PricingEngine().calculate_from_margin(purchase, sale, Decimal(margin)),
+    )
+    fields.update(overrides)
+    return QuoteRecord(**fields)
+
+
+class RepositoryFixture(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = Database(str(Path(self.tmp.name) / "erp.db"))
+        self.database.initialize()
+        self.repository = QuoteRepository(self.database)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class FakeWidget:
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, _delay_ms, func):
+        self.next_id += 1
+        job_id = f"after#{self.next_id}"
+        self.jobs[job_id] = func
+        return job_id
+
+    def after_cancel(self, job_id):
+        self.jobs.pop(job_id, None)
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for func in jobs.values():
+            func()
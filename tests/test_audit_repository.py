@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+import unittest
+
+from erp.infrastructure.audit_chain import AuditChainVerifier
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository, archive_table_name
+from erp.infrastructure.database import AUDIT_CHAIN_START_KEY, SCHEMA_VERSION, Database
+
+
+class AuditRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = Database(str(Path(self.tmp.name) / "erp.db"))
+        self.database.initialize()
+        self.repository = AuditRepository(self.database)
+        self.now = datetime(2026, 6, 15, 12, 0, tzinfo=timezone.utc)
+        events = []
+        for day in range(0, 200, 5):
+            created = (self.now - timedelta(days=day)).isoformat()
+            user = "ana" if day % 10 == 0 else "bruno"
+            events.append(AuditEvent(user, "SAVE", "quote", str(day), "", created_at=created))
+        self.repository.log_many(events)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _all_pages(self, filters=None, limit=7):
+        rows, cursor = self.repository.query(filters=filters, limit=limit)
+        while cursor:
+            page, cursor = self.repository.query(filters=filters, cursor=cursor, limit=limit)
+            rows.extend(page)
+        return rows
+
+    def test_archive_moves_old_rows_into_monthly_tables(self):
+        moved = self.repository.archive_older_than(90, now=self.now)
+
+        self.assertEqual(sum(moved.values()), 21)
+        self.assertEqual(self.repository.list_archive_months(), sorted(moved))
+        self.assertEqual(len(self.repository.list_recent(limit=1000)), 19)
+
+    def test_keyset_pages_span_live_and_archived_rows_in_order(self):
+        before = self._all_pages()
+        self.repository.archive_older_than(90, now=self.now)
+        after = self._all_pages()
+
+        self.assertEqual(len(after), 40)
+        self.assertEqual([row["id"] for row in after], [row["id"] for row in before])
+        stamps = [row["created_at"] for row in after]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+
+    def test_query_filters_by_user_across_archive(self):
+        self.repository.archive_older_than(30, now=self.now)
+        rows = self._all_pages(filters={"username": "ana"}, limit=3)
+
+        self.assertEqual(len(rows), 20)
+        self.assertTrue(all(row["username"] == "ana" for row in rows))
+
+    def test_date_to_includes_the_whole_last_day(self):
+        self.repository.log_many([
+            AuditEvent("ana", "SAVE", "quote", "tarde", "", created_at="2026-06-16T23:59:59.750000+00:00"),
+            AuditEvent("ana", "SAVE", "quote", "seguinte", "", created_at="2026-06-17T00:00:00+00:00"),
+        ])
+        rows, _ = self.repository.query(filters={"date_from": "2026-06-15", "date_to": "2026-06-16"})
+
+        self.assertEqual([row["entity_id"] for row in rows], ["tarde", "0"])
+        with self.assertRaises(ValueError):
+            self.repository.query(filters={"date_to": "16/06/2026"})
+        with self.assertRaises(ValueError):
+            self.repository.query(filters={"date_from": "2026-06-15' OR 1=1"})
+
+    def test_archive_tables_carry_no_redundant_keyset_index(self):
+        self.repository.archive_older_than(90, now=self.now)
+        with self.database.connect() as conn:
+            indexes = [
+                row["name"]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_audit%'")
+            ]
+
+        self.assertFalse([name for name in indexes if name.endswith("_keyset")])
+        for month in self.repository.list_archive_months():
+            self.assertIn(f"idx_{archive_table_name(month)}_created", indexes)
+
+    def test_chain_continues_from_the_archive_when_live_table_is_empty(self):
+        self.repository.archive_older_than(1, now=self.now + timedelta(days=30))
+        self.assertEqual(self.repository.list_recent(limit=10), [])
+
+        self.repository.log("ana", "LOGIN", "user", "ana", "")
+
+        self.assertTrue(AuditChainVerifier(self.repository).verify(full=True).ok)
+
+    def test_chain_verifies_incrementally_across_archive(self):
+        verifier = AuditChainVerifier(self.repository)
+        first = verifier.verify()
+        self.assertTrue(first.ok)
+        self.assertEqual(first.checked_rows, 40)
+
+        self.repository.archive_older_than(90, now=self.now)
+        self.repository.log("ana", "LOGIN", "user", "ana", "")
+        second = verifier.verify()
+        self.assertTrue(second.ok)
+        self.assertEqual(second.checked_rows, 1)
+        self.assertTrue(verifier.verify(full=True).ok)
+
+    def test_chain_detects_edited_row(self):
+        with self.database.connect() as conn:
+            conn.execute("UPDATE audit_logs SET details = 'alterado' WHERE entity_id = '50'")
+
+        result = AuditChainVerifier(self.repository).verify()
+
+        self.assertFalse(result.ok)
+        self.assertIsNotNone(result.broken_id)
+
+    def test_blanking_the_whole_chain_is_detected(self):
+        self.repository.archive_older_than(90, now=self.now)
+        with self.database.connect() as conn:
+            for table in ["audit_logs", *(archive_table_name(month) for month in self.repository.list_archive_months())]:
+                conn.execute(f"UPDATE {table} SET details = 'alterado', prev_hash = '', entry_hash = ''")
+
+        result = AuditChainVerifier(self.repository).verify(full=True)
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.checked_rows, 0)
+
+    def test_rows_older_than_the_chain_are_skipped(self):
+        database = Database(str(Path(self.tmp.name) / "legado.db"))
+        database.initialize()
+        with database.connect() as conn:
+            conn.execute("DELETE FROM app_settings WHERE key = ?", (AUDIT_CHAIN_START_KEY,))
+            conn.executemany(
+                "INSERT INTO audit_logs (username, action, entity_type, entity_id, details, created_at)"
+                " VALUES ('ana', 'SAVE', 'quote', ?, '', '2026-01-01T00:00:00+00:00')",
+                [(str(idx),) for idx in range(3)],
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+        database.initialize()
+        repository = AuditRepository(database)
+        repository.log("ana", "LOGIN", "user", "ana", "")
+        repository.log("ana", "LOGOUT", "user", "ana", "")
+
+        result = AuditChainVerifier(repository).verify(full=True)
+
+        self.assertTrue(result.ok)
+        self.assertEqual((result.checked_rows, result.last_id), (2, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+from pathlib import Path
+import tempfile
+import threading
+import time
+import unittest
+
+from erp.infrastructure.audit_repository import AuditRepository
+from erp.infrastructure.audit_writer import AuditWriter
+from erp.infrastructure.database import Database
+
+
+class AuditWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = Database(str(Path(self.tmp.name) / "erp.db"))
+        self.database.initialize()
+        self.repository = AuditRepository(self.database)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_batches_events_by_size(self):
+        writer = AuditWriter(self.repository, batch_size=10, flush_interval=60)
+        with writer:
+            for idx in range(25):
+                writer.log("admin", "SAVE", "quote", str(idx), "")
+            self.assertTrue(writer.flush(timeout=5))
+            self.assertEqual(len(self.repository.list_recent(limit=100)), 25)
+        self.assertEqual(writer.written_count, 25)
+        self.assertLessEqual(writer.batch_count, 3)
+
+    def test_close_flushes_pending_events(self):
+        writer = AuditWriter(self.repository, batch_size=1000, flush_interval=60)
+        for idx in range(5):
+            writer.log("admin", "SAVE", "quote", str(idx), "")
+        writer.close()
+
+        self.assertEqual(len(self.repository.list_recent()), 5)
+        with self.assertRaises(RuntimeError):
+            writer.log("admin", "SAVE", "quote", "6", "")
+
+    def test_time_trigger_flushes_without_explicit_flush(self):
+        writer = AuditWriter(self.repository, batch_size=1000, flush_interval=0.05)
+        with writer:
+            writer.log("admin", "LOGIN", "user", "admin", "")
+            for _ in range(100):
+                if writer.written_count:
+                    break
+                time.sleep(0.02)
+            self.assertEqual(writer.written_count, 1)
+
+    def test_full_queue_keeps_event_order_while_writes_fail(self):
+        repository = FlakyRepository(self.repository, failures=3)
+        writer = AuditWriter(repository, batch_size=2, flush_interval=0.05, max_queue_size=2, put_timeout=5)
+        with writer:
+            for idx in range(20):
+                writer.log("admin", "SAVE", "quote", str(idx), "")
+            self.assertTrue(writer.flush(timeout=5))
+
+        with self.database.connect() as conn:
+            rows = conn.execute("SELECT entity_id FROM audit_logs ORDER BY id").fetchall()
+        self.assertEqual([row["entity_id"] for row in rows], [str(idx) for idx in range(20)])
+        self.assertEqual(repository.calls, writer.batch_count + 3)
+
+    def test_flush_reports_failed_writes(self):
+        repository = FlakyRepository(self.repository, failures=1000)
+        writer = AuditWriter(repository, batch_size=1000, flush_interval=0.01)
+        writer.log("admin", "SAVE", "quote", "1", "")
+
+        self.assertFalse(writer.flush(timeout=5))
+        self.assertIsInstance(writer.last_error, OSError)
+        repository.failures = 0
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close()
+        self.assertEqual(len(self.repository.list_recent()), 1)
+
+    def test_full_queue_drops_after_put_timeout_and_reports_it(self):
+        repository = BlockingRepository(self.repository)
+        writer = AuditWriter(repository, batch_size=1, flush_interval=0.01, max_queue_size=1, put_timeout=0.05)
+        self.assertTrue(writer.log("admin", "SAVE", "quote", "1", ""))
+        self.assertTrue(repository.entered.wait(5))
+        self.assertTrue(writer.log("admin", "SAVE", "quote", "2", ""))
+
+        started = time.monotonic()
+        self.assertFalse(writer.log("admin", "SAVE", "quote", "3", ""))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(writer.dropped_count, 1)
+
+        repository.release.set()
+        with self.assertRaises(RuntimeError):
+            writer.close(timeout=5)
+        with self.database.connect() as conn:
+            rows = conn.execute("SELECT entity_id FROM audit_logs ORDER BY id").fetchall()
+        self.assertEqual([row["entity_id"] for row in rows], ["1", "2"])
+
+
+class BlockingRepository:
+    def __init__(self, repository):
+        self.repository = repository
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def log_many(self, events):
+        self.entered.set()
+        self.release.wait(5)
+        return self.repository.log_many(events)
+
+
+class FlakyRepository:
+    def __init__(self, repository, failures):
+        self.repository = repository
+        self.failures = failures
+        self.calls = 0
+
+    def log_many(self, events):
+        self.calls += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("database is locked")
+        return self.repository.log_many(events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+from decimal import Decimal
+import hashlib
+from pathlib import Path
+import tempfile
+import unittest
+
+from erp.application.auth_service import AuthService
+from erp.application.login_throttle import LoginThrottle, LoginThrottledError
+from erp.application.session_store import SessionStore
+from erp.application.quote_service import QuoteService
+from erp.domain.permissions import (
+    APPROVE_QUOTE,
+    EDIT_PRICE,
+    MANAGE_USERS,
+    OVERRIDE_MIN_PRICE,
+    PermissionDeniedError,
+)
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.auth_repository import AuthRepository
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+from erp.infrastructure.security import HashParams, hash_password, needs_rehash, verify_password
+from erp.infrastructure.settings_repository import SettingsRepository
+
+from helpers import build_quote
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LoginThrottleTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.throttle = LoginThrottle(free_attempts=2, base_delay_s=1, max_delay_s=8, window_s=60, clock=self.clock)
+
+    def test_backoff_doubles_after_free_attempts_and_is_capped(self):
+        delays = [self.throttle.record_failure("ana", "10.0.0.1") for _ in range(7)]
+
+        self.assertEqual(delays, [0, 0, 1, 2, 4, 8, 8])
+        with self.assertRaises(LoginThrottledError) as ctx:
+            self.throttle.check("ana", "10.0.0.2")
+        self.assertEqual(ctx.exception.retry_after_s, 8)
+        self.clock.now += 8
+        self.throttle.check("ana", "10.0.0.2")
+
+    def test_source_stays_locked_after_success_on_another_user(self):
+        for name in ("ana", "bia", "caio"):
+            self.throttle.record_failure(name, "10.0.0.9")
+        self.throttle.record_success("ana", "10.0.0.9")
+
+        self.assertEqual(self.throttle.retry_after("ana", "10.0.0.1"), 0)
+        self.assertEqual(self.throttle.retry_after("dani", "10.0.0.9"), 1)
+
+    def test_failures_are_forgotten_after_the_window(self):
+        for _ in range(3):
+            self.throttle.record_failure("ana", "10.0.0.1")
+        self.clock.now += 61
+
+        self.assertEqual(self.throttle.record_failure("ana", "10.0.0.1"), 0)
+
+
+class SessionStoreTest(unittest.TestCase):
+    def test_tokens_expire_and_can_be_revoked(self):
+        clock = FakeClock()
+        store = SessionStore(ttl_s=30, max_sessions=2, clock=clock)
+        first = store.issue({"username": "ana", "role": "COMERCIAL"})
+        second = store.issue({"username": "ana", "role": "COMERCIAL"})
+        third = store.issue({"username": "bia", "role": "GERENCIA"})
+
+        self.assertIsNone(store.resolve(first))
+        self.assertEqual(store.resolve(third)["role"], "GERENCIA")
+        self.assertEqual(store.revoke_user("ana"), 1)
+        self.assertIsNone(store.resolve(second))
+        clock.now += 30
+        self.assertIsNone(store.resolve(third))
+        self.assertEqual(len(store), 0)
+
+
+class PasswordHashTest(unittest.TestCase):
+    def test_hashes_carry_their_parameters(self):
+        fast = HashParams(iterations=1000)
+        scrypt = HashParams(algorithm="scrypt", n=2**10)
+        pbkdf2_hash = hash_password("segredo", fast)
+        scrypt_hash = hash_password("segredo", scrypt)
+
+        self.assertTrue(pbkdf2_hash.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(scrypt_hash.startswith("scrypt$n=1024,r=8,p=1$"))
+        self.assertTrue(verify_password("segredo", pbkdf2_hash))
+        self.assertTrue(verify_password("segredo", scrypt_hash))
+        self.assertFalse(verify_password("outra", scrypt_hash))
+        self.assertEqual(HashParams.decode(scrypt.encode()), scrypt)
+        self.assertFalse(needs_rehash(pbkdf2_hash, fast))
+        self.assertTrue(needs_rehash(pbkdf2_hash, scrypt))
+        with self.assertRaises(ValueError):
+            HashParams.decode("md5$1")
+
+    def test_legacy_salt_digest_hashes_still_verify(self):
+        salt = bytes(range(16))
+        digest = hashlib.pbkdf2_hmac("sha256", b"segredo", salt, 120000)
+        legacy = f"{salt.hex()}:{digest.hex()}"
+
+        self.assertTrue(verify_password("segredo", legacy))
+        self.assertFalse(verify_password("outra", legacy))
+        self.assertTrue(needs_rehash(legacy))
+
+    def test_login_rehashes_outdated_hashes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Database(str(Path(tmp) / "erp.db"))
+            database.initialize()
+            repository = AuthRepository(database)
+            repository.set_hash_params(HashParams(iterations=1000))
+            repository.create_user("ana", "segredo1", "COMERCIAL")
+            repository.set_hash_params(HashParams(algorithm="scrypt", n=2**10))
+
+            self.assertIsNone(repository.authenticate("ana", "errada"))
+            with database.connect() as conn:
+                before = conn.execute("SELECT password_hash FROM users WHERE username = 'ana'").fetchone()[0]
+            self.assertTrue(before.startswith("pbkdf2_sha256$1000$"))
+            self.assertEqual(repository.authenticate("ana", "segredo1")["username"], "ana")
+            with database.connect() as conn:
+                after = conn.execute("SELECT password_hash FROM users WHERE username = 'ana'").fetchone()[0]
+            self.assertTrue(after.startswith("scrypt$n=1024,r=8,p=1$"))
+            self.assertEqual(repository.authenticate("ana", "segredo1")["username"], "ana")
+
+    def test_rehash_does_not_overwrite_a_password_changed_meanwhile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Database(str(Path(tmp) / "erp.db"))
+            database.initialize()
+            repository = AuthRepository(database)
+            repository.set_hash_params(HashParams(iterations=1000))
+            repository.create_user("ana", "segredo1", "COMERCIAL")
+            new_hash = hash_password("segredo2", HashParams(iterations=1000))
+            load_params = repository._hash_params
+
+            def change_password_then_load(conn):
+                with database.connect() as other:
+                    other.execute("UPDATE users SET password_hash = ? WHERE username = 'ana'", (new_hash,))
+                return load_params(conn)
+
+            repository._hash_params = change_password_then_load
+            self.assertIsNone(repository.authenticate("ana", "segredo1"))
+            with database.connect() as conn:
+                stored = conn.execute("SELECT password_hash FROM users WHERE username = 'ana'").fetchone()[0]
+            self.assertEqual(stored, new_hash)
+
+
+class AuthServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        database = Database(str(Path(self.tmp.name) / "erp.db"))
+        database.initialize()
+        self.clock = FakeClock()
+        self.service = AuthService(
+            AuthRepository(database), throttle=LoginThrottle(free_attempts=1, clock=self.clock)
+        )
+        self.service.bootstrap()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_locked_login_is_refused_before_checking_the_password(self):
+        self.assertIsNone(self.service.login("admin", "errada"))
+        self.assertIsNone(self.service.login("admin", "errada"))
+
+        with self.assertRaises(LoginThrottledError):
+            self.service.login("admin", "admin123")
+        self.clock.now += 1
+        self.assertEqual(self.service.login("admin", "admin123")["role"], "GERENCIA")
+
+    def test_local_failures_lock_only_that_user(self):
+        self.service.repository.create_user("ana", "segredo1", "COMERCIAL")
+        for _ in range(2):
+            self.assertIsNone(self.service.login("ana", "errada"))
+
+        with self.assertRaises(LoginThrottledError):
+            self.service.login("ana", "segredo1")
+        self.assertEqual(self.service.login("admin", "admin123")["role"], "GERENCIA")
+
+    def test_session_token_replaces_password_checks(self):
+        token = self.service.start_session("admin", "admin123", source="api")
+
+        self.assertEqual(self.service.session_user(token)["username"], "admin")
+        self.service.end_session(token)
+        self.assertIsNone(self.service.session_user(token))
+
+
+class AccessControlTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = Database(str(Path(self.tmp.name) / "erp.db"))
+        self.database.initialize()
+        repository = AuthRepository(self.database)
+        repository.set_hash_params(HashParams(iterations=1000))
+        self.loads = 0
+        load_permissions = repository.load_permissions
+
+        def counting_load():
+            self.loads += 1
+            return load_permissions()
+
+        repository.load_permissions = counting_load
+        self.auth = AuthService(repository)
+        self.auth.bootstrap()
+        self.auth.create_user("vendedor", "segredo1", "COMERCIAL")
+        self.access = self.auth.permissions
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_permissions_load_once_until_invalidated(self):
+        for _ in range(100):
+            self.assertTrue(self.access.can("admin", APPROVE_QUOTE))
+            self.assertFalse(self.access.can("vendedor", APPROVE_QUOTE))
+        self.assertEqual(self.loads, 1)
+
+        self.auth.set_role("vendedor", "GERENCIA")
+        self.assertTrue(self.access.can("vendedor", APPROVE_QUOTE))
+        self.assertEqual(self.loads, 2)
+
+        self.auth.set_role_permissions("COMERCIAL", {EDIT_PRICE, APPROVE_QUOTE})
+        self.auth.create_user("novo", "segredo1", "COMERCIAL")
+        self.assertTrue(self.access.can("novo", APPROVE_QUOTE))
+        with self.assertRaises(ValueError):
+            self.auth.set_role_permissions("COMERCIAL", {"voar"})
+
+    def test_quote_service_methods_check_the_current_user(self):
+        quotes = QuoteRepository(self.database)
+        seller = QuoteService(PricingEngine(), quotes, access=self.access, current_user="vendedor")
+        manager = QuoteService(PricingEngine(), quotes, access=self.access, current_user="admin")
+        stranger = QuoteService(PricingEngine(), quotes, access=self.access, current_user="ninguem")
+        quote = build_quote()
+
+        saved = seller.save_quote(quote)
+        with self.assertRaises(PermissionDeniedError) as ctx:
+            seller.save_quote(build_quote(quote_id=saved.quote_id, version=saved.version, status="APROVADA"))
+        self.assertEqual(ctx.exception.capability, APPROVE_QUOTE)
+        manager.save_quote(build_quote(quote_id=saved.quote_id, version=saved.version, status="APROVADA"))
+        with self.assertRaises(PermissionDeniedError):
+            stranger.save_quote(quote)
+        self.assertEqual(
+            stranger.calculate_from_price(quote.purchase, quote.sale, quote.result.sale_price), quote.result
+        )
+        self.assertFalse(stranger.can(EDIT_PRICE))
+        self.assertTrue(QuoteService(PricingEngine(), quotes).can(MANAGE_USERS))
+
+    def test_saving_below_the_minimum_price_requires_override(self):
+        quotes = QuoteRepository(self.database)
+        SettingsRepository(self.database).set_min_price_rule("product", "Produto", Decimal("1000"))
+        seller = QuoteService(PricingEngine(), quotes, access=self.access, current_user="vendedor")
+        manager = QuoteService(PricingEngine(), quotes, access=self.access, current_user="admin")
+
+        with self.assertRaises(PermissionDeniedError) as ctx:
+            seller.save_quote(build_quote())
+        self.assertEqual(ctx.exception.capability, OVERRIDE_MIN_PRICE)
+        self.assertEqual(manager.save_quote(build_quote()).version, 1)
+        seller.save_quote(build_quote(product_name="Outro"))
+
+    def test_user_management_requires_permission_for_an_acting_user(self):
+        seller = AuthService(self.auth.repository, access=self.access, current_user="vendedor")
+
+        with self.assertRaises(PermissionDeniedError):
+            seller.create_user("outro", "segredo1", "COMERCIAL")
+        AuthService(self.auth.repository, access=self.access, current_user="admin").create_user(
+            "outro", "segredo1", "COMERCIAL"
+        )
+        self.assertTrue(self.access.can("outro", EDIT_PRICE))
+
+
+if __name__ == "__main__":
+    unittest.main()
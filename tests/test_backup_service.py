@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from erp.infrastructure.audit_repository import AuditEvent, AuditRepository
+from erp.infrastructure import backup_chain
+from erp.infrastructure.backup_chain import BackupChain, RetentionPolicy
+from erp.infrastructure.backup_service import BackupService
+from erp.infrastructure.database import Database
+
+
+class BackupFixture(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.db_path = root / "erp.db"
+        database = Database(str(self.db_path))
+        database.initialize()
+        AuditRepository(database).log_many(
+            AuditEvent("admin", "SAVE", "quote", str(idx), "x" * 200) for idx in range(2000)
+        )
+        self.database = database
+        self.service = BackupService(self.db_path, root / "backups", pages_per_step=16, step_pause=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class BackupServiceTest(BackupFixture):
+    def test_backup_copies_data_and_reports_progress(self):
+        calls = []
+        target = self.service.create_backup(progress=lambda done, total: calls.append((done, total)))
+
+        self.assertTrue(target.exists())
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(calls[-1][0], calls[-1][1])
+        with sqlite3.connect(target) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0], 2000)
+        self.assertEqual(list(target.parent.glob("*.partial")), [])
+
+    def test_async_backup_returns_future(self):
+        future = self.service.create_backup_async()
+
+        target = future.result(timeout=10)
+
+        self.assertTrue(target.exists())
+
+    def test_missing_database_returns_none(self):
+        service = BackupService(Path(self.tmp.name) / "missing.db", Path(self.tmp.name) / "backups")
+
+        self.assertIsNone(service.create_backup())
+
+
+class BackupChainTest(BackupFixture):
+    def _count(self, path):
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0]
+
+    def test_incremental_chain_restores_any_point(self):
+        chain = BackupChain(self.service)
+        start = datetime(2026, 1, 5, 8, 0)
+        first = chain.create(now=start)
+        AuditRepository(self.database).log("admin", "SAVE", "quote", "novo", "")
+        second = chain.create(now=start + timedelta(hours=1))
+
+        self.assertEqual(first.kind, "full")
+        self.assertEqual(second.kind, "incremental")
+        self.assertLess(second.changed_pages, second.page_count)
+
+        root = Path(self.tmp.name)
+        self.assertEqual(self._count(chain.restore(root / "r1.db", name=first.name)), 2000)
+        self.assertEqual(self._count(chain.restore(root / "r2.db")), 2001)
+
+    def test_failed_backup_leaves_no_partial_files(self):
+        chain = BackupChain(self.service)
+        start = datetime(2026, 1, 5, 8, 0)
+        first = chain.create(now=start)
+        before = sorted(path.name for path in chain.chain_dir.iterdir())
+        real_iter_pages = backup_chain._iter_pages
+
+        def failing_pages(snapshot, page_size):
+            for page_no, page in real_iter_pages(snapshot, page_size):
+                if page_no == 3:
+                    raise OSError("disco cheio")
+                yield page_no, page
+
+        with mock.patch.object(backup_chain, "_iter_pages", failing_pages):
+            with self.assertRaises(OSError):
+                chain.create(now=start + timedelta(hours=1))
+
+        self.assertEqual(sorted(path.name for path in chain.chain_dir.iterdir()), before)
+        self.assertEqual([entry.name for entry in chain.entries()], [first.name])
+        second = chain.create(now=start + timedelta(hours=1))
+        self.assertEqual(second.kind, "incremental")
+        self.assertEqual(self._count(chain.restore(Path(self.tmp.name) / "r.db")), 2000)
+
+    def test_retention_keeps_ancestors_of_kept_entries(self):
+        chain = BackupChain(self.service, policy=RetentionPolicy(hourly=2, daily=1, weekly=1), full_every=100)
+        start = datetime(2026, 1, 5, 8, 0)
+        for hour in range(6):
+            chain.create(now=start + timedelta(hours=hour))
+
+        names = [entry.name for entry in chain.entries()]
+        self.assertEqual(names[0], "20260105_080000")
+        self.assertEqual(len(names), 6)
+
+        chain = BackupChain(self.service, policy=RetentionPolicy(hourly=2, daily=1, weekly=1), full_every=2)
+        for hour in range(6, 12):
+            chain.create(now=start + timedelta(hours=hour))
+        entries = chain.entries()
+        self.assertLess(len(entries), 12)
+        by_name = {entry.name: entry for entry in entries}
+        for entry in entries:
+            if entry.parent:
+                self.assertIn(entry.parent, by_name)
+        self.assertEqual(self._count(chain.restore(Path(self.tmp.name) / "r.db")), 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
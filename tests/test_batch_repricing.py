@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+import unittest
+
+from erp.application.batch_repricing import BatchRepricer, ordered_map, parse_overrides
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+from erp.infrastructure.settings_repository import SettingsRepository
+from helpers import RepositoryFixture, build_quote
+
+
+def _square(chunk, offset):
+    return [value * value + offset for value in chunk]
+
+
+class OrderedMapTest(unittest.TestCase):
+    def test_results_keep_input_order_with_bounded_window(self):
+        pulled = []
+
+        def chunks():
+            for idx in range(20):
+                pulled.append(idx)
+                yield [idx]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = []
+            for result in ordered_map(executor, _square, chunks(), 1, max_in_flight=3):
+                results.append(result)
+                self.assertLessEqual(len(pulled) - len(results), 3)
+
+        self.assertEqual(results, [[idx * idx + 1] for idx in range(20)])
+
+    def test_rejects_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            parse_overrides(["sale.nao_existe=1"])
+        self.assertEqual(parse_overrides(["sale.icms_rate_pct = 12"]), {"sale.icms_rate_pct": "12"})
+
+
+class BatchRepricerTest(RepositoryFixture):
+    def _seed(self, count, repository=None):
+        repository = repository or self.repository
+        return [repository.save(build_quote(product_name=f"Produto {idx}")) for idx in range(count)]
+
+    def test_reprice_keeps_margin_and_writes_new_versions(self):
+        originals = self._seed(7)
+        report = BatchRepricer(self.repository, workers=1, chunk_size=3).run(
+            parse_overrides(["sale.icms_rate_pct=12"])
+        )
+
+        self.assertEqual((report.processed, report.saved, report.conflicts), (7, 7, []))
+        for original in originals:
+            updated = self.repository.get(original.quote_id)
+            self.assertEqual(updated.version, 2)
+            self.assertEqual(updated.sale.icms_rate_pct, Decimal("12"))
+            self.assertEqual(updated.result.margin_pct, original.result.margin_pct)
+            self.assertLess(updated.result.sale_price, original.result.sale_price)
+            self.assertEqual(len(self.repository.list_versions(original.quote_id)), 2)
+
+    def test_process_pool_matches_inline_result(self):
+        pooled_database = Database(str(Path(self.tmp.name) / "pooled.db"))
+        pooled_database.initialize()
+        pooled_repository = QuoteRepository(pooled_database)
+        originals = self._seed(10)
+        self._seed(10, pooled_repository)
+        overrides = parse_overrides(["purchase.ipi_rate_pct=10"])
+
+        inline = BatchRepricer(self.repository, workers=1, chunk_size=4).run(overrides)
+        pooled = BatchRepricer(pooled_repository, workers=2, chunk_size=4).run(overrides)
+
+        self.assertEqual((inline.processed, inline.saved), (10, 10))
+        self.assertEqual((pooled.processed, pooled.saved), (10, 10))
+        for original in originals:
+            expected = self.repository.get(original.quote_id)
+            actual = pooled_repository.get(original.quote_id)
+            self.assertEqual(expected.version, 2)
+            self.assertEqual(
+                (actual.quote_id, actual.version, actual.purchase, actual.sale, actual.result),
+                (expected.quote_id, expected.version, expected.purchase, expected.sale, expected.result),
+            )
+            self.assertEqual(actual.purchase.ipi_rate_pct, Decimal("10"))
+
+    def test_reprice_applies_rounding_and_minimum_prices(self):
+        cabo = self.repository.save(build_quote(product_name="Cabo"))
+        flexivel = self.repository.save(build_quote(product_name="Cabo flexivel"))
+        settings = SettingsRepository(self.repository.database)
+        settings.set_rounding_strategy("X90")
+        settings.set_min_price_rule("product", "Cabo flexivel", Decimal("500"))
+
+        report = BatchRepricer(self.repository, workers=1).run(parse_overrides(["sale.icms_rate_pct=12"]))
+
+        self.assertEqual(report.saved, 2)
+        self.assertEqual(self.repository.get(cabo.quote_id).result.sale_price % 1, Decimal("0.90"))
+        self.assertEqual(self.repository.get(flexivel.quote_id).result.sale_price, Decimal("500"))
+
+    def test_reprice_filters_match_whole_names(self):
+        cabo = self.repository.save(build_quote(product_name="Cabo"))
+        self.repository.save(build_quote(product_name="Cabos de rede"))
+
+        report = BatchRepricer(self.repository, workers=1).run(
+            parse_overrides(["sale.icms_rate_pct=12"]), filters={"product": "cabo"}
+        )
+
+        self.assertEqual(report.saved, 1)
+        self.assertEqual(self.repository.get(cabo.quote_id).version, 2)
+
+    def test_stale_rows_are_reported_as_conflicts(self):
+        saved = self._seed(3)
+        chunks = list(self.repository.iter_row_chunks(chunk_size=10))
+        self.repository.save(build_quote(quote_id=saved[1].quote_id, version=1, status="APROVADA"))
+
+        report = BatchRepricer(self.repository, workers=1).process(
+            chunks, parse_overrides(["sale.icms_rate_pct=7"])
+        )
+
+        self.assertEqual(report.saved, 2)
+        self.assertEqual(report.conflicts, [saved[1].quote_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import unittest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@unittest.skipUnless(os.environ.get("ERP_RUN_BENCHMARKS") == "1", "defina ERP_RUN_BENCHMARKS=1 para rodar")
+class PricingBenchmarkTest(unittest.TestCase):
+    def test_hot_paths_do_not_regress_against_baseline(self):
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_pricing", "--min-time", "0.3"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stdout + completed.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
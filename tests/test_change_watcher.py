@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import unittest
+
+from erp.infrastructure.change_watcher import DataVersionWatcher
+from helpers import RepositoryFixture, build_quote
+
+
+class DataVersionWatcherTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        self.watcher = DataVersionWatcher(self.database)
+        self.assertTrue(self.watcher.changed())
+
+    def tearDown(self):
+        self.watcher.close()
+        super().tearDown()
+
+    def test_reports_commits_from_other_connections_once(self):
+        self.assertFalse(self.watcher.changed())
+        self.repository.list_recent()
+        self.assertFalse(self.watcher.changed())
+
+        self.repository.save(build_quote())
+        self.assertTrue(self.watcher.changed())
+        self.assertFalse(self.watcher.changed())
+
+    def test_reports_commits_from_another_process(self):
+        script = (
+            "import sqlite3, sys; conn = sqlite3.connect(sys.argv[1]); "
+            "conn.execute(\"INSERT INTO app_settings VALUES ('watch', '1', '')\"); conn.commit()"
+        )
+        subprocess.run([sys.executable, "-c", script, str(self.database.db_path)], check=True)
+
+        self.assertTrue(self.watcher.changed())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import asyncio
+from http import HTTPStatus
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from erp.application.quote_service import QuoteService
+from erp.domain.pricing_engine import PricingEngine
+from erp.infrastructure.database import Database
+from erp.infrastructure.quote_repository import QuoteRepository
+from erp.presentation.http_api import PricingApi, PricingHttpServer
+
+
+PURCHASE = {
+    "base_price": "100",
+    "ipi_rate_pct": "5",
+    "st_rate_pct": "8",
+    "icms_rate_pct": "18",
+    "pis_rate_pct": "1.65",
+    "cofins_rate_pct": "7.6",
+    "credit_icms": True,
+    "credit_pis": True,
+    "credit_cofins": True,
+}
+SALE = {"pis_rate_pct": "1.65", "cofins_rate_pct": "7.6", "icms_rate_pct": "18"}
+
+
+class PricingHttpApiTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        database = Database(str(Path(self.tmp.name) / "erp.db"), reuse_connections=True)
+        database.initialize()
+        service = QuoteService(pricing_engine=PricingEngine(), repository=QuoteRepository(database))
+        self.server = PricingHttpServer(PricingApi(service), port=0)
+        await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.server.close()
+        self.tmp.cleanup()
+
+    async def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        headers = {}
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers["content-length"]))
+        return int(status_line.split()[1]), json.loads(data)
+
+    async def test_pricing_endpoints_share_one_connection(self):
+        status, result = await self._request(
+            "POST", "/v1/pricing/from-margin", {"purchase": PURCHASE, "sale": SALE, "margin_pct": "25"}
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(result["effective_cost"], "113.00")
+
+        status, back = await self._request(
+            "POST", "/v1/pricing/from-price", {"purchase": PURCHASE, "sale": SALE, "sale_price": result["sale_price"]}
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(back["sale_price"], result["sale_price"])
+        self.assertEqual(self.server.connections_accepted, 1)
+
+        status, batch = await self._request(
+            "POST",
+            "/v1/pricing/batch",
+            {"items": [{"purchase": PURCHASE, "sale": SALE, "margin_pct": "25"}, {"purchase": PURCHASE}]},
+        )
+        self.assertEqual([item["ok"] for item in batch["results"]], [True, False])
+
+    async def test_quote_crud(self):
+        status, created = await self._request(
+            "POST",
+            "/v1/quotes",
+            {"product_name": "Cabo", "supplier_name": "ACME", "purchase": PURCHASE, "sale": SALE, "margin_pct": "20"},
+        )
+        self.assertEqual(status, HTTPStatus.CREATED)
+        quote_id = created["quote_id"]
+
+        status, updated = await self._request(
+            "PUT",
+            f"/v1/quotes/{quote_id}",
+            {
+                "product_name": "Cabo",
+                "supplier_name": "ACME",
+                "version": 1,
+                "purchase": PURCHASE,
+                "sale": SALE,
+                "margin_pct": "30",
+            },
+        )
+        self.assertEqual(updated["version"], 2)
+
+        status, _ = await self._request(
+            "PUT",
+            f"/v1/quotes/{quote_id}",
+            {
+                "product_name": "Cabo",
+                "supplier_name": "ACME",
+                "version": 1,
+                "purchase": PURCHASE,
+                "sale": SALE,
+                "margin_pct": "1",
+            },
+        )
+        self.assertEqual(status, HTTPStatus.CONFLICT)
+
+        status, _ = await self._request(
+            "PUT",
+            f"/v1/quotes/{quote_id}",
+            {
+                "product_name": "Cabo",
+                "supplier_name": "ACME",
+                "version": "dois",
+                "purchase": PURCHASE,
+                "sale": SALE,
+                "margin_pct": "30",
+            },
+        )
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+        status, _ = await self._request(
+            "PUT",
+            f"/v1/quotes/{quote_id}",
+            {"product_name": "Cabo", "supplier_name": "ACME", "purchase": PURCHASE, "sale": SALE, "margin_pct": "30"},
+        )
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+        status, _ = await self._request(
+            "PUT",
+            "/v1/quotes/999",
+            {
+                "product_name": "Cabo",
+                "supplier_name": "ACME",
+                "version": 1,
+                "purchase": PURCHASE,
+                "sale": SALE,
+                "margin_pct": "30",
+            },
+        )
+        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+
+        status, listed = await self._request("GET", "/v1/quotes?supplier=acme")
+        self.assertEqual([row["id"] for row in listed], [str(quote_id)])
+        status, versions = await self._request("GET", f"/v1/quotes/{quote_id}/versions")
+        self.assertEqual(len(versions), 2)
+        status, changes = await self._request("GET", "/v1/quotes/changes?since=1")
+        self.assertEqual([row["version"] for row in changes["changes"]], ["2"])
+        status, changes = await self._request("GET", f"/v1/quotes/changes?since={changes['seq']}")
+        self.assertEqual(changes["changes"], [])
+        status, _ = await self._request("GET", "/v1/quotes/999")
+        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+
+    async def _raw_status(self, data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        try:
+            writer.write(data)
+            await writer.drain()
+            return int((await reader.readline()).split()[1])
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_malformed_requests_are_client_errors(self):
+        status = await self._raw_status(b"POST /v1/quotes HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+        status = await self._raw_status(b"GET /health HTTP/1.1\r\nX-Big: " + b"a" * 70000 + b"\r\n\r\n")
+        self.assertEqual(status, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        status = await self._raw_status(b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n")
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+
+    async def test_internal_errors_do_not_leak_details(self):
+        def fail(*_args, **_kwargs):
+            raise RuntimeError("C:\\dados\\erp.db bloqueado")
+
+        self.server.api.service.list_recent_quotes = fail
+        status, body = await self._request("GET", "/v1/quotes")
+
+        self.assertEqual(status, HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.assertEqual(body, {"error": "Erro interno."})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import json
+from contextlib import redirect_stderr
+from pathlib import Path
+import sqlite3
+import unittest
+
+from erp import cli
+from erp.infrastructure.database import Database
+from erp.infrastructure.instrumentation import INSTRUMENTATION, LatencyHistogram
+from erp.infrastructure.quote_repository import QuoteRepository
+from helpers import RepositoryFixture, build_quote
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles_use_bucket_bounds_capped_by_max(self):
+        histogram = LatencyHistogram()
+        for elapsed in [0.3] * 90 + [40.0] * 9 + [7000.0]:
+            histogram.add(elapsed)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 0.5)
+        self.assertEqual(histogram.percentile(95), 50)
+        self.assertEqual(histogram.percentile(100), 7000.0)
+        self.assertEqual(histogram.as_dict()["buckets"], {"<=0.5": 90, "<=50": 9, ">5000": 1})
+
+
+class InstrumentationTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        INSTRUMENTATION.reset()
+        self.addCleanup(INSTRUMENTATION.reset)
+        self.addCleanup(INSTRUMENTATION.disable)
+
+    def test_enabled_records_calls_and_sql(self):
+        INSTRUMENTATION.enable()
+        saved = self.repository.save(build_quote())
+        self.repository.get(saved.quote_id)
+
+        data = INSTRUMENTATION.snapshot()
+        self.assertEqual(data["calls"]["QuoteRepository.get"]["count"], 2)
+        self.assertEqual(data["calls"]["QuoteRepository.save"]["count"], 1)
+        self.assertGreaterEqual(data["calls"]["Database.connect"]["count"], 2)
+        select = next(sql for sql in data["sql"] if sql.startswith("SELECT * FROM quotes WHERE id = ?"))
+        self.assertEqual(data["sql"][select]["count"], 2)
+        self.assertEqual(data["sql"][select]["rows"], 2)
+        self.assertIn("QuoteRepository.get", INSTRUMENTATION.report())
+
+    def test_disable_restores_original_methods(self):
+        original_get = QuoteRepository.__dict__["get"]
+        INSTRUMENTATION.enable()
+        self.assertIsNot(QuoteRepository.__dict__["get"], original_get)
+
+        INSTRUMENTATION.disable()
+        self.repository.save(build_quote())
+
+        self.assertIs(QuoteRepository.__dict__["get"], original_get)
+        self.assertIs(Database.connection_factory, sqlite3.Connection)
+        self.assertEqual(INSTRUMENTATION.snapshot()["calls"], {})
+
+    def test_cli_dumps_measurements_to_file(self):
+        db_path = Path(self.tmp.name) / "erp.db"
+        self.repository.save(build_quote())
+        dump = Path(self.tmp.name) / "instrumentacao.json"
+
+        with redirect_stderr(io.StringIO()):
+            code = cli.main(["--db", str(db_path), "--instrument", str(dump), "export", "quotes", str(dump) + ".csv"])
+
+        data = json.loads(dump.read_text(encoding="utf-8"))
+        self.assertEqual(code, 0)
+        self.assertFalse(INSTRUMENTATION.enabled)
+        self.assertEqual(data["calls"]["Database.initialize"]["count"], 1)
+        self.assertTrue(any(sql.startswith("SELECT id, version") for sql in data["sql"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import threading
+import time
+import unittest
+
+from erp.presentation.change_poller import ChangePoller
+from erp.presentation.history_table import HistoryTable
+from erp.presentation.ui_worker import UiWorker
+
+from helpers import FakeWidget
+
+
+class ChangePollerTest(unittest.TestCase):
+    def test_calls_back_only_when_check_reports_a_change(self):
+        widget = FakeWidget()
+        answers = iter([False, True, False])
+        changes = []
+        poller = ChangePoller(widget, lambda: next(answers), lambda: changes.append(1), interval_ms=500)
+        poller.start()
+        poller.start()
+
+        for _ in range(3):
+            widget.run_pending()
+
+        self.assertEqual((poller.poll_count, poller.change_count, len(changes)), (3, 1, 1))
+        self.assertTrue(poller.running)
+        poller.stop()
+        self.assertEqual(widget.jobs, {})
+
+    def test_zero_interval_disables_polling(self):
+        widget = FakeWidget()
+        ChangePoller(widget, lambda: True, lambda: None, interval_ms=0).start()
+
+        self.assertEqual(widget.jobs, {})
+
+
+class UiWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.worker = UiWorker(self.widget)
+        self.busy_states = []
+        self.worker.on_busy_change = self.busy_states.append
+
+    def tearDown(self):
+        self.worker.shutdown()
+
+    def _drain_until_idle(self):
+        for _ in range(500):
+            self.widget.run_pending()
+            if not self.worker.busy:
+                return
+            time.sleep(0.005)
+        self.fail("worker did not finish")
+
+    def test_result_is_delivered_on_drain(self):
+        results = []
+        self.worker.submit_read(lambda: 21 * 2, on_success=results.append).result(timeout=5)
+
+        self.assertEqual(results, [])
+        self._drain_until_idle()
+        self.assertEqual(results, [42])
+        self.assertEqual(self.busy_states, [True, False])
+
+    def test_superseded_request_on_channel_is_dropped(self):
+        gate = threading.Event()
+        results = []
+        self.worker.submit_read(lambda: gate.wait(5) and "old", on_success=results.append, channel="history")
+        self.worker.submit_read(lambda: "new", on_success=results.append, channel="history")
+        gate.set()
+
+        self._drain_until_idle()
+        self.assertEqual(results, ["new"])
+
+    def test_errors_go_to_error_callback(self):
+        errors = []
+
+        def fail():
+            raise ValueError("boom")
+
+        self.worker.submit_write(fail, on_success=lambda _v: None, on_error=errors.append)
+
+        self._drain_until_idle()
+        self.assertEqual([str(exc) for exc in errors], ["boom"])
+
+
+class FakeTree:
+    def __init__(self):
+        self.items = []
+
+    def insert(self, _parent, index, iid, values):
+        position = len(self.items) if index == "end" else index
+        self.items.insert(position, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.remove(iid)
+
+    def get_children(self):
+        return tuple(self.items)
+
+
+class InlineWorker:
+    def submit_read(self, func, on_success, on_error=None, channel=None):
+        on_success(func())
+
+
+class HistoryTableTest(unittest.TestCase):
+    def setUp(self):
+        self.rows = [
+            {
+                "id": str(idx),
+                "version": "1",
+                "status": "RASCUNHO",
+                "product_name": f"Produto {idx}",
+                "category_name": "",
+                "supplier_name": "Fornecedor",
+                "owner_user": "admin",
+                "updated_at": f"2026-01-01T00:{idx // 60:02d}:{idx % 60:02d}",
+            }
+            for idx in range(100)
+        ]
+        self.rows.reverse()
+        self.tree = FakeTree()
+        self.changes = []
+        self.table = HistoryTable(
+            self.tree,
+            InlineWorker(),
+            self._fetch,
+            page_size=10,
+            max_rows=30,
+            fetch_changes=self._fetch_changes,
+            fetch_change_seq=lambda: len(self.changes),
+            changes_limit=3,
+        )
+
+    def _fetch_changes(self, seq, limit):
+        return [dict(row, seq=str(idx + 1)) for idx, row in enumerate(self.changes)][seq:][:limit]
+
+    def _fetch(self, limit, filters=None, before=None, after=None):
+        key = lambda row: (row["updated_at"], int(row["id"]))
+        rows = self.rows
+        if before is not None:
+            rows = [row for row in rows if key(row) < before]
+        if after is not None:
+            rows = [row for row in rows if key(row) > after][-limit:]
+        return rows[:limit]
+
+    def test_scrolling_pages_in_and_bounds_loaded_rows(self):
+        self.table.reload()
+        for _ in range(5):
+            self.table.on_scroll(0.5, 1.0)
+
+        self.assertEqual(self.table.row_count, 30)
+        self.assertEqual(self.tree.items[0], "69")
+        self.assertTrue(self.table.has_newer)
+
+        for _ in range(5):
+            self.table.on_scroll(0.0, 0.3)
+        self.assertEqual(self.tree.items[0], "99")
+        self.assertFalse(self.table.has_newer)
+
+    def test_upsert_moves_saved_row_to_top(self):
+        self.table.reload()
+        changed = dict(self.rows[5], version="2", updated_at="2026-02-01T00:00:00")
+        self.table.upsert(changed)
+
+        self.assertEqual(self.tree.items[0], changed["id"])
+        self.assertEqual(self.tree.items.count(changed["id"]), 1)
+        self.assertEqual(self.table.row_count, 10)
+
+    def test_refresh_changes_upserts_only_new_changes(self):
+        self.changes.append(dict(self.rows[0], version="2"))
+        self.table.reload()
+        fetched = []
+        self.table.fetch_page = lambda **kwargs: fetched.append(kwargs) or self._fetch(**kwargs)
+
+        self.table.refresh_changes()
+        self.assertEqual(self.tree.items[0], self.rows[0]["id"])
+        changed = dict(self.rows[7], version="2", updated_at="2026-02-01T00:00:00")
+        self.changes.append(changed)
+        self.table.refresh_changes()
+        self.table.refresh_changes()
+
+        self.assertEqual(self.tree.items[0], changed["id"])
+        self.assertEqual(self.table.change_seq, 2)
+        self.assertEqual(self.table.row_count, 10)
+        self.assertEqual(fetched, [])
+
+    def test_large_change_batch_reloads_the_first_page(self):
+        self.table.reload()
+        self.changes.extend(self.rows[:3])
+        self.table.fetch_page = lambda **kwargs: self._fetch(**kwargs)[:1]
+
+        self.table.refresh_changes()
+
+        self.assertEqual(self.table.row_count, 1)
+        self.assertEqual(self.table.change_seq, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
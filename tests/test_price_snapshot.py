@@ -0,0 +1,91 @@
+import io
+from contextlib import redirect_stdout
+from dataclasses import replace
+from decimal import Decimal
+from pathlib import Path
+import unittest
+
+from erp import cli
+from erp.infrastructure.price_snapshot import PriceSnapshot, PriceSnapshotPublisher, product_key
+from helpers import RepositoryFixture, build_quote
+
+
+class PriceSnapshotTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.tmp.name) / "precos.bin"
+        self.publisher = PriceSnapshotPublisher(self.database, self.path)
+
+    def _approve(self, product_name, margin="25", **overrides):
+        return self.repository.save(build_quote(product_name, margin=margin, status="APROVADA", **overrides))
+
+    def test_full_publish_keeps_latest_approved_quote_per_product(self):
+        self._approve("Cabo  USB", margin="20")
+        latest = self._approve("cabo usb", margin="30")
+        self._approve("Mouse")
+        self.repository.save(build_quote("Teclado"))
+
+        result = self.publisher.publish()
+
+        self.assertTrue(result.full)
+        with PriceSnapshot(self.path) as snapshot:
+            self.assertEqual([entry.product_key for entry in snapshot], ["cabo usb", "mouse"])
+            entry = snapshot.lookup(" CABO usb ")
+            self.assertEqual(entry.quote_id, latest.quote_id)
+            self.assertEqual(entry.sale_price, latest.result.sale_price)
+            self.assertEqual(entry.margin_pct, Decimal("30.00"))
+            self.assertIsNone(snapshot.lookup("Teclado"))
+            self.assertIsNone(snapshot.lookup("zzz"))
+            self.assertEqual(snapshot.change_seq, self.repository.change_seq())
+
+    def test_incremental_publish_merges_only_changed_quotes(self):
+        mouse = self._approve("Mouse")
+        self.publisher.publish()
+        with PriceSnapshot(self.path) as snapshot:
+            self.assertEqual(self.publisher.publish().changes, 0)
+            self.assertFalse(snapshot.reload_if_changed())
+
+            self.repository.save(replace(mouse, result=build_quote(margin="40").result))
+            self._approve("Cabo")
+            result = self.publisher.publish()
+
+            self.assertEqual((result.full, result.changes, result.entries), (False, 2, 2))
+            self.assertTrue(snapshot.reload_if_changed())
+            self.assertEqual(snapshot.lookup("mouse").margin_pct, Decimal("40.00"))
+
+    def test_withdrawn_price_source_triggers_a_full_rebuild(self):
+        older = self._approve("Mouse", margin="20")
+        newer = self._approve("Mouse", margin="35")
+        self.publisher.publish()
+
+        self.repository.save(replace(newer, status="REPROVADA"))
+        result = self.publisher.publish()
+
+        self.assertTrue(result.full)
+        with PriceSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.lookup("mouse").quote_id, older.quote_id)
+
+    def test_long_keys_are_cut_on_character_boundaries(self):
+        self.assertEqual(len(product_key("a" * 47 + "é" * 3)), 48)
+        self.assertEqual(product_key("a" * 47 + "ç"), b"a" * 47)
+
+    def test_rejects_foreign_files(self):
+        self.path.write_bytes(b"x" * 64)
+
+        with self.assertRaises(ValueError):
+            PriceSnapshot(self.path)
+        self.assertTrue(self.publisher.publish().full)
+
+    def test_cli_publishes_snapshot(self):
+        self._approve("Mouse")
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            cli.main(["--db", str(self.database.db_path), "publish-prices", str(self.path)])
+
+        self.assertIn("1 precos publicados", stdout.getvalue())
+        with PriceSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import json
+from contextlib import redirect_stderr
+import gc
+from pathlib import Path
+import unittest
+
+from erp import cli
+from erp.infrastructure.database import Database
+from erp.infrastructure.query_profiler import QueryProfiler, normalize_statement
+from erp.infrastructure.quote_repository import QuoteRepository
+from helpers import RepositoryFixture, build_quote
+
+
+class NormalizeStatementTest(unittest.TestCase):
+    def test_literals_and_lists_collapse(self):
+        self.assertEqual(
+            normalize_statement("SELECT *  FROM t1\n WHERE a IN (1, 2,3) AND b = 'x''y' AND c = -1.5e3"),
+            "SELECT * FROM t1 WHERE a IN (?) AND b = ? AND c = ?",
+        )
+        self.assertEqual(normalize_statement("INSERT INTO t VALUES (1, 'a')"), "INSERT INTO t VALUES (?)")
+
+
+class QueryProfilerTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        self.log_path = Path(self.tmp.name) / "lento.jsonl"
+        self.profiler = QueryProfiler(threshold_ms=-1, log_path=self.log_path, progress_steps=10)
+        self.database = Database(str(Path(self.tmp.name) / "erp.db"), profiler=self.profiler)
+        self.repository = QuoteRepository(self.database)
+
+    def test_aggregates_by_statement_and_logs_plans(self):
+        for idx in range(3):
+            self.repository.save(build_quote(product_name=f"Produto {idx}"))
+        self.repository.list_recent(filters={"product": "produto 1"})
+        self.repository.list_recent(filters={"product": "produto 2"})
+        self.profiler.flush()
+
+        stats = {item.statement: item for item in self.profiler.stats()}
+        insert = next(item for key, item in stats.items() if key.startswith("INSERT INTO quotes"))
+        search = next(item for key, item in stats.items() if "LIKE ?" in key and "FROM quotes" in key)
+        self.assertEqual(insert.count, 3)
+        self.assertEqual(search.count, 2)
+        self.assertTrue(any(line.lstrip().startswith("SCAN quotes") for line in search.plan))
+
+        entries = [json.loads(line) for line in self.log_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(
+            sorted(entry["sql"].count("%produto 2%") for entry in entries if "LIKE" in entry["sql"]), [0, 1]
+        )
+        self.assertIn("SQL acima de", self.profiler.report())
+
+    def test_threshold_filters_fast_statements(self):
+        self.profiler.threshold_ms = 60_000
+        self.repository.save(build_quote())
+        self.profiler.flush()
+
+        self.assertTrue(self.profiler.stats())
+        self.assertEqual(self.profiler.slow_queries(), [])
+        self.assertFalse(self.log_path.exists())
+
+    def test_closed_connection_is_accounted_for_on_flush(self):
+        conn = self.database.connect()
+        conn.execute("SELECT COUNT(*) FROM quotes WHERE status = 'APROVADA'").fetchone()
+        conn.close()
+        del conn
+        gc.collect()
+
+        self.assertFalse(self.log_path.exists())
+        self.profiler.flush()
+
+        entries = [json.loads(line) for line in self.log_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([entry["statement"] for entry in entries], ["SELECT COUNT(*) FROM quotes WHERE status = ?"])
+
+    def test_cli_option_writes_slow_log(self):
+        self.repository.save(build_quote())
+        log_path = Path(self.tmp.name) / "cli.jsonl"
+
+        with redirect_stderr(io.StringIO()) as stderr:
+            cli.main([
+                "--db", str(self.database.db_path), "--slow-sql", str(log_path), "--slow-ms", "-1",
+                "export", "quotes", str(Path(self.tmp.name) / "saida.csv"),
+            ])
+
+        self.assertIn("instrucoes SQL acima de", stderr.getvalue())
+        self.assertTrue(log_path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+import unittest
+
+from erp.infrastructure.quote_export import QuoteExporter, export_columns
+from helpers import RepositoryFixture, build_quote
+
+
+class QuoteExporterTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        for idx in range(5):
+            supplier = "Acme" if idx % 2 else "Beta"
+            saved = self.repository.save(build_quote(product_name=f"Produto {idx}", supplier_name=supplier))
+        self.repository.save(build_quote(quote_id=saved.quote_id, version=1, status="APROVADA"))
+        self.exporter = QuoteExporter(self.database, batch_size=2)
+
+    def test_csv_flattens_payloads_and_applies_filters(self):
+        output = io.StringIO()
+        result = self.exporter.export(output, filters={"supplier": "acme"})
+
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(list(rows[0]), export_columns("quotes"))
+        self.assertEqual([row["supplier_name"] for row in rows], ["Acme", "Acme"])
+        quote = self.repository.get(int(rows[0]["id"]))
+        self.assertEqual(rows[0]["result_sale_price"], str(quote.result.sale_price))
+        self.assertEqual(rows[0]["purchase_icms_rate_pct"], str(quote.purchase.icms_rate_pct))
+
+    def test_jsonl_exports_every_version(self):
+        output = io.StringIO()
+        result = self.exporter.export(output, table="versions", fmt="jsonl")
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(result.rows, 6)
+        self.assertEqual([line["version"] for line in lines if line["quote_id"] == 5], [1, 2])
+
+        approved = io.StringIO()
+        self.exporter.export(approved, table="versions", fmt="jsonl", filters={"status": "APROVADA"})
+        self.assertEqual(len(approved.getvalue().splitlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
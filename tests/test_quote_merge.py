@@ -0,0 +1,64 @@
+from dataclasses import replace
+import unittest
+
+from erp.application.quote_service import QuoteService
+from erp.domain.pricing_engine import PricingEngine
+from erp.domain.quote_merge import QuoteConflictError, merge_quotes
+from helpers import RepositoryFixture, build_quote
+
+
+class MergeQuotesTest(unittest.TestCase):
+    def setUp(self):
+        self.base = build_quote(quote_id=1, version=1)
+
+    def test_disjoint_edits_are_combined(self):
+        mine = replace(self.base, notes="ligar amanha")
+        theirs = replace(build_quote(quote_id=1, version=2, margin="30"), supplier_name="Outro")
+
+        merged = merge_quotes(self.base, mine, theirs)
+
+        self.assertEqual((merged.version, merged.notes, merged.supplier_name), (2, "ligar amanha", "Outro"))
+        self.assertEqual(merged.result, theirs.result)
+
+    def test_both_sides_repricing_conflicts(self):
+        mine = build_quote(quote_id=1, version=1, base_price="120")
+        theirs = build_quote(quote_id=1, version=2, margin="30")
+
+        with self.assertRaises(QuoteConflictError) as ctx:
+            merge_quotes(self.base, mine, theirs)
+        self.assertEqual(ctx.exception.fields, ("resultado",))
+
+    def test_same_field_changed_on_both_sides_conflicts(self):
+        mine = build_quote(quote_id=1, version=1, notes="a", base_price="120")
+        theirs = build_quote(quote_id=1, version=2, notes="b", base_price="90")
+
+        with self.assertRaises(QuoteConflictError) as ctx:
+            merge_quotes(self.base, mine, theirs)
+        self.assertEqual(ctx.exception.fields, ("notes", "compra.base_price"))
+        self.assertIn("notes", str(ctx.exception))
+
+
+class QuoteServiceMergeTest(RepositoryFixture):
+    def test_stale_save_merges_on_top_of_the_latest_version(self):
+        service = QuoteService(PricingEngine(), self.repository)
+        saved = service.save_quote(build_quote())
+        service.save_quote(replace(saved, status="APROVADA"))
+
+        merged = service.save_quote(replace(saved, notes="revisar frete"))
+
+        self.assertEqual(merged.version, 3)
+        latest = self.repository.get(merged.quote_id)
+        self.assertEqual((latest.status, latest.notes), ("APROVADA", "revisar frete"))
+
+    def test_conflicting_save_is_rejected(self):
+        service = QuoteService(PricingEngine(), self.repository)
+        saved = service.save_quote(build_quote())
+        service.save_quote(replace(saved, notes="primeiro"))
+
+        with self.assertRaises(QuoteConflictError):
+            service.save_quote(replace(saved, notes="segundo"))
+        self.assertEqual(self.repository.get(saved.quote_id).notes, "primeiro")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from helpers import RepositoryFixture, build_quote
+
+
+class QuoteRepositoryTest(RepositoryFixture):
+    def test_keyset_pages_walk_history_in_both_directions(self):
+        for idx in range(25):
+            self.repository.save(build_quote(product_name=f"Produto {idx}"))
+
+        first = self.repository.list_recent(limit=10)
+        key = lambda row: (row["updated_at"], int(row["id"]))
+        second = self.repository.list_recent(limit=10, before=key(first[-1]))
+        third = self.repository.list_recent(limit=10, before=key(second[-1]))
+        back = self.repository.list_recent(limit=10, after=key(second[0]))
+
+        ids = [row["id"] for row in first + second + third]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(back, first)
+
+    def test_save_updates_version_and_rejects_stale_write(self):
+        saved = self.repository.save(build_quote())
+        updated = self.repository.save(build_quote(quote_id=saved.quote_id, version=saved.version, status="APROVADA"))
+
+        self.assertEqual(updated.version, 2)
+        with self.assertRaises(ValueError):
+            self.repository.save(build_quote(quote_id=saved.quote_id, version=1))
+
+    def test_save_many_writes_versions_and_skips_stale_rows(self):
+        first = self.repository.save(build_quote(product_name="A"))
+        second = self.repository.save(build_quote(product_name="B"))
+
+        result = self.repository.save_many(
+            [
+                build_quote(quote_id=first.quote_id, version=1, status="APROVADA"),
+                build_quote(quote_id=second.quote_id, version=7),
+                build_quote(product_name="C"),
+            ]
+        )
+
+        self.assertEqual((result.saved, result.conflicts), (2, [second.quote_id]))
+        self.assertEqual(self.repository.get_version(first.quote_id, 2).status, "APROVADA")
+        chunks = list(self.repository.iter_row_chunks(chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+
+    def test_changes_since_returns_each_changed_quote_once(self):
+        first = self.repository.save(build_quote(product_name="A"))
+        second = self.repository.save(build_quote(product_name="B"))
+        seq = self.repository.change_seq()
+        self.assertEqual(self.repository.changes_since(seq), [])
+
+        self.repository.save(build_quote("A", quote_id=first.quote_id, version=1, status="APROVADA"))
+        self.repository.save(build_quote(product_name="C"))
+        self.repository.save(build_quote("A", quote_id=first.quote_id, version=2, notes="revisada"))
+
+        changes = self.repository.changes_since(seq)
+        self.assertEqual([(row["product_name"], row["version"]) for row in changes], [("C", "1"), ("A", "3")])
+        self.assertEqual(changes[-1]["seq"], str(self.repository.change_seq()))
+        self.assertEqual(len(self.repository.changes_since(0, limit=2)), 2)
+        self.assertNotIn(str(second.quote_id), [row["id"] for row in changes])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from erp.presentation.recalc_scheduler import RecalcScheduler
+
+from helpers import FakeWidget
+
+
+class RecalcSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.widget = FakeWidget()
+        self.calls = 0
+        self.scheduler = RecalcScheduler(self.widget, self._callback)
+
+    def _callback(self):
+        self.calls += 1
+
+    def test_burst_of_requests_runs_once(self):
+        for _ in range(20):
+            self.scheduler.request()
+        self.widget.run_pending()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.scheduler.request_count, 20)
+        self.assertEqual(self.scheduler.run_count, 1)
+
+    def test_flush_runs_pending_immediately(self):
+        self.scheduler.request()
+        self.scheduler.flush()
+        self.widget.run_pending()
+
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(self.scheduler.pending)
+
+    def test_flush_without_pending_is_noop(self):
+        self.scheduler.flush()
+
+        self.assertEqual(self.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
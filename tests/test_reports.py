@@ -0,0 +1,101 @@
+from decimal import Decimal
+import unittest
+
+from erp.infrastructure.database import SCHEMA_VERSION
+from erp.infrastructure.report_repository import ReportRepository
+from erp.infrastructure.settings_repository import SettingsRepository
+from helpers import RepositoryFixture, build_quote
+
+
+class ReportRepositoryTest(RepositoryFixture):
+    def setUp(self):
+        super().setUp()
+        self.reports = ReportRepository(self.database)
+
+    def test_summaries_follow_inserts_and_updates(self):
+        first = self.repository.save(build_quote(supplier_name="Acme", margin="20"))
+        self.repository.save(build_quote(supplier_name="Acme", margin="30"))
+        self.repository.save(build_quote(supplier_name="Beta", margin="40"))
+        self.repository.save(build_quote(quote_id=first.quote_id, version=1, supplier_name="Beta", status="APROVADA"))
+
+        quotes = [self.repository.get(quote_id) for quote_id in (1, 2, 3)]
+        totals = self.reports.totals()
+        self.assertEqual(totals["quote_count"], 3)
+        self.assertEqual(totals["net_profit"], sum(quote.result.net_profit for quote in quotes))
+
+        by_supplier = {row["key"]: row["quote_count"] for row in self.reports.breakdown("supplier")}
+        self.assertEqual(by_supplier, {"Acme": 1, "Beta": 2})
+        by_status = {row["key"]: row["quote_count"] for row in self.reports.breakdown("status")}
+        self.assertEqual(by_status, {"RASCUNHO": 2, "APROVADA": 1})
+
+        today = quotes[0].created_at[:10]
+        self.assertEqual([row["day"] for row in self.reports.daily(date_from=today, date_to=today)], [today])
+        self.assertEqual(self.reports.totals(date_to="2000-01-01")["quote_count"], 0)
+
+    def test_below_minimum_is_flagged_at_save_time(self):
+        SettingsRepository(self.database).set_min_price_rule("category", "geral", Decimal("100000"))
+        self.repository.save(build_quote())
+
+        self.assertEqual(self.reports.totals()["below_min_count"], 1)
+        with self.assertRaises(ValueError):
+            self.reports.breakdown("produto")
+
+    def test_upgrade_backfills_summaries_from_existing_quotes(self):
+        self.repository.save(build_quote(supplier_name="Acme"))
+        self.repository.save(build_quote(supplier_name="Beta"))
+        with self.database.connect() as conn:
+            conn.execute("DROP TABLE quote_daily_summary")
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER trg_quotes_summary_{event}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+
+        self.database.initialize()
+        self.repository.save(build_quote(supplier_name="Acme"))
+
+        by_supplier = {row["key"]: row["quote_count"] for row in self.reports.breakdown("supplier")}
+        self.assertEqual(by_supplier, {"Acme": 2, "Beta": 1})
+
+    def test_sums_are_exact_integers_after_many_updates(self):
+        quote = self.repository.save(build_quote(margin="10"))
+        for step in range(1, 40):
+            quote = self.repository.save(
+                build_quote(quote_id=quote.quote_id, version=quote.version, margin=f"{10 + step * 0.37:.2f}")
+            )
+
+        with self.database.connect() as conn:
+            types = conn.execute(
+                "SELECT DISTINCT typeof(margin_hundredths), typeof(net_profit_cents) FROM quote_daily_summary"
+            ).fetchall()
+        self.assertEqual([tuple(row) for row in types], [("integer", "integer")])
+        totals = self.reports.totals()
+        self.assertEqual(totals["net_profit"], quote.result.net_profit)
+        self.assertEqual(totals["avg_margin_pct"], quote.result.margin_pct)
+
+    def test_upgrade_rebuilds_the_real_valued_summary_table(self):
+        saved = self.repository.save(build_quote(supplier_name="Acme"))
+        with self.database.connect() as conn:
+            for event in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER trg_quotes_summary_{event}")
+            conn.execute("DROP TABLE quote_daily_summary")
+            conn.execute(
+                """
+                CREATE TABLE quote_daily_summary (
+                    dimension TEXT NOT NULL, day TEXT NOT NULL, dim_key TEXT NOT NULL,
+                    quote_count INTEGER NOT NULL, margin_sum REAL NOT NULL,
+                    net_profit_sum REAL NOT NULL, below_min_count INTEGER NOT NULL,
+                    PRIMARY KEY (dimension, day, dim_key)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+
+        self.database.initialize()
+        self.repository.save(build_quote(supplier_name="Beta"))
+
+        totals = self.reports.totals()
+        self.assertEqual(totals["quote_count"], 2)
+        self.assertEqual(totals["net_profit"], saved.result.net_profit * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import importlib.util
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+STARTUP_MODULES = (
+    "erp.application.quote_service",
+    "erp.infrastructure.database",
+    "erp.infrastructure.quote_repository",
+    "erp.presentation.history_table",
+    "erp.presentation.recalc_scheduler",
+    "erp.presentation.ui_worker",
+)
+DEFERRED_MODULES = (
+    "erp.infrastructure.audit_chain",
+    "erp.infrastructure.backup_chain",
+    "erp.infrastructure.backup_service",
+    "gzip",
+)
+IMPORT_BUDGET_MS = float(os.environ.get("ERP_IMPORT_BUDGET_MS", "400"))
+FIRST_PAINT_BUDGET_MS = float(os.environ.get("ERP_FIRST_PAINT_BUDGET_MS", "2000"))
+HAS_DISPLAY = not sys.platform.startswith("linux") or bool(os.environ.get("DISPLAY"))
+FIRST_PAINT_SCRIPT = """
+import time
+started = time.perf_counter()
+import erp_precos
+app = erp_precos.PricingERPApp()
+app.update()
+print(round((time.perf_counter() - started) * 1000), int(app.winfo_ismapped()))
+app._on_close()
+"""
+
+
+def _import_profile(statement: str) -> tuple[dict[str, int], str]:
+    """Returns cumulative microseconds of each top-level import, plus stdout."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, total_us, name = line.split(":", 1)[1].split("|")
+        if name.startswith(" ") and not name.startswith("  ") and total_us.strip().isdigit():
+            cumulative[name.strip()] = int(total_us)
+    return cumulative, completed.stdout
+
+
+class StartupImportTest(unittest.TestCase):
+    def test_window_modules_import_within_budget(self):
+        statement = "; ".join(f"import {name}" for name in STARTUP_MODULES)
+        cumulative, _ = _import_profile(statement)
+
+        total_ms = sum(us for name, us in cumulative.items() if name.startswith("erp.")) / 1000
+        self.assertLess(total_ms, IMPORT_BUDGET_MS)
+
+    def test_rarely_used_modules_stay_lazy(self):
+        modules = ", ".join(repr(name) for name in DEFERRED_MODULES)
+        statement = (
+            "; ".join(f"import {name}" for name in STARTUP_MODULES)
+            + "; import erp.cli, sys"
+            + f"; print([name for name in ({modules},) if name in sys.modules])"
+        )
+        _, stdout = _import_profile(statement)
+
+        self.assertEqual(stdout.strip(), "[]")
+
+
+@unittest.skipUnless(importlib.util.find_spec("customtkinter"), "customtkinter nao instalado")
+@unittest.skipUnless(HAS_DISPLAY, "sem display para abrir a janela")
+class FirstPaintTest(unittest.TestCase):
+    def test_window_paints_within_budget(self):
+        # Runs in an empty directory, so the window opens on a fresh data/erp_comercial.db.
+        with tempfile.TemporaryDirectory() as workdir:
+            completed = subprocess.run(
+                [sys.executable, "-c", FIRST_PAINT_SCRIPT],
+                cwd=workdir,
+                env={**os.environ, "PYTHONPATH": str(ROOT), "ERP_WATCH_MS": "0"},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        elapsed_ms, mapped = completed.stdout.split()
+
+        self.assertEqual(mapped, "1")
+        self.assertLess(float(elapsed_ms), FIRST_PAINT_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
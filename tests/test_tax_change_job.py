@@ -0,0 +1,117 @@
+from dataclasses import replace
+from decimal import Decimal
+import unittest
+
+from erp.application.tax_change_job import TaxChangeJob, parse_tax_change
+from erp.infrastructure.settings_repository import SettingsRepository
+from helpers import RepositoryFixture, build_quote
+
+
+class TaxChangeJobTest(RepositoryFixture):
+    def _seed(self, count, status="RASCUNHO", icms="18"):
+        quotes = []
+        for idx in range(count):
+            quote = build_quote(product_name=f"Produto {idx}", status=status)
+            quote = replace(quote, sale=replace(quote.sale, icms_rate_pct=Decimal(icms)))
+            quotes.append(self.repository.save(quote))
+        return quotes
+
+    def test_only_open_quotes_with_old_rate_are_changed(self):
+        targets = self._seed(4)
+        other_rate = self._seed(2, icms="7")
+        approved = self._seed(2, status="APROVADA")
+
+        report = TaxChangeJob(self.repository, chunk_size=3).run([parse_tax_change("sale.icms_rate_pct=18:12")])
+
+        self.assertTrue(report.completed)
+        self.assertEqual((report.processed, report.saved), (4, 4))
+        for quote in targets:
+            updated = self.repository.get(quote.quote_id)
+            self.assertEqual((updated.version, updated.sale.icms_rate_pct), (2, Decimal("12")))
+            self.assertEqual(updated.result.margin_pct, quote.result.margin_pct)
+        for quote in other_rate + approved:
+            self.assertEqual(self.repository.get(quote.quote_id).version, 1)
+
+    def test_interrupted_job_resumes_after_last_committed_chunk(self):
+        quotes = self._seed(10)
+        changes = [parse_tax_change("sale.icms_rate_pct=12")]
+
+        def interrupt(report):
+            if report.processed >= 4:
+                raise KeyboardInterrupt
+
+        job = TaxChangeJob(self.repository, chunk_size=4)
+        with self.assertRaises(KeyboardInterrupt):
+            job.run(changes, job_id="icms", progress=interrupt)
+
+        report = job.run(changes, job_id="icms")
+        self.assertEqual(report.resumed_from, quotes[3].quote_id)
+        self.assertEqual(report.processed, 6)
+        self.assertEqual({self.repository.get(quote.quote_id).version for quote in quotes}, {2})
+
+        again = job.run(changes, job_id="icms")
+        self.assertTrue(again.completed)
+        self.assertEqual(again.processed, 0)
+        with self.assertRaises(ValueError):
+            job.run([parse_tax_change("sale.icms_rate_pct=7")], job_id="icms")
+
+    def test_conflicting_quotes_are_retried_on_the_next_run(self):
+        quotes = self._seed(4)
+        changes = [parse_tax_change("sale.icms_rate_pct=18:12")]
+        job = TaxChangeJob(self.repository, chunk_size=3)
+        save_many = self.repository.save_many
+        raced = []
+
+        def racing_save_many(batch, checkpoint=None):
+            if not raced:
+                raced.append(self.repository.save(replace(self.repository.get(quotes[1].quote_id), notes="editada")))
+            return save_many(batch, checkpoint=checkpoint)
+
+        self.repository.save_many = racing_save_many
+        first = job.run(changes, job_id="icms")
+        self.repository.save_many = save_many
+
+        self.assertEqual((first.processed, first.saved, first.conflicts), (4, 3, [quotes[1].quote_id]))
+        self.assertFalse(first.completed)
+        second = job.run(changes, job_id="icms")
+        self.assertEqual((second.processed, second.saved, second.conflicts), (1, 1, []))
+        self.assertTrue(second.completed)
+        retried = self.repository.get(quotes[1].quote_id)
+        self.assertEqual((retried.version, retried.notes, retried.sale.icms_rate_pct), (3, "editada", Decimal("12")))
+        self.assertEqual(job.run(changes, job_id="icms").processed, 0)
+
+    def test_failed_quotes_are_reported_once_and_not_retried(self):
+        quotes = self._seed(3)
+        broken = self.repository.save(replace(quotes[1], sale=replace(quotes[1].sale, pis_rate_pct=Decimal("10"))))
+        changes = [parse_tax_change("sale.icms_rate_pct=18:85")]
+        job = TaxChangeJob(self.repository)
+
+        first = job.run(changes, job_id="icms")
+        self.assertEqual([quote_id for quote_id, _message in first.failed], [broken.quote_id])
+        self.assertTrue(first.completed)
+
+        second = job.run(changes, job_id="icms")
+        self.assertEqual((second.processed, second.failed), (0, []))
+        self.assertEqual([quote_id for quote_id, _message in second.failed_earlier], [broken.quote_id])
+        self.assertEqual(self.repository.get(broken.quote_id).version, broken.version)
+
+    def test_new_prices_follow_the_minimum_price_rule(self):
+        quote = self._seed(1)[0]
+        SettingsRepository(self.repository.database).set_min_price_rule("product", quote.product_name, Decimal("900"))
+
+        TaxChangeJob(self.repository).run([parse_tax_change("sale.icms_rate_pct=18:12")])
+
+        self.assertEqual(self.repository.get(quote.quote_id).result.sale_price, Decimal("900"))
+
+    def test_category_filter_matches_whole_name(self):
+        cabo = self.repository.save(build_quote(category_name="Cabo"))
+        cabos = self.repository.save(build_quote(category_name="Cabos"))
+
+        TaxChangeJob(self.repository).run([parse_tax_change("sale.icms_rate_pct=12")], filters={"category": "CABO"})
+
+        self.assertEqual(self.repository.get(cabo.quote_id).version, 2)
+        self.assertEqual(self.repository.get(cabos.quote_id).version, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()